@@ -0,0 +1,79 @@
+from fastapi import APIRouter, Depends, Request
+from ..auth import session_cache
+from ..auth import sweeper as session_sweeper
+from ..auth.hashing import password_hasher
+from ..auth.principal import verified_tokens
+from ..auth.profiles import profile_cache
+from ..auth.revocation import revocations
+from ..auth.service import require_admin
+from ..db.entity_cache import entity_cache
+from ..db.stats import query_stats
+from ..progress import journal as progress_journal
+from ..quiz.service import quiz_sessions
+from ..ratelimit.gcra import rate_limiter
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+@router.get("/db/stats")
+async def get_db_stats(
+    request: Request,
+    limit: int = 50,
+    order_by: str = "total_ms",
+    user: dict = Depends(require_admin)
+):
+    """
+    Get database statistics.
+
+    Returns pool/backend metrics, per-statement latency histograms, row and
+    byte counts keyed by normalized SQL (sorted by ``order_by``, e.g.
+    ``total_ms``, ``calls`` or ``rows``), the sampled slow-query log with
+    query plans, the entity cache's hit, miss and eviction counters, the
+    progress journal's backlog and the number of active quiz sessions.
+
+    Requires authentication:
+    - Valid access token in Authorization header
+    - Admin role
+    """
+    return {
+        "pool": request.app.state.db.metrics(),
+        "entity_cache": entity_cache.metrics(),
+        "progress_journal": progress_journal.progress_journal.metrics() if progress_journal.progress_journal else None,
+        "quiz_sessions": quiz_sessions.metrics(),
+        **query_stats.snapshot(limit=limit, order_by=order_by),
+    }
+
+@router.delete("/db/stats")
+async def reset_db_stats(user: dict = Depends(require_admin)):
+    """Reset the per-statement statistics and the slow-query log (admin only)."""
+    query_stats.reset()
+    return {"status": "success"}
+
+@router.get("/auth/stats")
+async def get_auth_stats(user: dict = Depends(require_admin)):
+    """
+    Get authentication statistics.
+
+    Returns the password hasher's pool utilization (workers, queue depth,
+    rejections, hash latency), the hit rates of the per-worker session,
+    profile and verified-token caches, the revocation filter, the rate
+    limiter's counters and the last session sweep.
+
+    Requires authentication:
+    - Valid access token in Authorization header
+    - Admin role
+    """
+    return {
+        "password_hasher": password_hasher.metrics(),
+        "session_cache": session_cache.session_cache.metrics(),
+        "profile_cache": profile_cache.metrics(),
+        "verified_tokens": verified_tokens.metrics(),
+        "revocations": revocations.metrics(),
+        "rate_limiter": rate_limiter.metrics(),
+        "session_sweeper": session_sweeper.sweeper.metrics() if session_sweeper.sweeper else None,
+    }
+
+@router.post("/sessions/sweep")
+async def sweep_sessions(request: Request, user: dict = Depends(require_admin)):
+    """Delete expired sessions and tokens now and return what was removed (admin only)."""
+    sweeper = session_sweeper.sweeper or session_sweeper.SessionSweeper(request.app.state.db)
+    return await sweeper.sweep()
@@ -4,17 +4,30 @@ from fastapi.openapi.docs import get_swagger_ui_html, get_redoc_html
 from fastapi.openapi.utils import get_openapi
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import JSONResponse
-from libsql_client import create_client_sync
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 import os
 from .auth.routes import router as auth_router
 from .users.routes import router as users_router
 from .auth.service import AuthService
-from .db import get_db, get_test_db
+from .db import get_db, get_test_db, close_db
 from .topics.routes import router as topics_router
+from .questions.routes import router as questions_router
+from .progress.routes import router as progress_router
+from .quiz.routes import router as quiz_router
+from .review.routes import router as review_router
 from .routes.log import router as log_router
+from .admin.routes import router as admin_router
+from .auth import session_cache
+from .auth import sweeper as session_sweeper
+from .progress import journal as progress_journal
+from .auth.revocation import revocations
+from .ratelimit.gcra import rate_limiter
+from .ratelimit.middleware import RateLimitMiddleware
 import logging
 import sys
+import asyncio
+import contextvars
 
 # Load environment variables
 load_dotenv()
@@ -31,6 +44,28 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Stop background tasks and release pooled database connections on shutdown."""
+    # Serializes the worker's lazy startup (see db_session_middleware). Made
+    # here because a lock binds to the event loop it first waits on.
+    app.state.startup_lock = asyncio.Lock()
+    yield
+    if progress_journal.progress_journal is not None:
+        await progress_journal.progress_journal.stop()
+        progress_journal.progress_journal = None
+    if session_sweeper.sweeper is not None:
+        await session_sweeper.sweeper.stop()
+        session_sweeper.sweeper = None
+    if session_cache.invalidation_channel is not None:
+        await session_cache.invalidation_channel.stop()
+        session_cache.invalidation_channel = None
+    await close_db()
+    # A later lifespan in this process starts the worker afresh
+    for name in ("db", "auth_service", "revocations_loaded", "startup_lock"):
+        if hasattr(app.state, name):
+            delattr(app.state, name)
+
 # Create FastAPI app with metadata
 app = FastAPI(
     title="QuizLearn API",
@@ -110,11 +145,27 @@ app = FastAPI(
             "name": "progress",
             "description": "User progress tracking and statistics",
         },
+        {
+            "name": "quiz",
+            "description": "Server-side quiz sessions with batched answers",
+        },
+        {
+            "name": "review",
+            "description": "Spaced-repetition review queue",
+        },
+        {
+            "name": "admin",
+            "description": "Operational statistics (admin only)",
+        },
     ],
     docs_url=None,  # Disable default docs
     redoc_url=None,  # Disable default redoc
+    lifespan=lifespan,
 )
 
+# Rate limits; added before CORS so 429 responses still carry CORS headers
+app.add_middleware(RateLimitMiddleware, limiter=rate_limiter)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -132,6 +183,7 @@ async def http_exception_handler(request: Request, exc: HTTPException):
     return JSONResponse(
         status_code=exc.status_code,
         content={"detail": {"error_code": str(exc.status_code), "message": exc.detail}},
+        headers=exc.headers,  # e.g. Retry-After, WWW-Authenticate
     )
 
 # Add middleware for handling errors
@@ -164,14 +216,65 @@ async def error_handling_middleware(request: Request, call_next):
             
         return error_response
 
+async def _load_revocations(db):
+    try:
+        count = await revocations.rebuild(db)
+        logger.info(f"Loaded {count} revoked token families")
+    except Exception as e:
+        logger.error(f"Failed to load revoked tokens: {str(e)}")
+
+def _startup_lock(app: FastAPI) -> asyncio.Lock:
+    # Serializes the worker's lazy startup, so that concurrent first requests
+    # neither start background tasks twice nor run before startup finished.
+    # Apps served without a lifespan get their lock on first use.
+    lock = getattr(app.state, "startup_lock", None)
+    if lock is None:
+        lock = app.state.startup_lock = asyncio.Lock()
+    return lock
+
+async def _start_worker(app: FastAPI) -> None:
+    # Use test database if it's set in dependency overrides
+    db_func = app.dependency_overrides.get(get_db, get_db)
+    db = db_func()
+    await db.open()  # Warm up the pool and initialize the schema once
+
+    # Delete expired sessions and tokens in the background (0 disables)
+    if session_sweeper.sweeper is None:
+        session_sweeper.sweeper = session_sweeper.create_sweeper(db)
+        if session_sweeper.sweeper is not None:
+            session_sweeper.sweeper.start()
+
+    # Replay answers journaled by a previous process before taking new ones
+    if progress_journal.progress_journal is None:
+        progress_journal.progress_journal = await progress_journal.open_journal(db)
+        if progress_journal.progress_journal is None and os.getenv("PROGRESS_JOURNAL_PATH"):
+            # Every slot is owned by another worker
+            logger.warning("No free progress journal slot; answers are written synchronously in this worker")
+
+    # Load revocations made before this worker started; outside the
+    # request's context so it isn't attributed to the first request
+    app.state.revocations_loaded = asyncio.get_running_loop().create_task(
+        _load_revocations(db), context=contextvars.Context()
+    )
+
+    # Pick up logouts from other workers (0 disables, leaving the cache TTL)
+    poll_interval = float(os.getenv("SESSION_INVALIDATION_POLL_INTERVAL", "0"))
+    if poll_interval > 0 and session_cache.invalidation_channel is None:
+        channel = session_cache.SessionInvalidationChannel(db, session_cache.session_cache, poll_interval)
+        await channel.start()
+        session_cache.invalidation_channel = channel
+
+    # Published last: requests that find it skip startup altogether
+    app.state.auth_service = AuthService(db)
+    app.state.db = db
+
 # Database connection middleware
 @app.middleware("http")
 async def db_session_middleware(request: Request, call_next):
     if not hasattr(request.app.state, "db"):
-        # Use test database if it's set in dependency overrides
-        db_func = app.dependency_overrides.get(get_db, get_db)
-        request.app.state.db = db_func()
-        request.app.state.auth_service = AuthService(request.app.state.db)
+        async with _startup_lock(request.app):
+            if not hasattr(request.app.state, "db"):
+                await _start_worker(request.app)
 
     try:
         response = await call_next(request)
@@ -276,13 +379,18 @@ api_v1 = APIRouter(prefix="/api/v1")
 api_v1.include_router(auth_router)
 api_v1.include_router(users_router)
 api_v1.include_router(topics_router)
+api_v1.include_router(questions_router)
+api_v1.include_router(progress_router)
+api_v1.include_router(quiz_router)
+api_v1.include_router(review_router)
 api_v1.include_router(log_router)
+api_v1.include_router(admin_router)
 
 # Include API v1 router in main app
 app.include_router(api_v1)
 
 # Mount static files
-app.mount("/static", StaticFiles(directory="src/static"), name="static")
+app.mount("/static", StaticFiles(directory="src/static", check_dir=False), name="static")
 
 # Health check endpoint
 @app.get(
@@ -0,0 +1,72 @@
+import time
+import argparse
+import statistics
+from typing import Callable, Dict, Optional
+
+from passlib.hash import bcrypt
+
+from .jwt import BCRYPT_ROUNDS
+
+# bcrypt accepts 4-31; below 10 is too cheap for production passwords
+MIN_ROUNDS = 10
+MAX_ROUNDS = 16
+
+
+def time_hash(rounds: int, samples: int = 3) -> float:
+    """Median seconds for one bcrypt hash at ``rounds`` on this machine."""
+    hasher = bcrypt.using(rounds=rounds)
+    timings = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        hasher.hash("calibration-password")
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def calibrate(
+    target_ms: float,
+    min_rounds: int = MIN_ROUNDS,
+    max_rounds: int = MAX_ROUNDS,
+    timer: Callable[[int], float] = time_hash,
+) -> Dict[int, float]:
+    """Time each cost from ``min_rounds`` up and return ``{rounds: ms}``.
+
+    Stops at the first cost above ``target_ms``: every extra round doubles
+    the work, so higher costs are only slower.
+    """
+    timings: Dict[int, float] = {}
+    for rounds in range(min_rounds, max_rounds + 1):
+        timings[rounds] = timer(rounds) * 1000
+        if timings[rounds] > target_ms:
+            break
+    return timings
+
+
+def pick_rounds(timings: Dict[int, float], target_ms: float) -> Optional[int]:
+    """The highest cost that stays within ``target_ms``, if any."""
+    within = [rounds for rounds, ms in timings.items() if ms <= target_ms]
+    return max(within) if within else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pick a bcrypt cost that meets a target hash latency on this machine.")
+    parser.add_argument("--target-ms", type=float, default=250, help="latency budget for one hash (default 250)")
+    parser.add_argument("--min-rounds", type=int, default=MIN_ROUNDS, help=f"lowest cost to consider (default {MIN_ROUNDS})")
+    parser.add_argument("--max-rounds", type=int, default=MAX_ROUNDS, help=f"highest cost to consider (default {MAX_ROUNDS})")
+    args = parser.parse_args(argv)
+
+    timings = calibrate(args.target_ms, args.min_rounds, args.max_rounds)
+    for rounds, ms in timings.items():
+        current = " (current)" if rounds == BCRYPT_ROUNDS else ""
+        print(f"  rounds {rounds:2d}: {ms:8.1f}ms{current}")
+
+    rounds = pick_rounds(timings, args.target_ms)
+    if rounds is None:
+        print(f"\nEven {args.min_rounds} rounds take longer than {args.target_ms:g}ms; keeping BCRYPT_ROUNDS={BCRYPT_ROUNDS}")
+        return
+    print(f"\nBCRYPT_ROUNDS={rounds}")
+    if rounds != BCRYPT_ROUNDS:
+        print("Existing hashes are upgraded to the new cost on each user's next login.")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+import os
+import time
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+from .jwt import get_password_hash, verify_password
+
+logger = logging.getLogger(__name__)
+
+
+class HasherBusy(Exception):
+    """Raised when the password hasher's queue is full."""
+
+
+class PasswordHasher:
+    """Runs bcrypt hashing and verification off the event loop.
+
+    bcrypt releases the GIL, so ``workers`` threads hash in parallel while
+    the loop keeps serving other requests. At most ``max_queue`` calls wait
+    for a free worker; beyond that ``HasherBusy`` is raised immediately, so
+    a login storm is shed instead of queueing up behind the CPU.
+    """
+
+    def __init__(self, workers: Optional[int] = None, max_queue: int = 32):
+        self.workers = workers or min(4, os.cpu_count() or 1)
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hasher")
+        self._pending = 0
+
+        # Counters exposed through metrics()
+        self._completed = 0
+        self._rejected = 0
+        self._busy_total = 0.0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    async def hash(self, password: str) -> str:
+        return await self._submit(get_password_hash, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self._submit(verify_password, password, hashed_password)
+
+    async def _submit(self, fn, *args) -> Any:
+        if self._pending >= self.workers + self.max_queue:
+            self._rejected += 1
+            raise HasherBusy("Too many password operations in progress")
+
+        self._pending += 1
+        submitted = time.monotonic()
+
+        def run():
+            started = time.monotonic()
+            waited = started - submitted
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+            try:
+                return fn(*args)
+            finally:
+                self._busy_total += time.monotonic() - started
+                self._completed += 1
+
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, run)
+        finally:
+            self._pending -= 1
+
+    def metrics(self) -> Dict[str, Any]:
+        """Return a snapshot of pool utilization."""
+        completed = self._completed
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "in_flight": min(self._pending, self.workers),
+            "queued": max(self._pending - self.workers, 0),
+            "completed": completed,
+            "rejected": self._rejected,
+            "avg_ms": round(self._busy_total / completed * 1000, 3) if completed else 0.0,
+            "wait_avg_ms": round(self._wait_total / completed * 1000, 3) if completed else 0.0,
+            "wait_max_ms": round(self._wait_max * 1000, 3),
+        }
+
+
+# Process-wide hasher used by the auth service
+password_hasher = PasswordHasher(
+    workers=int(os.getenv("PASSWORD_HASH_WORKERS", "0")) or None,
+    max_queue=int(os.getenv("PASSWORD_HASH_QUEUE", "32")),
+)
@@ -12,8 +12,18 @@ load_dotenv()
 SECRET_KEY = os.getenv("JWT_SECRET_KEY", "your-secret-key")  # In production, use a secure secret key
 ALGORITHM = "HS256"
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# bcrypt cost factor; pick one for the deployment's hardware with
+# `python -m src.lib.auth.calibrate`. Hashes made with another cost are
+# upgraded on the next successful login.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+# Password hashing. hex_sha256 only verifies the legacy unsalted seed hashes,
+# which are rehashed with bcrypt on login.
+pwd_context = CryptContext(
+    schemes=["bcrypt", "hex_sha256"],
+    deprecated=["hex_sha256"],
+    bcrypt__rounds=BCRYPT_ROUNDS,
+)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash."""
@@ -23,6 +33,10 @@ def get_password_hash(password: str) -> str:
     """Get password hash."""
     return pwd_context.hash(password)
 
+def password_needs_update(hashed_password: str) -> bool:
+    """True if the hash uses a deprecated scheme or a different bcrypt cost."""
+    return pwd_context.needs_update(hashed_password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a new access token."""
     to_encode = data.copy()
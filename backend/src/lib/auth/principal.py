@@ -0,0 +1,151 @@
+import os
+import time
+import hashlib
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, Iterable, NamedTuple, Optional
+
+from .jwt import decode_access_token
+from .profiles import Profile
+
+# Bit per role in the access token's ``rol`` claim; append new roles, never reorder
+ROLE_BITS = {
+    "role_user": 1,
+    "role_admin": 2,
+}
+
+
+def encode_roles(roles: Iterable[str]) -> int:
+    """Pack roles into a bitmask (roles without a bit are left out)."""
+    mask = 0
+    for role in roles:
+        mask |= ROLE_BITS.get(role, 0)
+    return mask
+
+
+def decode_roles(mask: int) -> FrozenSet[str]:
+    return frozenset(role for role, bit in ROLE_BITS.items() if mask & bit)
+
+
+def access_token_claims(user_id: str, session_id: str, roles: Iterable[str]) -> Dict[str, Any]:
+    """Compact access token claims: subject, session id and role bitmask.
+
+    Profile fields are not embedded; they are served from the profile cache.
+    """
+    return {"sub": user_id, "sid": session_id, "rol": encode_roles(roles)}
+
+
+class TokenClaims(NamedTuple):
+    """The verified claims of an access token."""
+    subject: str
+    session_id: Optional[str]
+    roles: FrozenSet[str]
+    expires_at: float
+
+
+class Principal:
+    """The authenticated caller: verified token claims plus the user's profile.
+
+    Roles come from the profile rather than the token, so a role change
+    applies as soon as the profile is reloaded, without reissuing tokens.
+    ``roles`` is a frozenset, so role checks are set lookups.
+    """
+
+    __slots__ = ("id", "session_id", "roles", "profile")
+
+    def __init__(self, claims: TokenClaims, profile: Profile):
+        self.id = claims.subject
+        self.session_id = claims.session_id
+        self.roles = profile.roles
+        self.profile = profile
+
+    @property
+    def user(self) -> Dict[str, Any]:
+        """The user as served by the API (profile fields plus the session id)."""
+        return {**self.profile.to_dict(), "session_id": self.session_id}
+
+    def has_role(self, *roles: str) -> bool:
+        """True if the principal holds any of ``roles``."""
+        return not self.roles.isdisjoint(roles)
+
+    @property
+    def is_admin(self) -> bool:
+        return "role_admin" in self.roles
+
+
+class VerifiedTokenCache:
+    """Bounded LRU of verified tokens, keyed by the token's SHA-256 digest.
+
+    Entries are kept until the token's ``exp``, so a repeat caller skips
+    signature verification and claim parsing entirely. Only successfully
+    verified tokens are stored.
+    """
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        # token digest -> claims
+        self._entries: "OrderedDict[bytes, TokenClaims]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> Optional[TokenClaims]:
+        key = self._key(token)
+        claims = self._entries.get(key)
+        if claims is None or claims.expires_at <= time.time():
+            if claims is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return claims
+
+    def put(self, token: str, claims: TokenClaims) -> None:
+        key = self._key(token)
+        self._entries[key] = claims
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+# Process-wide cache of verified access tokens
+verified_tokens = VerifiedTokenCache(int(os.getenv("JWT_TOKEN_CACHE_SIZE", "4096")))
+
+
+def _claims(payload: Dict[str, Any]) -> TokenClaims:
+    if "sid" in payload:
+        return TokenClaims(payload["sub"], payload["sid"], decode_roles(payload.get("rol", 0)), payload["exp"])
+    # Tokens issued before the compact format embedded the whole user
+    user = payload.get("user")
+    if not isinstance(user, dict) or "id" not in user:
+        raise ValueError("Could not validate credentials")
+    roles = user.get("roles") or []
+    return TokenClaims(user["id"], user.get("session_id"), frozenset(roles), payload["exp"])
+
+
+def resolve_claims(token: str) -> TokenClaims:
+    """Verify an access token (or reuse an earlier verification).
+
+    Raises ValueError if the token is invalid, expired or not an access token.
+    """
+    claims = verified_tokens.get(token)
+    if claims is not None:
+        return claims
+
+    claims = _claims(decode_access_token(token))
+    verified_tokens.put(token, claims)
+    return claims
@@ -0,0 +1,99 @@
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, Optional, Tuple
+
+
+class Profile:
+    """The user fields the API serves for the caller, kept out of the token."""
+
+    __slots__ = ("id", "email", "name", "roles", "_role_list")
+
+    def __init__(self, id: str, email: str, name: str, roles):
+        if isinstance(roles, str):
+            roles = roles.split(",") if roles else []
+        self.id = id
+        self.email = email
+        self.name = name
+        self.roles: FrozenSet[str] = frozenset(roles)
+        self._role_list = list(roles)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "email": self.email,
+            "name": self.name,
+            "roles": list(self._role_list),
+        }
+
+
+class ProfileCache:
+    """Bounded TTL/LRU cache of user profiles, keyed by user id.
+
+    Entries are dropped by ``invalidate()`` when a user is updated or
+    deleted on this worker; ``ttl`` bounds how long other workers can serve
+    a stale profile.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl: float = 300.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        # user id -> (profile, cached until)
+        self._entries: "OrderedDict[str, Tuple[Profile, float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id: str) -> Optional[Profile]:
+        entry = self._entries.get(user_id)
+        if entry is None or entry[1] <= time.time():
+            if entry is not None:
+                del self._entries[user_id]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(user_id)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, profile: Profile) -> None:
+        self._entries[profile.id] = (profile, time.time() + self.ttl)
+        self._entries.move_to_end(profile.id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: str) -> None:
+        self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+# Process-wide profile cache used by get_principal
+profile_cache = ProfileCache(
+    max_entries=int(os.getenv("PROFILE_CACHE_MAX_ENTRIES", "10000")),
+    ttl=float(os.getenv("PROFILE_CACHE_TTL", "300")),
+)
+
+
+async def load_profile(db, user_id: str) -> Optional[Profile]:
+    """Return the user's profile, going to the database only on a cache miss.
+
+    Returns None if the user no longer exists.
+    """
+    profile = profile_cache.get(user_id)
+    if profile is not None:
+        return profile
+
+    result = await db.execute("SELECT id, email, name, roles FROM users WHERE id = ?", [user_id])
+    if not result.rows:
+        return None
+    profile = Profile(*result.rows[0].astuple())
+    profile_cache.put(profile)
+    return profile
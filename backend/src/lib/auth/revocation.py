@@ -0,0 +1,115 @@
+import os
+import math
+import time
+import hashlib
+import logging
+from typing import Any, Dict, Iterable
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings.
+
+    Sized for ``capacity`` items at ``error_rate`` false positives; it has
+    no false negatives, so a miss is a definite "not in the set".
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        capacity = max(capacity, 1)
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        # Double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class RevocationList:
+    """Revoked token ids, stored in ``revoked_tokens`` and mirrored in a Bloom filter.
+
+    ``might_be_revoked()`` answers from memory, so the common case (not
+    revoked) never queries the database; only Bloom filter hits are
+    confirmed with an exact lookup. ``rebuild()`` reloads the filter from
+    the table, e.g. at startup, to pick up revocations made by other
+    workers, and to shed expired ids.
+    """
+
+    def __init__(self, capacity: int = 100000, error_rate: float = 0.01):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self._filter = BloomFilter(capacity, error_rate)
+        self.checks = 0
+        self.confirmed = 0
+        self.false_positives = 0
+
+    def add(self, token_id: str) -> None:
+        """Mirror a revocation already written to ``revoked_tokens``."""
+        self._filter.add(token_id)
+        if self._filter.count > self._filter.capacity:
+            logger.warning("Revocation filter is over capacity; false positives will rise until the next rebuild")
+
+    def might_be_revoked(self, token_id: str) -> bool:
+        self.checks += 1
+        return token_id in self._filter
+
+    async def is_revoked(self, db, token_id: str) -> bool:
+        """Exact answer: the Bloom filter, then the table for filter hits."""
+        if not self.might_be_revoked(token_id):
+            return False
+        result = await db.execute(
+            "SELECT 1 FROM revoked_tokens WHERE id = ? AND expires_at > ?",
+            [token_id, int(time.time())]
+        )
+        if result.rows:
+            self.confirmed += 1
+            return True
+        self.false_positives += 1
+        return False
+
+    async def rebuild(self, db) -> int:
+        """Reload the filter from the unexpired rows of ``revoked_tokens``."""
+        result = await db.execute("SELECT id FROM revoked_tokens WHERE expires_at > ?", [int(time.time())])
+        self._filter = self._build(row[0] for row in result.rows)
+        return self._filter.count
+
+    def _build(self, token_ids: Iterable[str]) -> BloomFilter:
+        token_ids = list(token_ids)
+        bloom = BloomFilter(max(self.capacity, 2 * len(token_ids)), self.error_rate)
+        for token_id in token_ids:
+            bloom.add(token_id)
+        return bloom
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "entries": self._filter.count,
+            "capacity": self._filter.capacity,
+            "bits": self._filter.size,
+            "hashes": self._filter.hashes,
+            "checks": self.checks,
+            "confirmed": self.confirmed,
+            "false_positives": self.false_positives,
+        }
+
+
+# Process-wide revocation list used by the auth service
+revocations = RevocationList(
+    capacity=int(os.getenv("REVOCATION_FILTER_CAPACITY", "100000")),
+    error_rate=float(os.getenv("REVOCATION_FILTER_ERROR_RATE", "0.01")),
+)
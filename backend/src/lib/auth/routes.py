@@ -1,11 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from typing import Optional
-from .service import AuthService, get_current_user, require_admin, AuthenticationError, row_to_dict, verify_password
-from .jwt import create_access_token, decode_access_token
-from datetime import timedelta
+from .service import AuthService, get_current_user, get_principal, require_admin, AuthenticationError, AccountLockedError
+from .hashing import password_hasher
+from ..ratelimit.gcra import rate_limiter
+from ..ratelimit.middleware import ACCOUNT_POLICY
 from pydantic import BaseModel
 import logging
+import math
 
 logger = logging.getLogger(__name__)
 
@@ -14,10 +16,6 @@ router = APIRouter(prefix="/auth", tags=["auth"])
 # OAuth2 configuration
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
-# Token expiration settings
-ACCESS_TOKEN_EXPIRE_MINUTES = 30
-REFRESH_TOKEN_EXPIRE_DAYS = 30
-
 class Token(BaseModel):
     access_token: str
     refresh_token: str
@@ -31,6 +29,21 @@ class TokenData(BaseModel):
 class LogoutRequest(BaseModel):
     refresh_token: str
 
+def _raise_if_retryable(e: AuthenticationError) -> None:
+    """Ask the client to retry later when hashing is saturated or the account is locked."""
+    if e.error_code == "SERVER_BUSY":
+        raise HTTPException(
+            status_code=503,
+            detail={"error_code": e.error_code, "message": str(e)},
+            headers={"Retry-After": "1"},
+        )
+    if isinstance(e, AccountLockedError):
+        raise HTTPException(
+            status_code=429,
+            detail={"error_code": e.error_code, "message": str(e)},
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
 @router.options("/login")
 async def login_options():
     """Handle preflight requests for the login endpoint."""
@@ -41,52 +54,31 @@ async def login(request: Request, form_data: OAuth2PasswordRequestForm = Depends
     """Login endpoint that returns an access token."""
     try:
         logger.info(f"Login attempt for username: {form_data.username}")
+
+        # Per-account limit, on top of the per-IP limit of the middleware
+        decision = await rate_limiter.hit_async(ACCOUNT_POLICY, form_data.username.lower())
+        if not decision.allowed:
+            raise HTTPException(
+                status_code=429,
+                detail={"error_code": "RATE_LIMITED", "message": "Too many login attempts for this account"},
+                headers={"Retry-After": str(max(1, math.ceil(decision.retry_after)))},
+            )
         auth_service = AuthService(request.app.state.db)
         
         # Log form data for debugging
         logger.info(f"Form data - username: {form_data.username}, password length: {len(form_data.password)}")
         
-        user = await auth_service.authenticate_user(form_data.username, form_data.password)
-        
-        if not user:
-            logger.warning(f"Authentication failed: user not found or invalid password for {form_data.username}")
-            raise HTTPException(
-                status_code=401,
-                detail={
-                    "error_code": "INVALID_CREDENTIALS",
-                    "message": "Incorrect username or password"
-                },
-                headers={"WWW-Authenticate": "Bearer"},
-            )
-
-        logger.info(f"Authentication successful for user: {user['email']}")
-
-        # Create access token
-        access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-        access_token = create_access_token(
-            data={"sub": user["id"], "user": user},
-            expires_delta=access_token_expires
-        )
+        # Authenticate and open a session (access token carries the session id)
+        session = await auth_service.login(form_data.username, form_data.password)
+        user = session["user"]
 
-        # Create refresh token
-        refresh_token_expires = timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
-        refresh_token = create_access_token(
-            data={"sub": user["id"], "type": "refresh"},
-            expires_delta=refresh_token_expires
-        )
-
-        response_data = {
-            "access_token": access_token,
-            "refresh_token": refresh_token,
-            "token_type": "bearer",
-            "expires_in": ACCESS_TOKEN_EXPIRE_MINUTES * 60,  # Convert to seconds
-            "user": user
-        }
         logger.info(f"Login successful for user: {user['email']}")
-        return response_data
+        # The session comes with the first token of its refresh family
+        return session
 
     except AuthenticationError as e:
         logger.error(f"Authentication error for {form_data.username}: {str(e)}")
+        _raise_if_retryable(e)
         raise HTTPException(
             status_code=401,
             detail={
@@ -95,6 +87,8 @@ async def login(request: Request, form_data: OAuth2PasswordRequestForm = Depends
             },
             headers={"WWW-Authenticate": "Bearer"},
         )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Unexpected error during login for {form_data.username}: {str(e)}")
         raise HTTPException(
@@ -106,98 +100,74 @@ async def login(request: Request, form_data: OAuth2PasswordRequestForm = Depends
         )
 
 @router.post("/register", response_model=Token)
-async def register(username: str, password: str, name: str):
+async def register(request: Request, username: str, password: str, name: str):
     """Register a new user."""
-    auth_service = AuthService()
-    user = await auth_service.register_user(username, password, name)
-    
-    if not user:
+    auth_service = AuthService(request.app.state.db)
+    try:
+        # User row and first session are written in a single batch
+        session = await auth_service.register_user(username, password, name)
+    except AuthenticationError as e:
+        _raise_if_retryable(e)
         raise HTTPException(
             status_code=400,
-            detail="User registration failed",
+            detail={
+                "error_code": e.error_code,
+                "message": str(e)
+            }
         )
-
-    # Create access token
-    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": user["id"], "user": user},
-        expires_delta=access_token_expires
-    )
-
-    # Create refresh token
-    refresh_token_expires = timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
-    refresh_token = create_access_token(
-        data={"sub": user["id"], "type": "refresh"},
-        expires_delta=refresh_token_expires
-    )
-
-    return {
-        "access_token": access_token,
-        "refresh_token": refresh_token,
-        "token_type": "bearer",
-        "expires_in": ACCESS_TOKEN_EXPIRE_MINUTES * 60,  # Convert to seconds
-        "user": user
-    }
+    return session
 
 @router.post("/refresh", response_model=Token)
-async def refresh_token(refresh_token: str):
-    """Get a new access token using a refresh token."""
-    try:
-        payload = decode_access_token(refresh_token)
-        if payload.get("type") != "refresh":
-            raise HTTPException(
-                status_code=401,
-                detail="Invalid refresh token",
-            )
-
-        auth_service = AuthService()
-        user = await auth_service.get_user_by_id(payload["sub"])
-        if not user:
-            raise HTTPException(
-                status_code=401,
-                detail="User not found",
-            )
-
-        # Create new access token
-        access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-        access_token = create_access_token(
-            data={"sub": user["id"], "user": user},
-            expires_delta=access_token_expires
-        )
-
-        # Create new refresh token
-        refresh_token_expires = timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
-        new_refresh_token = create_access_token(
-            data={"sub": user["id"], "type": "refresh"},
-            expires_delta=refresh_token_expires
-        )
+async def refresh_token(request: Request, refresh_token: str):
+    """Get a new access token using a refresh token.
 
-        return {
-            "access_token": access_token,
-            "refresh_token": new_refresh_token,
-            "token_type": "bearer",
-            "expires_in": ACCESS_TOKEN_EXPIRE_MINUTES * 60,  # Convert to seconds
-            "user": user
-        }
-
-    except Exception:
+    Refresh tokens rotate: the response carries a new refresh token and the
+    one presented stops working. Reusing an old one revokes the session.
+    """
+    auth_service = AuthService(request.app.state.db)
+    try:
+        return await auth_service.refresh_session(refresh_token)
+    except AuthenticationError as e:
+        logger.warning(f"Refresh rejected: {e.error_code}")
         raise HTTPException(
             status_code=401,
-            detail="Invalid refresh token",
+            detail={
+                "error_code": e.error_code,
+                "message": str(e)
+            },
+            headers={"WWW-Authenticate": "Bearer"},
         )
 
 @router.post("/logout")
-async def logout(request: LogoutRequest):
-    """Logout a user by invalidating their refresh token."""
-    # In a production system, you would want to blacklist the refresh token
+async def logout(request: Request, logout_request: Optional[LogoutRequest] = None):
+    """Logout a user by revoking their session and its refresh token family.
+
+    The session is taken from the refresh token in the body or, without a
+    body, from the access token in the Authorization header.
+    """
+    auth_service = AuthService(request.app.state.db)
+    try:
+        if logout_request is not None:
+            await auth_service.logout(logout_request.refresh_token)
+        else:
+            principal = await get_principal(request)
+            if principal.session_id:
+                await auth_service.invalidate_session(principal.session_id)
+    except AuthenticationError as e:
+        raise HTTPException(
+            status_code=500,
+            detail={
+                "error_code": e.error_code,
+                "message": str(e)
+            }
+        )
     return {"message": "Successfully logged out"}
 
 @router.get("/users")
 async def list_users(request: Request):
     """List all users (for debugging)."""
     try:
-        result = request.app.state.db.execute("SELECT id, email, name, roles FROM users")
-        users = [row_to_dict(row) for row in result.rows]
+        users = await request.app.state.db.fetch_all("SELECT id, email, name, roles FROM users")
         return {"users": users}
     except Exception as e:
         logger.error(f"Error listing users: {str(e)}")
@@ -218,13 +188,12 @@ async def get_current_user_info(current_user = Depends(get_current_user)):
 async def get_user_debug(email: str, request: Request):
     """Get user details for debugging."""
     try:
-        result = request.app.state.db.execute(
+        user = await request.app.state.db.fetch_one(
             "SELECT id, email, name, password_hash, roles FROM users WHERE email = ?",
             [email]
         )
-        if not result.rows:
+        if user is None:
             raise HTTPException(status_code=404, detail="User not found")
-        user = row_to_dict(result.rows[0])
         return user
     except Exception as e:
         logger.error(f"Error getting user debug info: {str(e)}")
@@ -240,7 +209,7 @@ async def get_user_debug(email: str, request: Request):
 async def verify_password_debug(email: str, password: str, request: Request):
     """Verify password for debugging."""
     try:
-        result = request.app.state.db.execute(
+        result = await request.app.state.db.execute(
             "SELECT password_hash FROM users WHERE email = ?",
             [email]
         )
@@ -248,7 +217,7 @@ async def verify_password_debug(email: str, password: str, request: Request):
             return {"verified": False, "error": "User not found"}
         
         password_hash = result.rows[0][0]
-        verified = verify_password(password, password_hash)
+        verified = await password_hasher.verify(password, password_hash)
         return {
             "verified": verified,
             "password": password,
@@ -1,16 +1,45 @@
 from datetime import timedelta
-from typing import Optional, Dict, Any
-from libsql_client import Client, LibsqlError
-from .jwt import verify_password, create_access_token, get_password_hash, decode_access_token
-from ..db import row_to_dict
+from typing import Optional, Dict, Any, Tuple
+from libsql_client import LibsqlError
+from .jwt import create_access_token, decode_access_token, password_needs_update
+from .hashing import HasherBusy, password_hasher
+from ..db import DatabasePool, RowMapper, UnitOfWork
+from . import session_cache as sessions
+from .principal import Principal, access_token_claims, resolve_claims
+from .profiles import Profile, load_profile, profile_cache
+from .revocation import revocations
+import os
 import uuid
 import time
+import asyncio
 from functools import wraps
 from fastapi import HTTPException, Request, Depends
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Background password rehashes, referenced until they finish
+_rehash_tasks: set = set()
+
+# Lock an account for LOCKOUT_SECONDS after LOCKOUT_THRESHOLD failed logins within that window
+LOCKOUT_THRESHOLD = int(os.getenv("AUTH_LOCKOUT_THRESHOLD", "5"))
+LOCKOUT_SECONDS = int(os.getenv("AUTH_LOCKOUT_SECONDS", "900"))
+
+def split_roles(roles: Optional[str]) -> list:
+    """Split the comma separated roles column into a list."""
+    return roles.split(",") if roles else []
+
+# Serialized user fields (API name -> column), read straight off result rows
+USER_FIELDS = {
+    "id": "id",
+    "email": "email",
+    "name": "name",
+    "roles": ("roles", split_roles),
+    "created_at": "created_at",
+    "updated_at": "updated_at",
+}
+user_mapper = RowMapper(USER_FIELDS)
+
 class AuthenticationError(Exception):
     """Custom exception for authentication errors"""
     def __init__(self, message: str, error_code: str):
@@ -18,118 +47,141 @@ class AuthenticationError(Exception):
         self.error_code = error_code
         super().__init__(self.message)
 
-async def get_current_user(request: Request):
-    """Get the current authenticated user from the request."""
+class AccountLockedError(AuthenticationError):
+    """Raised for logins to an account locked by repeated failures."""
+    def __init__(self, retry_after: int):
+        self.retry_after = retry_after
+        super().__init__("Account temporarily locked after repeated failed logins", "ACCOUNT_LOCKED")
+
+async def get_principal(request: Request) -> Principal:
+    """Resolve the caller once per request.
+
+    The token is verified at most once per process (see ``verified_tokens``)
+    and the profile comes from the profile cache. The result, including the
+    session check, is memoized on the request, so stacked auth dependencies
+    don't repeat the work.
+    """
+    principal = getattr(request.state, "principal", None)
+    if principal is not None:
+        return principal
+
     auth_header = request.headers.get("Authorization")
     if not auth_header or not auth_header.startswith("Bearer "):
         raise HTTPException(status_code=401, detail="Missing or invalid authorization header")
 
     token = auth_header.split(" ")[1]
     try:
-        payload = decode_access_token(token)
-        return payload["user"]
+        claims = resolve_claims(token)
     except Exception as e:
         raise HTTPException(status_code=401, detail="Invalid authentication token")
 
+    # All served from in-process structures in the common case
+    db = request.app.state.db
+    if claims.session_id and await revocations.is_revoked(db, claims.session_id):
+        raise HTTPException(status_code=401, detail="Session revoked")
+    if claims.session_id and not await sessions.is_session_valid(db, claims.session_id):
+        raise HTTPException(status_code=401, detail="Session expired")
+    profile = await load_profile(db, claims.subject)
+    if profile is None:
+        raise HTTPException(status_code=401, detail="User not found")
+
+    principal = request.state.principal = Principal(claims, profile)
+    return principal
+
+async def get_current_user(request: Request):
+    """Get the current authenticated user from the request."""
+    return (await get_principal(request)).user
+
 async def require_admin(request: Request):
     """Require that the current user has admin role."""
-    user = await get_current_user(request)
-    if "role_admin" not in user.get("roles", []):
+    principal = await get_principal(request)
+    if not principal.is_admin:
         raise HTTPException(status_code=403, detail="Admin role required")
-    return user
+    return principal.user
 
 def requires_auth(roles=None):
     """Decorator for endpoints that require authentication and specific roles."""
     def decorator(func):
         @wraps(func)
         async def wrapper(request: Request, *args, **kwargs):
-            auth_header = request.headers.get("Authorization")
-            if not auth_header or not auth_header.startswith("Bearer "):
-                raise HTTPException(status_code=401, detail="Missing or invalid authorization header")
-
-            token = auth_header.split(" ")[1]
-            try:
-                payload = decode_access_token(token)
-                user = payload["user"]
-                user_roles = user.get("roles", [])
-                if isinstance(user_roles, str):
-                    user_roles = user_roles.split(",")
-
-                if roles and not any(role in user_roles for role in roles):
-                    raise HTTPException(
-                        status_code=403,
-                        detail={"error_code": "FORBIDDEN", "message": "Insufficient permissions"}
-                    )
-
-                # Verify session is still valid
-                session_id = user.get("session_id")
-                if session_id:
-                    result = request.app.state.db.execute(
-                        """
-                        SELECT * FROM sessions
-                        WHERE id = ? AND expires_at > ?
-                        """,
-                        [session_id, int(time.time())]
-                    )
-                    if not result.rows:
-                        raise HTTPException(
-                            status_code=401,
-                            detail="Session expired"
-                        )
-
-                return await func(request, *args, **kwargs)
-            except HTTPException:
-                raise
-            except Exception as e:
-                raise HTTPException(status_code=401, detail="Invalid token")
+            principal = await get_principal(request)
+            if roles and not principal.has_role(*roles):
+                raise HTTPException(
+                    status_code=403,
+                    detail={"error_code": "FORBIDDEN", "message": "Insufficient permissions"}
+                )
+            return await func(request, *args, **kwargs)
         return wrapper
     return decorator
 
 class AuthService:
-    def __init__(self, db_client: Client):
+    def __init__(self, db_client: DatabasePool):
         self.db = db_client
         self.session_timeout = timedelta(hours=24)  # Default session timeout
+        self.refresh_timeout = timedelta(days=30)  # Refresh token lifetime
 
     async def authenticate_user(self, username: str, password: str) -> Dict[str, Any]:
         """Authenticate a user with username and password."""
         try:
             logger.info(f"Authenticating user: {username}")
             # Get user from database
-            result = self.db.execute(
-                "SELECT id, email, name, password_hash, roles FROM users WHERE email = ?",  # We use email as username
+            user = await self.db.fetch_one(
+                """
+                SELECT id, email, name, password_hash, roles, failed_attempts, last_failed_attempt
+                FROM users WHERE email = ?
+                """,  # We use email as username
                 [username]
             )
-            if not result.rows:
+            if user is None:
                 logger.warning(f"User not found: {username}")
                 raise AuthenticationError("Invalid credentials", "INVALID_CREDENTIALS")
 
-            user = row_to_dict(result.rows[0])
-            logger.info(f"Found user: {user['email']}, verifying password")
+            # Checked before bcrypt, so a locked account costs no hashing
+            current_time = int(time.time())
+            locked_for = (user.last_failed_attempt or 0) + LOCKOUT_SECONDS - current_time
+            if (user.failed_attempts or 0) >= LOCKOUT_THRESHOLD and locked_for > 0:
+                logger.warning(f"Login to locked account: {username}")
+                raise AccountLockedError(locked_for)
+
+            logger.info(f"Found user: {user.email}, verifying password")
 
             # Verify password
-            if not verify_password(password, user["password_hash"]):
+            # Runs on the hasher's worker threads, not the event loop
+            if not await password_hasher.verify(password, user.password_hash):
                 logger.warning(f"Invalid password for user: {username}")
-                # Update failed attempts
-                current_time = int(time.time())
-                self.db.execute(
+                # Update failed attempts; failures older than the lockout window start over
+                await self.db.execute(
                     """
                     UPDATE users
-                    SET failed_attempts = failed_attempts + 1,
+                    SET failed_attempts = CASE WHEN last_failed_attempt > ? THEN failed_attempts + 1 ELSE 1 END,
                         last_failed_attempt = ?
                     WHERE email = ?
                     """,
-                    [current_time, username]
+                    [current_time - LOCKOUT_SECONDS, current_time, username]
                 )
                 raise AuthenticationError("Invalid credentials", "INVALID_CREDENTIALS")
 
             logger.info(f"Password verified successfully for user: {username}")
 
+            # Only written after failures, so normal logins stay at one query
+            if user.failed_attempts:
+                await self.db.execute(
+                    "UPDATE users SET failed_attempts = 0, last_failed_attempt = NULL WHERE id = ?",
+                    [user.id]
+                )
+
+            # Upgrade legacy or outdated-cost hashes without delaying the login
+            if password_needs_update(user.password_hash):
+                task = asyncio.create_task(self._rehash_password(user.id, password, user.password_hash))
+                _rehash_tasks.add(task)
+                task.add_done_callback(_rehash_tasks.discard)
+
             # Clean user object
             clean_user = {
-                "id": user["id"],
-                "email": user["email"],
-                "name": user["name"],
-                "roles": user["roles"].split(",") if user["roles"] else []
+                "id": user.id,
+                "email": user.email,
+                "name": user.name,
+                "roles": split_roles(user.roles)
             }
 
             logger.info(f"Authentication successful for user: {username}")
@@ -137,133 +189,253 @@ class AuthService:
 
         except AuthenticationError:
             raise
+        except HasherBusy as e:
+            logger.warning(f"Password hasher saturated, rejecting login for {username}")
+            raise AuthenticationError(str(e), "SERVER_BUSY")
         except Exception as e:
             logger.error(f"Authentication error for user {username}: {str(e)}")
             raise AuthenticationError(str(e), "AUTHENTICATION_ERROR")
 
-    def _create_session(self, user: Dict[str, Any]) -> dict:
-        """Create a new session for the user"""
+    async def _rehash_password(self, user_id: str, password: str, old_hash: str) -> None:
+        """Replace an outdated password hash, unless the password changed meanwhile."""
         try:
-            session_id = str(uuid.uuid4())
-            current_time = int(time.time())
-
-            # Store session in database
-            self.db.execute("""
-                INSERT INTO sessions (id, user_id, created_at, expires_at)
-                VALUES (?, ?, ?, ?)
-            """, [
-                session_id,
-                user["id"],
-                current_time,
-                current_time + int(self.session_timeout.total_seconds())
-            ])
-
-            # Create access token
-            user_data = {
-                "id": user["id"],
-                "email": user["email"],
-                "name": user["name"],
-                "roles": user["roles"].split(","),
-                "session_id": session_id
-            }
-
-            access_token = create_access_token(
-                data={
-                    "sub": user["id"],
-                    "user": user_data,
-                    "session_id": session_id
-                },
-                expires_delta=self.session_timeout
+            new_hash = await password_hasher.hash(password)
+            await self.db.execute(
+                "UPDATE users SET password_hash = ? WHERE id = ? AND password_hash = ?",
+                [new_hash, user_id, old_hash]
             )
+            logger.info(f"Upgraded password hash for user {user_id}")
+        except HasherBusy:
+            logger.info(f"Password hasher busy, hash upgrade for user {user_id} deferred to next login")
+        except Exception as e:
+            logger.error(f"Failed to upgrade password hash for user {user_id}: {str(e)}")
 
-            return {
-                "access_token": access_token,
-                "token_type": "bearer",
-                "user": user_data,
-                "expires_in": int(self.session_timeout.total_seconds())
-            }
+    async def login(self, username: str, password: str) -> dict:
+        """Authenticate a user and open a new session for them."""
+        user = await self.authenticate_user(username, password)
+        return await self._create_session(user)
+
+    async def _create_session(self, user: Dict[str, Any]) -> dict:
+        """Create a new session for the user, with the first token of its refresh family."""
+        try:
+            uow = self.db.unit_of_work()
+            pending = self._queue_session(user, uow)
+            await uow.commit()
+            return self._open_session(user, *pending)
         except LibsqlError as e:
             raise AuthenticationError("Failed to create session", "SESSION_ERROR")
 
-    def invalidate_session(self, session_id: str) -> None:
-        """Invalidate a user session (logout)"""
+    def _queue_session(self, user: Dict[str, Any], uow: UnitOfWork) -> Tuple[str, str, int]:
+        """Queue the session and refresh token INSERTs on ``uow``.
+
+        Returns the session id, refresh token id and expiry, to be passed to
+        ``_open_session()`` once the caller has committed.
+        """
+        session_id = str(uuid.uuid4())
+        current_time = int(time.time())
+        expires_at = current_time + int(self.session_timeout.total_seconds())
+
+        # Store session in database
+        uow.add("""
+            INSERT INTO sessions (id, user_id, created_at, expires_at)
+            VALUES (?, ?, ?, ?)
+        """, [
+            session_id,
+            user["id"],
+            current_time,
+            expires_at
+        ])
+        # The session id doubles as the refresh token family id
+        refresh_id = str(uuid.uuid4())
+        uow.add("""
+            INSERT INTO refresh_tokens (id, family_id, user_id, issued_at, expires_at)
+            VALUES (?, ?, ?, ?, ?)
+        """, [refresh_id, session_id, user["id"], current_time, current_time + self._refresh_seconds])
+        return session_id, refresh_id, expires_at
+
+    def _open_session(self, user: Dict[str, Any], session_id: str, refresh_id: str, expires_at: int) -> dict:
+        """Cache a committed session and issue its tokens.
+
+        Caching it also keeps the first requests on the new session off a
+        read replica that may not have caught up with the write yet.
+        """
+        sessions.session_cache.put_valid(session_id, expires_at)
+        # Profile fields stay out of the token; prime the cache with them instead
+        profile = Profile(user["id"], user["email"], user["name"], user["roles"])
+        profile_cache.put(profile)
+        return self._session_tokens(profile, session_id, refresh_id)
+
+    @property
+    def _refresh_seconds(self) -> int:
+        return int(self.refresh_timeout.total_seconds())
+
+    def _session_tokens(self, profile: Profile, session_id: str, refresh_id: str) -> dict:
+        """Build the token response for a session and its current refresh token."""
+        access_token = create_access_token(
+            data=access_token_claims(profile.id, session_id, profile.roles),
+            expires_delta=self.session_timeout
+        )
+        refresh_token = create_access_token(
+            data={"sub": profile.id, "type": "refresh", "jti": refresh_id, "fam": session_id},
+            expires_delta=self.refresh_timeout
+        )
+        return {
+            "access_token": access_token,
+            "refresh_token": refresh_token,
+            "token_type": "bearer",
+            "user": {**profile.to_dict(), "session_id": session_id},
+            "expires_in": int(self.session_timeout.total_seconds())
+        }
+
+    def _refresh_claims(self, refresh_token: str) -> Dict[str, Any]:
+        try:
+            payload = decode_access_token(refresh_token)
+        except ValueError:
+            raise AuthenticationError("Invalid refresh token", "INVALID_REFRESH_TOKEN")
+        if payload.get("type") != "refresh" or "jti" not in payload or "fam" not in payload:
+            raise AuthenticationError("Invalid refresh token", "INVALID_REFRESH_TOKEN")
+        return payload
+
+    async def refresh_session(self, refresh_token: str) -> dict:
+        """Rotate a refresh token: issue a new access/refresh pair and retire the old one.
+
+        Each refresh token can be used once. Presenting one that was already
+        rotated means it was copied, so its whole family (and the session)
+        is revoked.
+        """
+        claims = self._refresh_claims(refresh_token)
+        token_id, family_id = claims["jti"], claims["fam"]
+        if await revocations.is_revoked(self.db, family_id):
+            raise AuthenticationError("Refresh token revoked", "TOKEN_REVOKED")
+
+        current_time = int(time.time())
+        new_id = str(uuid.uuid4())
+        session_expires_at = current_time + int(self.session_timeout.total_seconds())
+        try:
+            # One round trip: claim the old token, chain the new one, extend
+            # the session and read the profile back; each step only applies
+            # if the previous one did
+            async with self.db.unit_of_work() as uow:
+                uow.add("""
+                    UPDATE refresh_tokens SET replaced_by = ?
+                    WHERE id = ? AND family_id = ? AND replaced_by IS NULL AND expires_at > ?
+                """, [new_id, token_id, family_id, current_time])
+                uow.add("""
+                    INSERT INTO refresh_tokens (id, family_id, user_id, issued_at, expires_at)
+                    SELECT ?, family_id, user_id, ?, ? FROM refresh_tokens
+                    WHERE id = ? AND replaced_by = ?
+                      AND EXISTS (SELECT 1 FROM sessions WHERE id = family_id)
+                """, [new_id, current_time, current_time + self._refresh_seconds, token_id, new_id])
+                uow.add("""
+                    UPDATE sessions SET expires_at = ?
+                    WHERE id = ? AND EXISTS (SELECT 1 FROM refresh_tokens WHERE id = ?)
+                """, [session_expires_at, family_id, new_id])
+                profile_row = uow.add("""
+                    SELECT u.id, u.email, u.name, u.roles
+                    FROM refresh_tokens r JOIN users u ON u.id = r.user_id
+                    WHERE r.id = ?
+                """, [new_id])
+        except LibsqlError as e:
+            logger.error(f"Failed to rotate refresh token: {str(e)}")
+            raise AuthenticationError("Failed to refresh session", "SESSION_ERROR")
+
+        rows = uow.results[profile_row].rows
+        if not rows:
+            await self._reject_refresh(token_id, family_id, new_id)
+
+        profile = Profile(*rows[0].astuple())
+        profile_cache.put(profile)
+        sessions.session_cache.put_valid(family_id, session_expires_at)
+        return self._session_tokens(profile, family_id, new_id)
+
+    async def _reject_refresh(self, token_id: str, family_id: str, new_id: str) -> None:
+        """Explain a failed rotation, revoking the family if the token was reused."""
+        row = await self.db.fetch_one("SELECT replaced_by FROM refresh_tokens WHERE id = ?", [token_id])
+        if row is not None and row.replaced_by not in (None, new_id):
+            logger.warning(f"Refresh token reuse detected, revoking token family {family_id}")
+            await self.revoke_family(family_id)
+            raise AuthenticationError("Refresh token reuse detected", "TOKEN_REUSED")
+        raise AuthenticationError("Refresh token expired or session ended", "INVALID_REFRESH_TOKEN")
+
+    async def revoke_family(self, family_id: str) -> None:
+        """Revoke a refresh token family and end its session, on every worker."""
+        current_time = int(time.time())
         try:
-            self.db.execute("""
-                DELETE FROM sessions
-                WHERE id = ?
-            """, [session_id])
+            async with self.db.unit_of_work() as uow:
+                uow.add("""
+                    INSERT INTO revoked_tokens (id, revoked_at, expires_at) VALUES (?, ?, ?)
+                    ON CONFLICT(id) DO NOTHING
+                """, [family_id, current_time, current_time + self._refresh_seconds])
+                uow.add("DELETE FROM refresh_tokens WHERE family_id = ?", [family_id])
+                uow.add("DELETE FROM sessions WHERE id = ?", [family_id])
+            revocations.add(family_id)
+            sessions.session_cache.invalidate(family_id)
+            if sessions.invalidation_channel is not None:
+                await sessions.invalidation_channel.publish(family_id)
         except LibsqlError as e:
-            raise AuthenticationError("Failed to invalidate session", "SESSION_ERROR")
+            raise AuthenticationError("Failed to revoke session", "SESSION_ERROR")
 
-    def verify_session(self, session_id: str) -> bool:
+    async def logout(self, refresh_token: str) -> None:
+        """End the session a refresh token belongs to; invalid tokens are ignored."""
+        try:
+            claims = self._refresh_claims(refresh_token)
+        except AuthenticationError:
+            return
+        await self.revoke_family(claims["fam"])
+
+    async def invalidate_session(self, session_id: str) -> None:
+        """Invalidate a user session (logout)"""
+        await self.revoke_family(session_id)
+
+    async def verify_session(self, session_id: str) -> bool:
         """Verify if a session is valid and not expired"""
         try:
-            result = self.db.execute("""
-                SELECT * FROM sessions
-                WHERE id = ? AND expires_at > ?
-            """, [session_id, int(time.time())])
-            return bool(result.rows)
+            return await sessions.is_session_valid(self.db, session_id)
         except LibsqlError as e:
             return False
 
-    def register_user(self, email: str, password: str, name: str) -> dict:
-        """Register a new user."""
+    async def register_user(self, email: str, password: str, name: str) -> dict:
+        """Register a new user and open their first session."""
         try:
-            # Check if user exists
-            result = self.db.execute("SELECT id FROM users WHERE email = ?", [email])
-            if result.rows:
-                raise AuthenticationError("User already exists", "USER_EXISTS")
-
             # Hash password
-            password_hash = get_password_hash(password)
+            password_hash = await password_hasher.hash(password)
 
             # Generate user ID and timestamps
             user_id = str(uuid.uuid4())
             current_time = int(time.time())
 
-            # Insert user with clean slate (remove failed attempts fields)
-            self.db.execute("""
-                INSERT INTO users (
-                    id, email, name, password_hash, roles,
-                    created_at, updated_at
-                ) VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, [user_id, email, name, password_hash, "role_user", current_time, current_time])
-
-            # Get the created user
-            result = self.db.execute("SELECT * FROM users WHERE id = ?", [user_id])
-            if not result.rows:
-                raise AuthenticationError("Failed to create user", "REGISTRATION_ERROR")
-
-            user = row_to_dict(result.rows[0])
-            if not user:
-                raise AuthenticationError("Failed to create user", "REGISTRATION_ERROR")
-
-            # Create session and return token
-            return self._create_session(user)
+            # Insert the user and their session in one batch; a duplicate
+            # email fails the UNIQUE constraint and rolls back both.
+            async with self.db.unit_of_work() as uow:
+                uow.add("""
+                    INSERT INTO users (
+                        id, email, name, password_hash, roles,
+                        created_at, updated_at
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?)
+                """, [user_id, email, name, password_hash, "role_user", current_time, current_time])
+                user = {"id": user_id, "email": email, "name": name, "roles": "role_user"}
+                pending = self._queue_session(user, uow)
+            # Cached only once committed: a failed registration leaves no session behind
+            return self._open_session(user, *pending)
         except AuthenticationError:
             raise
         except LibsqlError as e:
+            if "UNIQUE constraint failed" in str(e):
+                raise AuthenticationError("User already exists", "USER_EXISTS")
             raise AuthenticationError("Failed to register user", "REGISTRATION_ERROR")
+        except HasherBusy as e:
+            raise AuthenticationError(str(e), "SERVER_BUSY")
         except Exception as e:
-            if "User already exists" in str(e):
-                raise AuthenticationError("User already exists", "USER_EXISTS")
             raise AuthenticationError("Internal server error", "INTERNAL_ERROR")
 
-    def list_users(self) -> list:
+    async def list_users(self) -> list:
         """List all users."""
         try:
-            result = self.db.execute("SELECT * FROM users")
-            users = [row_to_dict(row) for row in result.rows]
-
-            # Convert to API format
-            return [{
-                "id": user["id"],
-                "email": user["email"],
-                "name": user["name"],
-                "roles": user["roles"].split(","),
-                "created_at": user["created_at"],
-                "updated_at": user["updated_at"]
-            } for user in users]
+            # Records expose the API fields directly, no per-row dicts needed
+            return await self.db.fetch_all(
+                "SELECT id, email, name, roles, created_at, updated_at FROM users",
+                mapper=user_mapper
+            )
         except LibsqlError as e:
             raise AuthenticationError("Failed to list users", "DATABASE_ERROR")
         except Exception as e:
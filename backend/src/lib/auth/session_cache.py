@@ -0,0 +1,173 @@
+import os
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class SessionCache:
+    """Bounded TTL/LRU cache of session validity.
+
+    Valid sessions are cached for ``ttl`` seconds (never past their own
+    expiry), unknown or deleted ones for ``negative_ttl`` seconds. At most
+    ``max_entries`` sessions are kept; the least recently used are evicted
+    first. ``invalidate()`` turns an entry negative immediately, so a logout
+    on this worker takes effect at once and on other workers within ``ttl``
+    (or the poll interval of a ``SessionInvalidationChannel``).
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl: float = 30.0, negative_ttl: float = 5.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        # session id -> (is valid, cached until)
+        self._entries: "OrderedDict[str, Tuple[bool, float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, session_id: str) -> Optional[bool]:
+        """Return the cached validity, or None if the session must be looked up."""
+        entry = self._entries.get(session_id)
+        if entry is None or entry[1] <= time.time():
+            if entry is not None:
+                del self._entries[session_id]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(session_id)
+        self.hits += 1
+        return entry[0]
+
+    def _put(self, session_id: str, valid: bool, until: float) -> None:
+        self._entries[session_id] = (valid, until)
+        self._entries.move_to_end(session_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def put_valid(self, session_id: str, expires_at: float) -> None:
+        self._put(session_id, True, min(time.time() + self.ttl, expires_at))
+
+    def put_invalid(self, session_id: str) -> None:
+        self._put(session_id, False, time.time() + self.negative_ttl)
+
+    def invalidate(self, session_id: str) -> None:
+        """Mark a session as invalid on this worker."""
+        self.put_invalid(session_id)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+class SessionInvalidationChannel:
+    """Shares session invalidations between workers through the database.
+
+    ``publish()`` appends to ``session_invalidation_events``; every worker
+    polls the table for ids past the last one it has seen and invalidates
+    them in its local cache. That costs one query per ``poll_interval`` per
+    worker instead of one per request. Rows older than ``retention`` seconds
+    are pruned; ids are AUTOINCREMENT, so they keep growing even after
+    pruning has emptied the table.
+    """
+
+    def __init__(self, db, cache: SessionCache, poll_interval: float = 2.0, retention: float = 3600.0):
+        self.db = db
+        self.cache = cache
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self._last_id = 0
+        self._task: Optional[asyncio.Task] = None
+
+    async def publish(self, session_id: str) -> None:
+        await self.db.execute(
+            "INSERT INTO session_invalidation_events (session_id, invalidated_at) VALUES (?, ?)",
+            [session_id, int(time.time())]
+        )
+
+    async def start(self) -> None:
+        """Start polling for invalidations published from now on."""
+        if self._task is not None:
+            return
+        # The sequence, not MAX(id): the table may have been pruned empty
+        result = await self.db.execute(
+            "SELECT COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'session_invalidation_events'), 0)"
+        )
+        self._last_id = result.rows[0][0]
+        self._task = asyncio.create_task(self._poll_loop())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except (asyncio.CancelledError, RuntimeError):
+            pass
+        self._task = None
+
+    async def poll(self) -> int:
+        """Apply invalidations published since the last poll; return how many."""
+        result = await self.db.execute(
+            "SELECT id, session_id FROM session_invalidation_events WHERE id > ? ORDER BY id",
+            [self._last_id]
+        )
+        for event_id, session_id in (row.astuple() for row in result.rows):
+            self.cache.invalidate(session_id)
+            self._last_id = event_id
+        return len(result.rows)
+
+    async def prune(self) -> None:
+        """Delete invalidations older than ``retention``."""
+        await self.db.execute(
+            "DELETE FROM session_invalidation_events WHERE invalidated_at < ?",
+            [int(time.time() - self.retention)]
+        )
+
+    async def _poll_loop(self) -> None:
+        polls = 0
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                await self.poll()
+                polls += 1
+                if polls % 100 == 0:
+                    await self.prune()
+            except Exception as e:
+                logger.error(f"Session invalidation poll failed: {str(e)}")
+
+
+# Process-wide cache used by the auth dependencies
+session_cache = SessionCache(
+    max_entries=int(os.getenv("SESSION_CACHE_MAX_ENTRIES", "10000")),
+    ttl=float(os.getenv("SESSION_CACHE_TTL", "30")),
+    negative_ttl=float(os.getenv("SESSION_CACHE_NEGATIVE_TTL", "5")),
+)
+
+# Set by the app when SESSION_INVALIDATION_POLL_INTERVAL is configured
+invalidation_channel: Optional[SessionInvalidationChannel] = None
+
+
+async def is_session_valid(db, session_id: str) -> bool:
+    """Check a session, going to the database only on a cache miss."""
+    cached = session_cache.get(session_id)
+    if cached is not None:
+        return cached
+
+    result = await db.execute(
+        "SELECT expires_at FROM sessions WHERE id = ? AND expires_at > ?",
+        [session_id, int(time.time())]
+    )
+    if result.rows:
+        session_cache.put_valid(session_id, result.rows[0][0])
+        return True
+    session_cache.put_invalid(session_id)
+    return False
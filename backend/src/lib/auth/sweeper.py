@@ -0,0 +1,156 @@
+import os
+import time
+import asyncio
+import logging
+from typing import Any, Dict, Optional
+
+from . import session_cache as sessions
+from .revocation import revocations
+
+logger = logging.getLogger(__name__)
+
+# Tables whose rows are dead once expires_at has passed (all indexed on it)
+EXPIRING_TABLES = ("sessions", "refresh_tokens", "revoked_tokens")
+
+
+class SessionSweeper:
+    """Periodically deletes expired auth rows and caps sessions per user.
+
+    Every ``interval`` seconds, ``sweep()``:
+
+    - deletes expired sessions, refresh tokens and revocations in batches
+      of ``batch_size`` rows, one short transaction each, walking the
+      ``expires_at`` indexes, and pausing ``pause`` seconds between batches
+      so request traffic keeps the writer
+    - evicts the oldest sessions of users with more than
+      ``max_sessions_per_user`` (0 disables the cap)
+    - rebuilds the revocation filter when revocations expired
+    """
+
+    def __init__(
+        self,
+        db,
+        interval: float = 300.0,
+        batch_size: int = 500,
+        max_sessions_per_user: int = 10,
+        pause: float = 0.01,
+    ):
+        self.db = db
+        self.interval = interval
+        self.batch_size = batch_size
+        self.max_sessions_per_user = max_sessions_per_user
+        self.pause = pause
+        self.runs = 0
+        self.last_report: Optional[Dict[str, Any]] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except (asyncio.CancelledError, RuntimeError):
+            pass
+        self._task = None
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.sweep()
+            except Exception as e:
+                logger.error(f"Session sweep failed: {str(e)}")
+
+    async def sweep(self) -> Dict[str, Any]:
+        """Run one sweep and return what it removed."""
+        started = time.monotonic()
+        now = int(time.time())
+        report: Dict[str, Any] = {}
+        for table in EXPIRING_TABLES:
+            report[f"expired_{table}"] = await self._delete_expired(table, now)
+        report["evicted_sessions"] = await self._evict_excess_sessions()
+
+        if report["expired_revoked_tokens"]:
+            await revocations.rebuild(self.db)
+
+        report["ms"] = round((time.monotonic() - started) * 1000, 1)
+        report["at"] = now
+        self.runs += 1
+        self.last_report = report
+        removed = sum(v for k, v in report.items() if k.startswith(("expired_", "evicted_")))
+        if removed:
+            logger.info(f"Session sweep removed {removed} rows: {report}")
+        return report
+
+    async def _delete_expired(self, table: str, now: int) -> int:
+        deleted = 0
+        while True:
+            result = await self.db.execute(
+                f"DELETE FROM {table} WHERE rowid IN "
+                f"(SELECT rowid FROM {table} WHERE expires_at <= ? LIMIT ?)",
+                [now, self.batch_size]
+            )
+            deleted += result.rows_affected
+            if result.rows_affected < self.batch_size:
+                return deleted
+            await asyncio.sleep(self.pause)
+
+    async def _evict_excess_sessions(self) -> int:
+        if self.max_sessions_per_user <= 0:
+            return 0
+        evicted = 0
+        while True:
+            result = await self.db.execute(
+                """
+                DELETE FROM sessions WHERE id IN (
+                    SELECT id FROM (
+                        SELECT id, ROW_NUMBER() OVER (
+                            PARTITION BY user_id ORDER BY created_at DESC, rowid DESC
+                        ) AS newest
+                        FROM sessions
+                    )
+                    WHERE newest > ?
+                    LIMIT ?
+                )
+                RETURNING id
+                """,
+                [self.max_sessions_per_user, self.batch_size]
+            )
+            for row in result.rows:
+                sessions.session_cache.invalidate(row[0])
+                if sessions.invalidation_channel is not None:
+                    await sessions.invalidation_channel.publish(row[0])
+            evicted += len(result.rows)
+            if len(result.rows) < self.batch_size:
+                return evicted
+            await asyncio.sleep(self.pause)
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "interval": self.interval,
+            "max_sessions_per_user": self.max_sessions_per_user,
+            "runs": self.runs,
+            "last_report": self.last_report,
+        }
+
+
+# Set by the app when SESSION_SWEEP_INTERVAL is positive
+sweeper: Optional[SessionSweeper] = None
+
+
+def create_sweeper(db) -> Optional[SessionSweeper]:
+    """Create a sweeper configured from the environment, or None if disabled."""
+    interval = float(os.getenv("SESSION_SWEEP_INTERVAL", "300"))
+    if interval <= 0:
+        return None
+    return SessionSweeper(
+        db,
+        interval=interval,
+        batch_size=int(os.getenv("SESSION_SWEEP_BATCH_SIZE", "500")),
+        max_sessions_per_user=int(os.getenv("MAX_SESSIONS_PER_USER", "10")),
+    )
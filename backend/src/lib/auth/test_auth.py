@@ -1,13 +1,17 @@
+import asyncio
 import pytest
 from fastapi.testclient import TestClient
 from src.lib.db import get_test_db, get_db, cleanup_test_db
 from src.lib.app import app
+from src.lib.ratelimit.gcra import rate_limiter
 
 @pytest.fixture
-def client():
+def client(monkeypatch):
     """Get test client with test database."""
     # Clean up before test
     cleanup_test_db()
+    # Every test logs in from the same client address
+    monkeypatch.setattr(rate_limiter, "enabled", False)
 
     # Override the database dependency
     app.dependency_overrides[get_db] = get_test_db
@@ -52,10 +56,10 @@ def create_admin_user(client, admin_user_data):
 
         # Update user to have admin role directly in database
         db = get_test_db()
-        db.execute(
+        asyncio.run(db.execute(
             "UPDATE users SET roles = ? WHERE email = ?",
             ["role_user,role_admin", admin_user_data["email"]]
-        )
+        ))
 
         # Log in to get token with admin role
         login_response = client.post(
@@ -0,0 +1,79 @@
+import asyncio
+import hashlib
+import time
+import pytest
+from passlib.context import CryptContext
+from src.lib.auth import jwt as jwt_module
+from src.lib.auth import service as service_module
+from src.lib.auth.calibrate import calibrate, pick_rounds
+from src.lib.auth.service import AuthService
+from src.lib.db import initialize_db
+from src.lib.db.sqlite import SqliteDatabase
+
+@pytest.fixture
+def cheap_context(monkeypatch):
+    """Hash with the production schemes at the lowest bcrypt cost."""
+    context = CryptContext(schemes=["bcrypt", "hex_sha256"], deprecated=["hex_sha256"], bcrypt__rounds=4)
+    monkeypatch.setattr(jwt_module, "pwd_context", context)
+    return context
+
+@pytest.fixture
+async def db(tmp_path):
+    """Get a native SQLite database with the application schema."""
+    database = SqliteDatabase(str(tmp_path / "auth.db"), on_open=initialize_db)
+    await database.open()
+    yield database
+    await database.close()
+
+async def _add_user(db, password_hash):
+    now = int(time.time())
+    await db.execute(
+        "INSERT INTO users (id, email, name, password_hash, roles, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        ["u1", "a@example.com", "A", password_hash, "role_user", now, now]
+    )
+
+async def _stored_hash(db):
+    result = await db.execute("SELECT password_hash FROM users WHERE id = 'u1'")
+    return result.rows[0][0]
+
+def test_calibrate_picks_highest_cost_within_target():
+    """Timing stops at the first cost over the target; the one before it wins."""
+    timed = []
+
+    def timer(rounds):
+        timed.append(rounds)
+        return 0.05 * 2 ** (rounds - 10)  # 50ms at 10 rounds, doubling per round
+
+    timings = calibrate(250, min_rounds=10, max_rounds=16, timer=timer)
+    assert timed == [10, 11, 12, 13]
+    assert pick_rounds(timings, 250) == 12
+    assert pick_rounds({10: 400.0}, 250) is None
+
+@pytest.mark.asyncio
+async def test_legacy_hash_is_upgraded_after_login(db, cheap_context):
+    """Unsalted seed hashes still log in and are rehashed with bcrypt."""
+    await _add_user(db, hashlib.sha256(b"password").hexdigest())
+
+    user = await AuthService(db).authenticate_user("a@example.com", "password")
+    assert user["id"] == "u1"
+    await asyncio.gather(*service_module._rehash_tasks)
+
+    upgraded = await _stored_hash(db)
+    assert upgraded.startswith("$2b$04$")
+    assert await AuthService(db).authenticate_user("a@example.com", "password")
+
+@pytest.mark.asyncio
+async def test_current_hashes_are_left_alone(db, cheap_context):
+    """Hashes at the configured cost are not rewritten."""
+    current = cheap_context.hash("password")
+    await _add_user(db, current)
+    await AuthService(db).authenticate_user("a@example.com", "password")
+    assert not service_module._rehash_tasks
+    assert await _stored_hash(db) == current
+
+@pytest.mark.asyncio
+async def test_rehash_skips_changed_passwords(db, cheap_context):
+    """A hash replaced since the login is not overwritten by the upgrade."""
+    await _add_user(db, "new-hash")
+    await AuthService(db)._rehash_password("u1", "password", "old-hash")
+    assert await _stored_hash(db) == "new-hash"
@@ -0,0 +1,53 @@
+import time
+import asyncio
+import threading
+import pytest
+from src.lib.auth.hashing import HasherBusy, PasswordHasher
+
+@pytest.mark.asyncio
+async def test_hash_and_verify_run_on_the_pool():
+    """Hashes made on the pool verify, and the work is counted."""
+    hasher = PasswordHasher(workers=2)
+    hashed = await hasher.hash("secret123")
+    assert await hasher.verify("secret123", hashed)
+    assert not await hasher.verify("wrong", hashed)
+
+    metrics = hasher.metrics()
+    assert metrics["completed"] == 3
+    assert metrics["avg_ms"] > 0
+    assert (metrics["in_flight"], metrics["queued"]) == (0, 0)
+
+@pytest.mark.asyncio
+async def test_event_loop_stays_responsive():
+    """Other coroutines keep running while a hash is in progress."""
+    hasher = PasswordHasher(workers=1)
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.005)
+
+    task = asyncio.create_task(ticker())
+    await hasher.hash("secret123")
+    task.cancel()
+    assert ticks > 1
+
+@pytest.mark.asyncio
+async def test_rejects_when_queue_is_full():
+    """Calls beyond workers + max_queue fail fast with HasherBusy."""
+    hasher = PasswordHasher(workers=1, max_queue=1)
+    release = threading.Event()
+    running = [asyncio.ensure_future(hasher._submit(release.wait)) for _ in range(2)]
+    await asyncio.sleep(0.01)
+
+    started = time.monotonic()
+    with pytest.raises(HasherBusy):
+        await hasher.verify("secret123", "hash")
+    assert time.monotonic() - started < 0.1
+
+    metrics = hasher.metrics()
+    assert (metrics["in_flight"], metrics["queued"], metrics["rejected"]) == (1, 1, 1)
+    release.set()
+    await asyncio.gather(*running)
@@ -0,0 +1,59 @@
+import time
+import pytest
+from passlib.context import CryptContext
+from src.lib.auth import jwt as jwt_module
+from src.lib.auth import service as service_module
+from src.lib.auth.service import AccountLockedError, AuthenticationError, AuthService
+from src.lib.db import initialize_db
+from src.lib.db.sqlite import SqliteDatabase
+from src.lib.db.stats import count_queries
+
+@pytest.fixture
+async def auth(tmp_path, monkeypatch):
+    """Get an auth service over a database holding one user (password "password")."""
+    context = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4)
+    monkeypatch.setattr(jwt_module, "pwd_context", context)
+    monkeypatch.setattr(service_module, "LOCKOUT_THRESHOLD", 3)
+    database = SqliteDatabase(str(tmp_path / "lockout.db"), on_open=initialize_db)
+    await database.open()
+    now = int(time.time())
+    await database.execute(
+        "INSERT INTO users (id, email, name, password_hash, roles, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        ["u1", "a@example.com", "A", context.hash("password"), "role_user", now, now]
+    )
+    yield AuthService(database)
+    await database.close()
+
+async def _fail(auth):
+    with pytest.raises(AuthenticationError) as excinfo:
+        await auth.authenticate_user("a@example.com", "wrong")
+    return excinfo.value
+
+@pytest.mark.asyncio
+async def test_account_locks_after_repeated_failures(auth):
+    """The threshold-th failure locks the account, even for the right password."""
+    for _ in range(3):
+        assert (await _fail(auth)).error_code == "INVALID_CREDENTIALS"
+
+    with pytest.raises(AccountLockedError) as excinfo:
+        await auth.authenticate_user("a@example.com", "password")
+    assert 0 < excinfo.value.retry_after <= service_module.LOCKOUT_SECONDS
+
+@pytest.mark.asyncio
+async def test_lock_expires_and_success_resets_the_counter(auth):
+    """Failures older than the window no longer count; a login clears them."""
+    for _ in range(3):
+        await _fail(auth)
+    expired = int(time.time()) - service_module.LOCKOUT_SECONDS - 1
+    await auth.db.execute("UPDATE users SET last_failed_attempt = ? WHERE id = 'u1'", [expired])
+
+    await auth.authenticate_user("a@example.com", "password")
+    row = await auth.db.fetch_one("SELECT failed_attempts, last_failed_attempt FROM users WHERE id = 'u1'")
+    assert (row.failed_attempts, row.last_failed_attempt) == (0, None)
+
+@pytest.mark.asyncio
+async def test_success_path_costs_one_query(auth):
+    """Without earlier failures a login only reads the user row."""
+    with count_queries() as counter:
+        await auth.authenticate_user("a@example.com", "password")
+    assert counter.queries == 1
@@ -0,0 +1,91 @@
+import time
+import pytest
+from datetime import timedelta
+from src.lib.auth import principal as principal_module
+from src.lib.auth.jwt import create_access_token
+from src.lib.auth.principal import (
+    Principal, TokenClaims, VerifiedTokenCache, access_token_claims, decode_roles, encode_roles, resolve_claims
+)
+from src.lib.auth.profiles import Profile, ProfileCache
+
+@pytest.fixture
+def cache(monkeypatch):
+    """Replace the process-wide verified-token cache with a fresh one."""
+    fresh = VerifiedTokenCache(max_entries=2)
+    monkeypatch.setattr(principal_module, "verified_tokens", fresh)
+    return fresh
+
+def _token(user_id="u1", roles=("role_user",), minutes=15):
+    claims = access_token_claims(user_id, f"s-{user_id}", roles)
+    return create_access_token(claims, timedelta(minutes=minutes))
+
+def test_roles_round_trip_through_the_bitmask():
+    """Known roles pack into the rol claim; unknown ones are dropped."""
+    mask = encode_roles(["role_user", "role_admin", "role_unknown"])
+    assert mask == 3
+    assert decode_roles(mask) == frozenset({"role_user", "role_admin"})
+    assert access_token_claims("u1", "s1", ["role_user"]) == {"sub": "u1", "sid": "s1", "rol": 1}
+
+def test_principal_roles_come_from_the_profile():
+    """The profile, not the token, decides the principal's roles."""
+    claims = TokenClaims("u1", "s1", frozenset({"role_user"}), time.time() + 60)
+    principal = Principal(claims, Profile("u1", "a@example.com", "A", "role_user,role_admin"))
+    assert principal.is_admin
+    assert principal.has_role("role_editor", "role_user")
+    assert principal.user == {
+        "id": "u1", "email": "a@example.com", "name": "A",
+        "roles": ["role_user", "role_admin"], "session_id": "s1",
+    }
+
+def test_repeat_tokens_skip_verification(cache, monkeypatch):
+    """A token is verified once; later calls return the cached claims."""
+    token = _token()
+    first = resolve_claims(token)
+    monkeypatch.setattr(principal_module, "decode_access_token", lambda t: pytest.fail("verified twice"))
+    assert resolve_claims(token) is first
+    assert (first.subject, first.session_id, first.roles) == ("u1", "s-u1", frozenset({"role_user"}))
+    assert (cache.hits, cache.misses) == (1, 1)
+
+def test_entries_expire_with_the_token(cache, monkeypatch):
+    """Cached claims are dropped at the token's exp."""
+    token = _token()
+    expires_at = resolve_claims(token).expires_at
+    monkeypatch.setattr(time, "time", lambda: expires_at + 1)
+    assert cache.get(token) is None
+
+def test_cache_is_bounded(cache):
+    """The least recently used tokens are evicted first."""
+    tokens = [_token(f"u{i}") for i in range(3)]
+    for token in tokens:
+        resolve_claims(token)
+    assert cache.metrics()["size"] == 2
+    assert cache.get(tokens[0]) is None
+    assert cache.get(tokens[2]) is not None
+
+def test_legacy_tokens_still_resolve(cache):
+    """Tokens that embed the whole user keep working until they expire."""
+    user = {"id": "u1", "email": "a@example.com", "roles": ["role_admin"], "session_id": "s1"}
+    claims = resolve_claims(create_access_token({"sub": "u1", "user": user}))
+    assert (claims.subject, claims.session_id, claims.roles) == ("u1", "s1", frozenset({"role_admin"}))
+
+def test_invalid_tokens_are_rejected_and_not_cached(cache):
+    """Bad signatures and refresh tokens raise ValueError."""
+    with pytest.raises(ValueError):
+        resolve_claims(_token() + "x")
+    refresh = create_access_token({"sub": "u1", "type": "refresh"})
+    with pytest.raises(ValueError):
+        resolve_claims(refresh)
+    assert cache.metrics()["size"] == 0
+
+def test_profile_cache_invalidation_and_ttl(monkeypatch):
+    """Profiles are dropped on invalidate() and after the TTL."""
+    profiles = ProfileCache(ttl=60)
+    profiles.put(Profile("u1", "a@example.com", "A", "role_user"))
+    profiles.put(Profile("u2", "b@example.com", "B", "role_user"))
+    profiles.invalidate("u1")
+    assert profiles.get("u1") is None
+    assert profiles.get("u2").email == "b@example.com"
+
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 61)
+    assert profiles.get("u2") is None
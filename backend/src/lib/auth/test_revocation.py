@@ -0,0 +1,97 @@
+import time
+import pytest
+from src.lib.auth import service as service_module
+from src.lib.auth import session_cache as sessions
+from src.lib.auth.revocation import BloomFilter, RevocationList
+from src.lib.auth.service import AuthenticationError, AuthService
+from src.lib.auth.session_cache import SessionCache
+from src.lib.db import initialize_db
+from src.lib.db.sqlite import SqliteDatabase
+from src.lib.db.stats import count_queries
+
+USER = {"id": "u1", "email": "a@example.com", "name": "A", "roles": "role_user"}
+
+@pytest.fixture
+def revocations(monkeypatch):
+    """Give the auth service a fresh revocation list and session cache."""
+    fresh = RevocationList(capacity=100)
+    monkeypatch.setattr(service_module, "revocations", fresh)
+    monkeypatch.setattr(sessions, "session_cache", SessionCache())
+    return fresh
+
+@pytest.fixture
+async def auth(tmp_path, revocations):
+    """Get an auth service over a database holding one user."""
+    database = SqliteDatabase(str(tmp_path / "refresh.db"), on_open=initialize_db)
+    await database.open()
+    now = int(time.time())
+    await database.execute(
+        "INSERT INTO users (id, email, name, password_hash, roles, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        ["u1", "a@example.com", "A", "x", "role_user", now, now]
+    )
+    yield AuthService(database)
+    await database.close()
+
+async def _expect(code, coro):
+    with pytest.raises(AuthenticationError) as excinfo:
+        await coro
+    assert excinfo.value.error_code == code
+
+def test_bloom_filter_has_no_false_negatives():
+    """Every added item is found; unrelated items rarely are."""
+    bloom = BloomFilter(1000, 0.01)
+    for i in range(1000):
+        bloom.add(f"family-{i}")
+    assert all(f"family-{i}" in bloom for i in range(1000))
+    false_positives = sum(f"other-{i}" in bloom for i in range(10000))
+    assert false_positives < 300
+
+@pytest.mark.asyncio
+async def test_refresh_rotates_in_one_round_trip(auth):
+    """A refresh returns a new pair for the same session and retires the old token."""
+    session = await auth._create_session(USER)
+    with count_queries() as counter:
+        refreshed = await auth.refresh_session(session["refresh_token"])
+    assert counter.queries == 1
+    assert refreshed["user"]["session_id"] == session["user"]["session_id"]
+    assert refreshed["refresh_token"] != session["refresh_token"]
+
+    again = await auth.refresh_session(refreshed["refresh_token"])
+    assert again["user"]["email"] == "a@example.com"
+
+@pytest.mark.asyncio
+async def test_reuse_revokes_the_family(auth, revocations):
+    """Replaying a rotated token kills every token of its family and the session."""
+    session = await auth._create_session(USER)
+    session_id = session["user"]["session_id"]
+    refreshed = await auth.refresh_session(session["refresh_token"])
+
+    await _expect("TOKEN_REUSED", auth.refresh_session(session["refresh_token"]))
+    await _expect("TOKEN_REVOKED", auth.refresh_session(refreshed["refresh_token"]))
+    assert await revocations.is_revoked(auth.db, session_id)
+    assert not await auth.verify_session(session_id)
+
+@pytest.mark.asyncio
+async def test_logout_revokes_the_session(auth, revocations):
+    """Logging out with a refresh token ends its session; other sessions live on."""
+    first = await auth._create_session(USER)
+    second = await auth._create_session(USER)
+    await auth.logout(first["refresh_token"])
+    await auth.logout("not-a-token")
+
+    await _expect("TOKEN_REVOKED", auth.refresh_session(first["refresh_token"]))
+    assert await auth.refresh_session(second["refresh_token"])
+    assert not await auth.verify_session(first["user"]["session_id"])
+
+@pytest.mark.asyncio
+async def test_filter_is_rebuilt_from_the_table(auth):
+    """Revocations made elsewhere are picked up by a rebuild, without false negatives."""
+    session = await auth._create_session(USER)
+    session_id = session["user"]["session_id"]
+    await auth.revoke_family(session_id)
+
+    other = RevocationList(capacity=100)
+    assert not await other.is_revoked(auth.db, session_id)
+    assert await other.rebuild(auth.db) == 1
+    assert await other.is_revoked(auth.db, session_id)
+    assert not other.might_be_revoked("unrelated")
@@ -0,0 +1,148 @@
+import time
+import pytest
+from fastapi.testclient import TestClient
+from src.lib import db as db_module
+from src.lib.app import app
+from src.lib.auth import session_cache as sessions
+from src.lib.auth.session_cache import SessionCache, SessionInvalidationChannel
+from src.lib.db import initialize_db
+from src.lib.db.pool import DatabasePool
+from src.lib.db.replica import ReplicatedDatabase
+from src.lib.db.sqlite import SqliteDatabase
+from src.lib.ratelimit.gcra import rate_limiter
+
+@pytest.fixture
+async def db(tmp_path):
+    """Get a native SQLite database with the application schema."""
+    database = SqliteDatabase(str(tmp_path / "sessions.db"), on_open=initialize_db)
+    await database.open()
+    yield database
+    await database.close()
+
+@pytest.fixture
+def cache(monkeypatch):
+    """Replace the process-wide session cache with a fresh one."""
+    fresh = SessionCache(max_entries=100, ttl=30, negative_ttl=5)
+    monkeypatch.setattr(sessions, "session_cache", fresh)
+    return fresh
+
+async def _add_session(db, session_id, expires_in=3600):
+    now = int(time.time())
+    await db.execute(
+        "INSERT INTO sessions (id, user_id, created_at, expires_at) VALUES (?, ?, ?, ?)",
+        [session_id, "user", now, now + expires_in]
+    )
+
+def test_entries_expire_after_ttl_and_session_expiry(monkeypatch):
+    """Valid entries live for the TTL but never past the session's own expiry."""
+    cache = SessionCache(ttl=30, negative_ttl=5)
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now)
+    cache.put_valid("long", now + 3600)
+    cache.put_valid("short", now + 10)
+    cache.put_invalid("gone")
+
+    monkeypatch.setattr(time, "time", lambda: now + 6)
+    assert cache.get("long") is True
+    assert cache.get("short") is True
+    assert cache.get("gone") is None
+
+    monkeypatch.setattr(time, "time", lambda: now + 11)
+    assert cache.get("long") is True
+    assert cache.get("short") is None
+
+    monkeypatch.setattr(time, "time", lambda: now + 31)
+    assert cache.get("long") is None
+
+def test_least_recently_used_entries_are_evicted():
+    """The cache never grows past max_entries."""
+    cache = SessionCache(max_entries=2)
+    far = time.time() + 3600
+    cache.put_valid("a", far)
+    cache.put_valid("b", far)
+    assert cache.get("a") is True  # b is now the least recently used
+    cache.put_valid("c", far)
+
+    assert cache.get("b") is None
+    assert cache.get("a") is True
+    assert cache.metrics()["size"] == 2
+
+@pytest.mark.asyncio
+async def test_lookups_hit_the_database_once(db, cache):
+    """Known and unknown sessions are both cached after the first lookup."""
+    await _add_session(db, "s1")
+    assert await sessions.is_session_valid(db, "s1") is True
+    assert await sessions.is_session_valid(db, "s1") is True
+    assert await sessions.is_session_valid(db, "nope") is False
+    assert await sessions.is_session_valid(db, "nope") is False
+    assert (cache.hits, cache.misses) == (2, 2)
+
+@pytest.mark.asyncio
+async def test_invalidate_wins_over_cached_entry(db, cache):
+    """A logout takes effect immediately on the worker that handled it."""
+    await _add_session(db, "s1")
+    assert await sessions.is_session_valid(db, "s1") is True
+    cache.invalidate("s1")
+    assert await sessions.is_session_valid(db, "s1") is False
+
+@pytest.mark.asyncio
+async def test_channel_invalidates_other_workers(db):
+    """Invalidations published by one worker reach the caches of the others."""
+    mine, theirs = SessionCache(), SessionCache()
+    far = time.time() + 3600
+    theirs.put_valid("s1", far)
+    theirs.put_valid("s2", far)
+
+    await SessionInvalidationChannel(db, mine).publish("old")
+    publisher = SessionInvalidationChannel(db, mine)
+    subscriber = SessionInvalidationChannel(db, theirs, poll_interval=60)
+    await subscriber.start()
+    try:
+        await publisher.publish("s1")
+        assert await subscriber.poll() == 1
+        assert theirs.get("s1") is False
+        assert theirs.get("s2") is True
+        assert await subscriber.poll() == 0
+    finally:
+        await subscriber.stop()
+
+@pytest.mark.asyncio
+async def test_channel_survives_pruning_the_table_empty(db):
+    """Ids are not reused after pruning, so later invalidations are still seen."""
+    theirs = SessionCache()
+    far = time.time() + 3600
+    publisher = SessionInvalidationChannel(db, SessionCache(), retention=0)
+    subscriber = SessionInvalidationChannel(db, theirs, poll_interval=60)
+    for session_id in ("a", "b", "c"):
+        await publisher.publish(session_id)
+    await subscriber.start()
+    try:
+        await db.execute("UPDATE session_invalidation_events SET invalidated_at = invalidated_at - 10")
+        await publisher.prune()
+        assert (await db.fetch_one("SELECT COUNT(*) AS n FROM session_invalidation_events")).n == 0
+
+        theirs.put_valid("s1", far)
+        await publisher.publish("s1")
+        assert await subscriber.poll() == 1
+        assert theirs.get("s1") is False
+    finally:
+        await subscriber.stop()
+
+def test_new_session_is_valid_before_the_replica_syncs(tmp_path, monkeypatch, cache):
+    """A registered user's first request is served from the cache, not a stale replica."""
+    primary = DatabasePool(f"file:{tmp_path / 'primary.db'}", min_size=1, max_size=2, keepalive_interval=0,
+                           on_open=initialize_db)
+    # No background syncs: the replica stays at its first snapshot
+    database = ReplicatedDatabase(primary, str(tmp_path / "replica.db"), sync_interval=0)
+    monkeypatch.setattr(db_module, "_db_pool", database)
+    monkeypatch.setattr(rate_limiter, "enabled", False)
+    if hasattr(app.state, "db"):
+        del app.state.db
+
+    with TestClient(app) as client:
+        response = client.post("/api/v1/auth/register", params={"username": "r@example.com", "password": "secret123", "name": "R"})
+        assert response.status_code == 200
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        response = client.get("/api/v1/auth/me", headers=headers)
+        assert response.status_code == 200
+        assert response.json()["email"] == "r@example.com"
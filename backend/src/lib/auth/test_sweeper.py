@@ -0,0 +1,69 @@
+import time
+import pytest
+from src.lib.auth import session_cache as sessions
+from src.lib.auth import sweeper as sweeper_module
+from src.lib.auth.revocation import RevocationList
+from src.lib.auth.session_cache import SessionCache
+from src.lib.auth.sweeper import SessionSweeper
+from src.lib.db import initialize_db
+from src.lib.db.sqlite import SqliteDatabase
+
+@pytest.fixture
+async def db(tmp_path, monkeypatch):
+    """Get a native SQLite database with the application schema."""
+    monkeypatch.setattr(sessions, "session_cache", SessionCache())
+    monkeypatch.setattr(sweeper_module, "revocations", RevocationList(capacity=100))
+    database = SqliteDatabase(str(tmp_path / "sweep.db"), on_open=initialize_db)
+    await database.open()
+    yield database
+    await database.close()
+
+async def _add_sessions(db, user_id, count, expires_in, start=0):
+    now = int(time.time())
+    async with db.unit_of_work() as uow:
+        for i in range(start, start + count):
+            uow.add(
+                "INSERT INTO sessions (id, user_id, created_at, expires_at) VALUES (?, ?, ?, ?)",
+                [f"{user_id}-{i}", user_id, now - 1000 + i, now + expires_in]
+            )
+
+async def _session_ids(db):
+    return {row.id for row in await db.fetch_all("SELECT id FROM sessions")}
+
+@pytest.mark.asyncio
+async def test_expired_rows_are_deleted_in_batches(db):
+    """Expired sessions, refresh tokens and revocations go; live ones stay."""
+    await _add_sessions(db, "u1", 7, expires_in=-10)
+    await _add_sessions(db, "u1", 2, expires_in=3600, start=7)
+    now = int(time.time())
+    await db.execute(
+        "INSERT INTO refresh_tokens (id, family_id, user_id, issued_at, expires_at) VALUES ('r1', 'f', 'u1', ?, ?)",
+        [now, now - 1]
+    )
+    await db.execute("INSERT INTO revoked_tokens (id, revoked_at, expires_at) VALUES ('f', ?, ?)", [now, now - 1])
+
+    report = await SessionSweeper(db, batch_size=3, pause=0).sweep()
+    assert report["expired_sessions"] == 7
+    assert report["expired_refresh_tokens"] == 1
+    assert report["expired_revoked_tokens"] == 1
+    assert await _session_ids(db) == {"u1-7", "u1-8"}
+
+@pytest.mark.asyncio
+async def test_sessions_per_user_are_capped(db):
+    """Only the newest sessions of each user survive, and they leave the cache."""
+    await _add_sessions(db, "u1", 5, expires_in=3600)
+    await _add_sessions(db, "u2", 2, expires_in=3600)
+    sessions.session_cache.put_valid("u1-0", time.time() + 3600)
+
+    sweeper = SessionSweeper(db, batch_size=2, max_sessions_per_user=3, pause=0)
+    report = await sweeper.sweep()
+    assert report["evicted_sessions"] == 2
+    assert await _session_ids(db) == {"u1-2", "u1-3", "u1-4", "u2-0", "u2-1"}
+    assert sessions.session_cache.get("u1-0") is False
+    assert sweeper.metrics()["last_report"] == report
+
+@pytest.mark.asyncio
+async def test_expired_sessions_use_the_index(db):
+    """The batch delete walks idx_sessions_expires_at instead of scanning."""
+    plan = await db.execute("EXPLAIN QUERY PLAN SELECT rowid FROM sessions WHERE expires_at <= ? LIMIT ?", [0, 10])
+    assert any("idx_sessions_expires_at" in row[-1] for row in plan.rows)
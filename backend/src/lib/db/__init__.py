@@ -1,9 +1,18 @@
 import os
-from libsql_client import create_client_sync
+import asyncio
+import hashlib
 from dotenv import load_dotenv
 import uuid
 import time
 import logging
+from functools import lru_cache
+from libsql_client import LibsqlError
+from .pool import DatabasePool, PoolTimeoutError
+from .unit_of_work import UnitOfWork
+from .rows import Record, RowMapper, record_type
+from .replica import ReplicatedDatabase
+from .sqlite import SqliteDatabase
+from .statements import split_statements, sqlite_path
 
 # Set up logging
 logger = logging.getLogger(__name__)
@@ -11,132 +20,163 @@ logger = logging.getLogger(__name__)
 # Load environment variables
 load_dotenv()
 
-# Database client instance
-_db_client = None
-_test_db_client = None
-
-def initialize_db(db):
-    """Initialize database with required tables."""
-    # Read schema file
-    schema_path = os.path.join(os.path.dirname(__file__), 'schema.sql')
-    with open(schema_path, 'r') as f:
-        schema = f.read()
-    
-    # Split schema into individual statements and execute them
-    statements = [stmt.strip() for stmt in schema.split(';') if stmt.strip()]
-    for stmt in statements:
-        if stmt:  # Skip empty statements
-            try:
-                db.execute(stmt)
-            except Exception as e:
-                print(f"Error executing statement: {e}")
-                print(f"Statement: {stmt}")
-
-    # Create test user if it doesn't exist
-    result = db.execute("SELECT COUNT(*) FROM users WHERE email = ?", ["test@example.com"])
-    if result.rows[0][0] == 0:
-        db.execute("""
-            INSERT INTO users (id, email, name, password_hash, roles, created_at, updated_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, [
-            str(uuid.uuid4()),
-            "test@example.com",
-            "Test User",
-            "$2b$12$LQv3c1yqBWVHxkd0LHAkCOYz6TtxMQJqhN8/LewYpwBAHHKQS.6YK",  # Password: test123
-            "role_user",
-            int(time.time()),
-            int(time.time())
-        ])
+# Database pool instances
+_db_pool = None
+_test_db_pool = None
+
+SCHEMA_PATH = os.path.join(os.path.dirname(__file__), 'schema.sql')
+
+# Single-row table holding the fingerprint of the schema.sql that was last applied
+SCHEMA_VERSION_TABLE = """
+    CREATE TABLE IF NOT EXISTS schema_version (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        fingerprint TEXT NOT NULL,
+        applied_at INTEGER NOT NULL
+    )
+"""
+
+@lru_cache(maxsize=None)
+def load_schema(path=SCHEMA_PATH):
+    """Read the schema file and return its statements and SHA-256 fingerprint."""
+    with open(path, 'rb') as f:
+        raw = f.read()
+    statements = list(split_statements(raw.decode('utf-8')))
+    return statements, hashlib.sha256(raw).hexdigest()
+
+async def initialize_db(db):
+    """Initialize database with required tables.
+
+    The fingerprint of ``schema.sql`` is stored in ``schema_version``; when it
+    matches, initialization costs a single query. Otherwise the schema is
+    applied in one batch. The test user is only seeded when
+    ``DB_SEED_TEST_USER`` is enabled.
+    """
+    statements, fingerprint = load_schema()
+    try:
+        result = await db.execute("SELECT fingerprint FROM schema_version WHERE id = 1")
+        current = result.rows[0][0] if result.rows else None
+    except LibsqlError:
+        current = None  # schema_version does not exist yet
+
+    if current != fingerprint:
+        logger.info(f"Applying schema.sql (fingerprint {fingerprint[:12]})")
+        uow = db.unit_of_work()
+        for stmt in statements:
+            uow.add(stmt)
+        uow.add(SCHEMA_VERSION_TABLE)
+        uow.add("""
+            INSERT INTO schema_version (id, fingerprint, applied_at) VALUES (1, ?, ?)
+            ON CONFLICT(id) DO UPDATE SET fingerprint = excluded.fingerprint, applied_at = excluded.applied_at
+        """, [fingerprint, int(time.time())])
+        try:
+            await uow.commit()
+        except Exception as e:
+            logger.error(f"Error applying schema: {str(e)}")
+            raise
+
+    if os.getenv("DB_SEED_TEST_USER", "false").lower() == "true":
+        await seed_test_user(db)
+
+async def seed_test_user(db):
+    """Create the test user if it doesn't exist."""
+    await db.execute("""
+        INSERT INTO users (id, email, name, password_hash, roles, created_at, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(email) DO NOTHING
+    """, [
+        str(uuid.uuid4()),
+        "test@example.com",
+        "Test User",
+        "$2b$12$LQv3c1yqBWVHxkd0LHAkCOYz6TtxMQJqhN8/LewYpwBAHHKQS.6YK",  # Password: test123
+        "role_user",
+        int(time.time()),
+        int(time.time())
+    ])
+
+def create_pool(url=None, auth_token=None):
+    """Create a database pool configured from the environment.
+
+    ``file:`` URLs use the native sqlite3 backend, anything else goes through
+    a pool of libsql clients.
+    """
+    url = url or os.getenv("VITE_LIBSQL_DB_URL")
+    path = sqlite_path(url) if url else None
+    if path is not None:
+        return SqliteDatabase(
+            path,
+            readers=int(os.getenv("DB_SQLITE_READERS", "4")),
+            statement_cache=int(os.getenv("DB_SQLITE_STATEMENT_CACHE", "128")),
+            busy_timeout=float(os.getenv("DB_SQLITE_BUSY_TIMEOUT", "5")),
+            on_open=initialize_db,
+        )
+    return DatabasePool(
+        url=url,
+        auth_token=auth_token or os.getenv("VITE_LIBSQL_DB_AUTH_TOKEN"),
+        min_size=int(os.getenv("DB_POOL_MIN_SIZE", "2")),
+        max_size=int(os.getenv("DB_POOL_MAX_SIZE", "10")),
+        acquire_timeout=float(os.getenv("DB_POOL_ACQUIRE_TIMEOUT", "5")),
+        keepalive_interval=float(os.getenv("DB_POOL_KEEPALIVE_INTERVAL", "30")),
+        on_open=initialize_db,
+    )
 
 def get_db():
-    """Get the database client instance."""
-    global _db_client
-    if _db_client is None:
+    """Get the database pool instance.
+
+    The pool is created lazily; it warms up and initializes the schema the
+    first time ``open()`` is awaited (see ``db_session_middleware``). When
+    ``DB_REPLICA_PATH`` is set, reads are served from a local replica file.
+    """
+    global _db_pool
+    if _db_pool is None:
         try:
-            logger.info("Creating new database connection")
-            _db_client = create_client_sync(
-                url=os.getenv("VITE_LIBSQL_DB_URL"),
-                auth_token=os.getenv("VITE_LIBSQL_DB_AUTH_TOKEN")
-            )
-            logger.info("Database connection created successfully")
-            initialize_db(_db_client)
-            logger.info("Database initialized")
+            logger.info("Creating database pool")
+            _db_pool = create_pool()
+            replica_path = os.getenv("DB_REPLICA_PATH")
+            if replica_path:
+                logger.info(f"Using embedded replica at {replica_path}")
+                _db_pool = ReplicatedDatabase(
+                    _db_pool,
+                    replica_path,
+                    sync_interval=float(os.getenv("DB_REPLICA_SYNC_INTERVAL", "5")),
+                    change_retention=float(os.getenv("DB_REPLICA_CHANGE_RETENTION", "3600")),
+                )
         except Exception as e:
-            logger.error("Error creating database connection")
+            logger.error("Error creating database pool")
             logger.error(f"Error type: {type(e)}")
             logger.error(f"Error message: {str(e)}")
             logger.exception(e)
             raise e
-    return _db_client
+    return _db_pool
 
 def get_test_db():
-    """Get the test database client instance."""
-    global _test_db_client
-    if _test_db_client is None:
+    """Get the test database pool instance."""
+    global _test_db_pool
+    if _test_db_pool is None:
         # Load test environment variables
         load_dotenv(".env.test")
-        _test_db_client = create_client_sync(
-            url=os.getenv("VITE_LIBSQL_DB_URL"),
-            auth_token=os.getenv("VITE_LIBSQL_DB_AUTH_TOKEN")
-        )
-        initialize_db(_test_db_client)
-    return _test_db_client
+        _test_db_pool = create_pool()
+    return _test_db_pool
+
+async def close_db():
+    """Close the database pools, if they were created."""
+    global _db_pool, _test_db_pool
+    for pool in (_db_pool, _test_db_pool):
+        if pool is not None and not pool.closed:
+            await pool.close()
+    _db_pool = None
+    _test_db_pool = None
 
 def cleanup_test_db():
     """Clean up test database after tests."""
-    global _test_db_client
-    if _test_db_client:
-        try:
-            # Delete in correct order to handle foreign key constraints
-            _test_db_client.execute("DELETE FROM sessions")  # Delete child records first
-            _test_db_client.execute("DELETE FROM users")     # Then delete parent records
-        except Exception as e:
-            print(f"Error during cleanup: {str(e)}")
-        _test_db_client.close()
-        _test_db_client = None
-
-def row_to_dict(row):
-    """Convert a database row to a dictionary."""
-    if not row:
-        return None
-
-    # Get column names from the query result
-    if len(row) == 4:  # SELECT id, email, name, roles
-        return {
-            "id": row[0],
-            "email": row[1],
-            "name": row[2],
-            "roles": row[3]
-        }
-    elif len(row) == 5:  # SELECT id, email, name, password_hash, roles
-        return {
-            "id": row[0],
-            "email": row[1],
-            "name": row[2],
-            "password_hash": row[3],
-            "roles": row[4]
-        }
-    elif len(row) == 7:  # Full user row without failed attempts
-        return {
-            "id": row[0],
-            "email": row[1],
-            "name": row[2],
-            "password_hash": row[3],
-            "roles": row[4],
-            "created_at": row[5],
-            "updated_at": row[6]
-        }
-    elif len(row) == 9:  # Full user row with failed attempts
-        return {
-            "id": row[0],
-            "email": row[1],
-            "name": row[2],
-            "password_hash": row[3],
-            "roles": row[4],
-            "failed_attempts": row[5] if row[5] is not None else 0,
-            "last_failed_attempt": row[6],
-            "created_at": row[7],
-            "updated_at": row[8]
-        }
-    else:
-        raise ValueError(f"Unknown row format with {len(row)} columns")
+    global _test_db_pool
+    if _test_db_pool:
+        async def _cleanup(pool):
+            try:
+                # Delete in correct order to handle foreign key constraints
+                await pool.execute("DELETE FROM sessions")  # Delete child records first
+                await pool.execute("DELETE FROM users")     # Then delete parent records
+            except Exception as e:
+                print(f"Error during cleanup: {str(e)}")
+            await pool.close()
+        asyncio.run(_cleanup(_test_db_pool))
+        _test_db_pool = None
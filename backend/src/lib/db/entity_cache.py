@@ -0,0 +1,136 @@
+import os
+import math
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, NamedTuple, Optional
+
+# Deleted entities are tombstoned with a version no load can beat
+DELETED = math.inf
+
+# Rough per-entry bookkeeping cost, so that tombstones and tiny values count
+ENTRY_OVERHEAD = 64
+
+
+class CacheEntry(NamedTuple):
+    value: Any
+    version: float
+    size: int
+    expires_at: float
+    # Invalidation stamp of a tombstone (see EntityCache.stamp)
+    stamp: int = 0
+
+
+def estimate_size(rows: Iterable) -> int:
+    """Approximate the memory held by cached rows from their raw column values."""
+    size = 0
+    for row in rows:
+        size += ENTRY_OVERHEAD
+        for value in row:
+            size += len(value) if isinstance(value, (str, bytes)) else 8
+    return size
+
+
+class EntityCache:
+    """Read-through cache of decoded entities, bounded by bytes (LRU).
+
+    Values are stored already decoded (JSON columns parsed), so a hit costs
+    neither a round trip nor a ``json.loads``; callers must treat them as
+    read-only. Each entry carries a version, the entity's ``updated_at``:
+    ``put()`` refuses a value older than what the cache holds, and
+    ``invalidate()`` leaves a tombstone with the new version, so a load
+    that raced a write cannot put the old row back. Loads pass the
+    ``stamp()`` taken before they read, which tells a load that started
+    after the invalidation (and so saw the write) from one that raced it
+    within the same second of ``updated_at``. ``ttl`` bounds how long
+    other workers, which do not see this worker's invalidations, can serve
+    a stale entity.
+    """
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024, ttl: float = 60.0):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.stale_puts = 0
+        self._invalidations = 0
+
+    def stamp(self) -> int:
+        """Mark the start of a load; pass the result to ``put()``."""
+        return self._invalidations
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None or entry.value is None or entry.expires_at <= time.time():
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry.value
+
+    def put(self, key: str, value: Any, version: float, size: int, stamp: Optional[int] = None) -> bool:
+        """Cache ``value`` unless the cache already knows a newer version.
+
+        ``stamp`` is the ``stamp()`` taken before the value was read; without
+        it, a load is assumed to have raced every invalidation.
+        """
+        current = self._entries.get(key)
+        if current is not None and current.expires_at > time.time():
+            # A tombstone also refuses its own version from loads that
+            # started before it: updated_at has one-second resolution, so
+            # such a load may still have read the old row
+            raced = stamp is None or stamp < current.stamp
+            if current.version > version or (current.value is None and current.version == version and raced):
+                self.stale_puts += 1
+                return False
+        size += ENTRY_OVERHEAD
+        if size > self.max_bytes:
+            self._remove(key)
+            return False
+        self._store(key, CacheEntry(value, version, size, time.time() + self.ttl))
+        return True
+
+    def invalidate(self, key: str, version: float = DELETED) -> None:
+        """Drop ``key``, refusing later puts older than ``version``."""
+        self._invalidations += 1
+        self._store(key, CacheEntry(None, version, ENTRY_OVERHEAD, time.time() + self.ttl, self._invalidations))
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.bytes = 0
+
+    def _store(self, key: str, entry: CacheEntry) -> None:
+        self._remove(key)
+        self._entries[key] = entry
+        self.bytes += entry.size
+        while self.bytes > self.max_bytes and self._entries:
+            _, evicted = self._entries.popitem(last=False)
+            self.bytes -= evicted.size
+            self.evictions += 1
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry.size
+
+    def metrics(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            "evictions": self.evictions,
+            "stale_puts": self.stale_puts,
+        }
+
+
+# Process-wide cache of topics and per-topic question lists
+entity_cache = EntityCache(
+    max_bytes=int(os.getenv("ENTITY_CACHE_MAX_BYTES", str(32 * 1024 * 1024))),
+    ttl=float(os.getenv("ENTITY_CACHE_TTL", "60")),
+)
@@ -1,106 +1,196 @@
 import os
+import re
 import time
 import asyncio
+import hashlib
+import logging
+import argparse
 from pathlib import Path
-from libsql_client import Client, create_client
+from typing import Dict, Iterator, List, NamedTuple
 from dotenv import load_dotenv
+from libsql_client import LibsqlError
+
+# Package-relative imports: run from backend/ as `python -m src.lib.db.migrate`
+# (the Pipfile's `migrate` script), not as a file path
+from .online import OnlineMigration
+from .statements import split_statements
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_DIR = Path(__file__).parent / 'migrations'
+
+# Ledger of applied migrations; created by the first migration batch
+LEDGER_TABLE = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version TEXT PRIMARY KEY,
+        checksum TEXT NOT NULL,
+        applied_at INTEGER NOT NULL
+    )
+"""
+
+_NUMBER_PREFIX = re.compile(r"^(\d+)_")
+
+
+class MigrationError(Exception):
+    """Raised when the migrations on disk don't match the ledger."""
 
-async def run_migration(client: Client, sql: str):
-    # Split on semicolons but ignore semicolons inside quotes
-    statements = []
-    current_statement = []
-    in_quotes = False
-    quote_char = None
-    escaped = False
-
-    for char in sql:
-        if escaped:
-            current_statement.append(char)
-            escaped = False
-            continue
-
-        if char == '\\':
-            escaped = True
-            current_statement.append(char)
-            continue
-
-        if char in ["'", '"']:
-            in_quotes = not in_quotes if not quote_char or char == quote_char else in_quotes
-            quote_char = char if in_quotes else None
-
-        if char == ';' and not in_quotes:
-            current_statement.append(char)
-            stmt = ''.join(current_statement).strip()
-            if stmt:
-                statements.append(stmt)
-            current_statement = []
-        else:
-            current_statement.append(char)
-
-    # Add the last statement if it exists
-    stmt = ''.join(current_statement).strip()
-    if stmt:
-        statements.append(stmt)
-
-    # Execute each statement
-    for statement in statements:
-        if statement.strip():
-            # Replace timestamp placeholders with current Unix timestamp
-            current_time = int(time.time())
-            statement = statement.replace('CURRENT_TIMESTAMP', str(current_time))
-            print(f"\nExecuting SQL statement:\n{statement}\n")
-            try:
-                await client.execute(statement)
-                print("Statement executed successfully")
-            except Exception as e:
-                print(f"Error executing statement: {e}")
-                raise
-
-async def migrate():
-    # Load environment variables
-    load_dotenv()
 
-    # Get Turso credentials from environment
-    db_url = os.getenv('VITE_LIBSQL_DB_URL')
-    auth_token = os.getenv('VITE_LIBSQL_DB_AUTH_TOKEN')
+class Migration(NamedTuple):
+    """A migration file; its version is the file name up to the first dot.
 
-    if not db_url or not auth_token:
-        raise ValueError("Database URL and auth token must be set in environment variables")
+    Files named ``*.online.sql`` hold a new ``CREATE TABLE`` plus its
+    indexes and are applied as an online table rebuild (see ``online.py``).
+    """
+    version: str
+    path: Path
+    checksum: str
 
-    # Get the directory containing this script
-    current_dir = Path(__file__).parent
-    migrations_dir = current_dir / 'migrations'
+    @property
+    def online(self) -> bool:
+        return self.path.name.endswith('.online.sql')
 
-    print('Running migrations...')
+    def statements(self) -> Iterator[str]:
+        """Yield the migration's statements, split on top-level semicolons."""
+        return split_statements(self.path.read_text())
 
-    # Connect to Turso using the correct create_client function
-    client = create_client(
-        url=db_url,
-        auth_token=auth_token
+
+def discover_migrations(directory: Path = MIGRATIONS_DIR) -> List[Migration]:
+    """List the migration files in apply order (by file name)."""
+    migrations = []
+    numbers: Dict[str, str] = {}
+    for path in sorted(p for p in directory.iterdir() if p.suffix == '.sql'):
+        match = _NUMBER_PREFIX.match(path.name)
+        if match:
+            if match.group(1) in numbers:
+                # Both still run: versions are full file names, so they can't collide
+                logger.warning(f"Migrations {numbers[match.group(1)]} and {path.name} share number {match.group(1)}")
+            numbers[match.group(1)] = path.name
+        checksum = hashlib.sha256(path.read_bytes()).hexdigest()
+        migrations.append(Migration(path.name.split('.')[0], path, checksum))
+    return migrations
+
+
+async def applied_migrations(db) -> Dict[str, str]:
+    """Return ``{version: checksum}`` for every migration in the ledger."""
+    try:
+        rows = await db.fetch_all("SELECT version, checksum FROM schema_migrations")
+    except LibsqlError:
+        return {}  # no ledger yet, nothing was applied
+    return {row.version: row.checksum for row in rows}
+
+
+async def plan(db, directory: Path = MIGRATIONS_DIR) -> List[Migration]:
+    """Return the migrations that still need to be applied.
+
+    Raises MigrationError if an applied migration was edited afterwards.
+    """
+    applied = await applied_migrations(db)
+    pending = []
+    for migration in discover_migrations(directory):
+        checksum = applied.get(migration.version)
+        if checksum is None:
+            pending.append(migration)
+        elif checksum != migration.checksum:
+            raise MigrationError(
+                f"Migration {migration.version} was modified after it was applied "
+                f"(ledger {checksum[:12]}, file {migration.checksum[:12]})"
+            )
+    return pending
+
+
+def _record(uow, migration: Migration) -> None:
+    uow.add(LEDGER_TABLE)
+    uow.add(
+        "INSERT INTO schema_migrations (version, checksum, applied_at) VALUES (?, ?, ?)",
+        [migration.version, migration.checksum, int(time.time())]
     )
 
+
+async def apply_migration(db, migration: Migration) -> None:
+    """Apply one migration and record it, all in a single transactional batch."""
+    async with db.unit_of_work() as uow:
+        for statement in migration.statements():
+            uow.add(statement)
+        _record(uow, migration)
+
+
+async def migrate(
+    db,
+    directory: Path = MIGRATIONS_DIR,
+    baseline: bool = False,
+    chunk_size: int = 1000,
+    throttle: float = 0.05,
+) -> List[Migration]:
+    """Apply pending migrations in order and return the ones that were applied.
+
+    With ``baseline`` the pending migrations are only recorded as applied,
+    for databases that were created from ``schema.sql``. ``chunk_size`` and
+    ``throttle`` (seconds between chunks) apply to online migrations.
+    """
+    pending = await plan(db, directory)
+    if baseline:
+        async with db.unit_of_work() as uow:
+            for migration in pending:
+                _record(uow, migration)
+        return pending
+
+    for migration in pending:
+        started = time.monotonic()
+        try:
+            if migration.online:
+                online = OnlineMigration(db, migration.version, list(migration.statements()), chunk_size, throttle)
+                await online.run(on_swap=lambda uow, m=migration: _record(uow, m))
+            else:
+                await apply_migration(db, migration)
+        except Exception as e:
+            raise MigrationError(f"Migration {migration.version} failed: {e}") from e
+        logger.info(f"Applied {migration.version} in {(time.monotonic() - started) * 1000:.1f}ms")
+    return pending
+
+
+async def main(argv=None):
+    parser = argparse.ArgumentParser(description="Apply pending database migrations.")
+    parser.add_argument("--dry-run", action="store_true", help="print the pending migrations without applying them")
+    parser.add_argument("--baseline", action="store_true", help="record pending migrations as applied without running them")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="rows per transaction for online migrations")
+    parser.add_argument("--throttle-ms", type=float, default=50, help="pause between online migration chunks")
+    args = parser.parse_args(argv)
+
+    # Load environment variables
+    load_dotenv()
+    if not os.getenv('VITE_LIBSQL_DB_URL'):
+        raise ValueError("Database URL must be set in environment variables")
+
+    from . import create_pool
+
+    # Not opened on purpose: opening runs initialize_db
+    db = create_pool()
     try:
-        # Get all .sql files and sort them
-        migration_files = sorted([f for f in os.listdir(migrations_dir) if f.endswith('.sql')])
-
-        for file in migration_files:
-            print(f'\nRunning migration: {file}')
-            try:
-                with open(migrations_dir / file, 'r') as f:
-                    sql = f.read()
-                    await run_migration(client, sql)
-                print(f"Migration {file} completed successfully")
-            except Exception as e:
-                print(f"Error in migration {file}: {e}")
-                break
-
-        print('\nMigrations complete!')
-
-    except Exception as e:
-        print(f'\nError running migrations: {e}')
-        raise
+        if args.dry_run:
+            pending = await plan(db)
+            print(f"{len(pending)} pending migration(s)")
+            for migration in pending:
+                statements = list(migration.statements())
+                kind = "online rebuild, " if migration.online else ""
+                print(f"\n{migration.version} ({kind}{len(statements)} statements, {migration.checksum[:12]})")
+                for statement in statements:
+                    print(f"  {statement.splitlines()[0]}")
+            return
+
+        applied = await migrate(
+            db,
+            baseline=args.baseline,
+            chunk_size=args.chunk_size,
+            throttle=args.throttle_ms / 1000,
+        )
+        action = "Recorded" if args.baseline else "Applied"
+        print(f"{action} {len(applied)} migration(s)")
+        for migration in applied:
+            print(f"  {migration.version}")
     finally:
-        await client.close()
+        await db.close()
 
 if __name__ == '__main__':
-    asyncio.run(migrate())
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    asyncio.run(main())
@@ -0,0 +1,293 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from libsql_client import Client, LibsqlError, ResultSet, create_client
+from .rows import Record, RowMapper, default_mapper
+from .stats import query_stats
+from .unit_of_work import UnitOfWork
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Errors that mean the underlying connection is unusable and must not be reused
+_BROKEN_CLIENT_ERRORS = (OSError, ConnectionError, asyncio.TimeoutError)
+
+
+class PoolTimeoutError(Exception):
+    """Raised when no database client becomes available within the acquire timeout."""
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+        super().__init__(f"Timed out after {timeout:.2f}s waiting for a database connection")
+
+
+class DatabasePool:
+    """Bounded pool of async libsql clients.
+
+    At most ``max_size`` clients are checked out at any time; callers beyond
+    that wait up to ``acquire_timeout`` seconds. ``open()`` warms up
+    ``min_size`` clients and starts a keep-alive task that pings idle clients
+    and replaces the ones that stopped answering.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        auth_token: Optional[str] = None,
+        min_size: int = 1,
+        max_size: int = 10,
+        acquire_timeout: float = 5.0,
+        keepalive_interval: float = 30.0,
+        client_factory: Optional[Callable[[], Client]] = None,
+        on_open: Optional[Callable[["DatabasePool"], Awaitable[None]]] = None,
+    ):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        if min_size > max_size:
+            raise ValueError("min_size cannot be larger than max_size")
+
+        self.url = url
+        self.min_size = min_size
+        self.max_size = max_size
+        self.acquire_timeout = acquire_timeout
+        self.keepalive_interval = keepalive_interval
+        self._client_factory = client_factory or (lambda: create_client(url, auth_token=auth_token))
+        self._on_open = on_open
+
+        # Idle clients with the time they were last returned to the pool
+        self._idle: List[Tuple[Client, float]] = []
+        self._size = 0
+        self._in_use = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._open_lock: Optional[asyncio.Lock] = None
+        self._keepalive_task: Optional[asyncio.Task] = None
+        self._opened = False
+        self._closed = False
+
+        # Counters exposed through metrics()
+        self._acquired = 0
+        self._timeouts = 0
+        self._created = 0
+        self._discarded = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def _bind_loop(self) -> None:
+        """Bind the pool's synchronization primitives to the running event loop.
+
+        Clients and primitives belong to the loop they were created on. When the
+        pool is first used from a different loop (e.g. a new TestClient) the idle
+        clients are dropped and the primitives are recreated.
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        if self._loop is not None:
+            logger.info("Database pool moved to a new event loop, dropping idle clients")
+            self._discarded += len(self._idle)
+            self._idle.clear()
+            self._in_use = 0
+            self._size = 0
+            self._keepalive_task = None
+            self._opened = False
+        self._loop = loop
+        self._semaphore = asyncio.Semaphore(self.max_size)
+        self._open_lock = asyncio.Lock()
+
+    async def open(self) -> "DatabasePool":
+        """Warm up ``min_size`` clients and start the keep-alive task. Idempotent."""
+        self._bind_loop()
+        async with self._open_lock:
+            if self._opened:
+                return self
+            if self._closed:
+                raise LibsqlError("The database pool was closed", "POOL_CLOSED")
+
+            logger.info(f"Opening database pool (min={self.min_size}, max={self.max_size})")
+            warm = await asyncio.gather(*[self._warm_client() for _ in range(self.min_size - len(self._idle))])
+            now = time.monotonic()
+            self._idle.extend((client, now) for client in warm)
+
+            if self.keepalive_interval > 0:
+                self._keepalive_task = asyncio.create_task(self._keepalive())
+            self._opened = True
+
+            if self._on_open is not None:
+                await self._on_open(self)
+            logger.info("Database pool opened")
+        return self
+
+    async def close(self) -> None:
+        """Stop the keep-alive task and close all idle clients."""
+        self._closed = True
+        if self._keepalive_task is not None:
+            self._keepalive_task.cancel()
+            try:
+                await self._keepalive_task
+            except (asyncio.CancelledError, RuntimeError):
+                pass
+            self._keepalive_task = None
+
+        idle, self._idle = self._idle, []
+        for client, _ in idle:
+            await self._close_client(client)
+        logger.info("Database pool closed")
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    @asynccontextmanager
+    async def acquire(self):
+        """Check out a client for the duration of the ``async with`` block."""
+        client = await self._acquire()
+        broken = False
+        try:
+            yield client
+        except _BROKEN_CLIENT_ERRORS:
+            broken = True
+            raise
+        finally:
+            await self._release(client, broken)
+
+    async def execute(self, sql: str, args: Any = None) -> ResultSet:
+        """Execute a single statement on a pooled client."""
+        started = time.perf_counter()
+        try:
+            async with self.acquire() as client:
+                result = await client.execute(sql, args)
+        except Exception:
+            query_stats.record(self, sql, time.perf_counter() - started, args=args, error=True)
+            raise
+        query_stats.record(self, sql, time.perf_counter() - started, result, args)
+        return result
+
+    async def fetch_all(self, sql: str, args: Any = None, mapper: Optional[RowMapper] = None) -> List[Record]:
+        """Execute a query and map its rows to records."""
+        result = await self.execute(sql, args)
+        return (mapper or default_mapper).all(result, sql)
+
+    async def fetch_one(self, sql: str, args: Any = None, mapper: Optional[RowMapper] = None) -> Optional[Record]:
+        """Execute a query and map its first row to a record, if any."""
+        result = await self.execute(sql, args)
+        return (mapper or default_mapper).one(result, sql)
+
+    async def batch(self, statements: List[Any]) -> List[ResultSet]:
+        """Execute statements in one implicit transaction on a pooled client."""
+        started = time.perf_counter()
+        try:
+            async with self.acquire() as client:
+                results = await client.batch(statements)
+        except Exception:
+            query_stats.record_batch(statements, time.perf_counter() - started, error=True)
+            raise
+        query_stats.record_batch(statements, time.perf_counter() - started, results)
+        return results
+
+    def unit_of_work(self) -> UnitOfWork:
+        """Start a unit of work whose statements are committed as one batch."""
+        return UnitOfWork(self)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Return a snapshot of pool utilization counters."""
+        return {
+            "size": self._size,
+            "idle": len(self._idle),
+            "in_use": self._in_use,
+            "min_size": self.min_size,
+            "max_size": self.max_size,
+            "acquired": self._acquired,
+            "timeouts": self._timeouts,
+            "created": self._created,
+            "discarded": self._discarded,
+            "wait_avg_ms": round(self._wait_total / self._acquired * 1000, 3) if self._acquired else 0.0,
+            "wait_max_ms": round(self._wait_max * 1000, 3),
+        }
+
+    async def _acquire(self) -> Client:
+        if self._closed:
+            raise LibsqlError("The database pool was closed", "POOL_CLOSED")
+        self._bind_loop()
+
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.acquire_timeout)
+        except asyncio.TimeoutError:
+            self._timeouts += 1
+            logger.warning(f"Database pool exhausted: {self._in_use}/{self.max_size} clients in use")
+            raise PoolTimeoutError(self.acquire_timeout)
+
+        try:
+            client = self._idle.pop()[0] if self._idle else await self._new_client()
+        except Exception:
+            self._semaphore.release()
+            raise
+
+        waited = time.monotonic() - started
+        self._acquired += 1
+        self._in_use += 1
+        self._wait_total += waited
+        self._wait_max = max(self._wait_max, waited)
+        return client
+
+    async def _release(self, client: Client, broken: bool = False) -> None:
+        self._in_use -= 1
+        try:
+            if broken or self._closed or client.closed:
+                await self._discard(client)
+            else:
+                self._idle.append((client, time.monotonic()))
+        finally:
+            self._semaphore.release()
+
+    async def _new_client(self) -> Client:
+        client = self._client_factory()
+        self._size += 1
+        self._created += 1
+        return client
+
+    async def _warm_client(self) -> Client:
+        client = await self._new_client()
+        await client.execute("SELECT 1")
+        return client
+
+    async def _discard(self, client: Client) -> None:
+        self._size -= 1
+        self._discarded += 1
+        await self._close_client(client)
+
+    async def _close_client(self, client: Client) -> None:
+        try:
+            await client.close()
+        except Exception as e:
+            logger.debug(f"Error closing database client: {str(e)}")
+
+    async def _keepalive(self) -> None:
+        """Ping clients that sat idle for a full interval and top the pool back up."""
+        while True:
+            await asyncio.sleep(self.keepalive_interval)
+            try:
+                await self._ping_idle()
+            except Exception as e:
+                logger.error(f"Database pool keep-alive failed: {str(e)}")
+
+    async def _ping_idle(self) -> None:
+        cutoff = time.monotonic() - self.keepalive_interval
+        stale = [entry for entry in self._idle if entry[1] <= cutoff]
+        for entry in stale:
+            if entry not in self._idle:
+                continue  # checked out while we were pinging others
+            self._idle.remove(entry)
+            client = entry[0]
+            try:
+                await client.execute("SELECT 1")
+                self._idle.append((client, time.monotonic()))
+            except Exception as e:
+                logger.warning(f"Dropping unresponsive database client: {str(e)}")
+                await self._discard(client)
+
+        while self._size < self.min_size:
+            self._idle.append((await self._new_client(), time.monotonic()))
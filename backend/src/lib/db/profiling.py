@@ -0,0 +1,111 @@
+import time
+import logging
+from collections import defaultdict
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from .stats import count_queries
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+RouteKey = Tuple[str, str]  # (method, route path template)
+
+
+class QueryBudget(NamedTuple):
+    """Upper bounds for one route: round trips per request and p95 wall time."""
+    queries: int
+    p95_ms: Optional[float] = None
+
+
+class RequestSample(NamedTuple):
+    queries: int
+    ms: float
+    statements: List[str]
+
+
+def route_template(scope) -> str:
+    """Return the full path template of the matched route, e.g. ``/api/v1/topics/{topic_id}``.
+
+    Routes of included routers only know their own path, so the prefix is
+    recovered from the request path.
+    """
+    path = scope["path"]
+    route = scope.get("route")
+    regex = getattr(route, "path_regex", None)
+    if regex is None:
+        return path
+    for i, char in enumerate(path):
+        if char == "/" and regex.match(path[i:]):
+            return path[:i] + route.path
+    return route.path
+
+
+class RequestProfiler:
+    """ASGI wrapper that records db round trips and wall time per route.
+
+    Samples are keyed by ``(method, route template)``, e.g.
+    ``("GET", "/api/v1/topics/user/{user_id}")``, so every request to the
+    same endpoint is aggregated. Intended for tests::
+
+        profiler = RequestProfiler(app)
+        client = TestClient(profiler)
+        ...
+        assert not profiler.violations(BUDGETS)
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.samples: Dict[RouteKey, List[RequestSample]] = defaultdict(list)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        with count_queries() as counter:
+            started = time.perf_counter()
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                ms = (time.perf_counter() - started) * 1000
+                key = (scope["method"], route_template(scope))
+                self.samples[key].append(RequestSample(counter.queries, ms, counter.statements))
+
+    def reset(self) -> None:
+        self.samples.clear()
+
+    def report(self) -> Dict[RouteKey, Dict[str, float]]:
+        """Summarize the samples: request count, max queries and p95 latency per route."""
+        report = {}
+        for key, samples in self.samples.items():
+            durations = sorted(sample.ms for sample in samples)
+            p95 = durations[min(len(durations) - 1, int(len(durations) * 0.95))]
+            report[key] = {
+                "requests": len(samples),
+                "max_queries": max(sample.queries for sample in samples),
+                "p95_ms": round(p95, 3),
+            }
+        return report
+
+    def violations(self, budgets: Dict[RouteKey, QueryBudget], latency: bool = True) -> List[str]:
+        """Describe every route that exceeded its budget or has none.
+
+        With ``latency=False`` only round trips are checked; wall-time
+        budgets depend on the machine and are best enforced on a quiet one.
+        """
+        problems = []
+        report = self.report()
+        for key, summary in sorted(report.items()):
+            budget = budgets.get(key)
+            method, path = key
+            if budget is None:
+                problems.append(f"{method} {path}: no budget declared")
+                continue
+            if summary["max_queries"] > budget.queries:
+                worst = max(self.samples[key], key=lambda sample: sample.queries)
+                problems.append(
+                    f"{method} {path}: {summary['max_queries']} queries > budget {budget.queries} "
+                    f"({'; '.join(worst.statements)})"
+                )
+            if latency and budget.p95_ms is not None and summary["p95_ms"] > budget.p95_ms:
+                problems.append(f"{method} {path}: p95 {summary['p95_ms']}ms > budget {budget.p95_ms}ms")
+        return problems
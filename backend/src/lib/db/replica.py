@@ -0,0 +1,361 @@
+import asyncio
+import contextvars
+import json
+import logging
+import sqlite3
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from libsql_client import ResultSet, Statement
+
+from .pool import DatabasePool
+from .rows import Record, RowMapper, default_mapper
+from .sqlite import SqliteDatabase
+from .statements import is_read_statement
+from .unit_of_work import UnitOfWork
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Monotonic time of the last write made from the current context (request)
+_last_write: contextvars.ContextVar[float] = contextvars.ContextVar("db_last_write", default=0.0)
+
+# Change log kept on the primary: triggers on every table append the key of
+# each inserted, updated or deleted row, and replicas copy just those rows.
+# Rows are keyed by their primary key as a JSON array (the rowid for tables
+# without one), which survives VACUUM.
+CHANGES_TABLE = "replica_changes"
+_CHANGES_SCHEMA = [
+    f"""
+    CREATE TABLE IF NOT EXISTS {CHANGES_TABLE} (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        table_name TEXT NOT NULL,
+        row_key TEXT NOT NULL,
+        changed_at INTEGER NOT NULL DEFAULT (unixepoch())
+    )
+    """,
+    f"CREATE INDEX IF NOT EXISTS idx_{CHANGES_TABLE}_changed_at ON {CHANGES_TABLE}(changed_at)",
+]
+
+_TABLE_COLUMNS_SQL = f"""
+    SELECT m.name AS table_name, p.name AS column_name, p.pk
+    FROM sqlite_master m JOIN pragma_table_info(m.name) p
+    WHERE m.type = 'table' AND m.name NOT LIKE 'sqlite_%' AND m.name != '{CHANGES_TABLE}'
+    ORDER BY m.name, p.cid
+"""
+
+# Where the change log stands, read in the same transaction as the rows
+_HEAD_SQL = f"""
+    SELECT (SELECT schema_version FROM pragma_schema_version()) AS schema_version,
+           (SELECT seq FROM sqlite_sequence WHERE name = '{CHANGES_TABLE}') AS last_seq,
+           (SELECT MIN(seq) FROM {CHANGES_TABLE}) AS oldest_seq
+"""
+
+_SCHEMA_SQL = f"""
+    SELECT sql FROM sqlite_master
+    WHERE sql IS NOT NULL AND type IN ('table', 'index', 'view')
+      AND name NOT LIKE 'sqlite_%' AND tbl_name != '{CHANGES_TABLE}'
+    ORDER BY CASE type WHEN 'table' THEN 0 WHEN 'view' THEN 1 ELSE 2 END
+"""
+
+
+class _Table:
+    """A replicated table: the columns copied and the columns that key a row."""
+
+    __slots__ = ("name", "columns", "keys")
+
+    def __init__(self, name: str, columns: List[str], keys: List[str]):
+        self.name = name
+        # Keyless tables carry their rowid along so that changes can find the row
+        self.keys = keys or ["rowid"]
+        self.columns = columns if keys else ["rowid"] + columns
+
+    def select(self) -> str:
+        return f'SELECT {", ".join(_quote(c) for c in self.columns)} FROM "{self.name}"'
+
+    def select_changed(self) -> str:
+        match = " AND ".join(f"t.{_quote(k)} = json_extract(c.row_key, '$[{i}]')" for i, k in enumerate(self.keys))
+        return f"""
+            SELECT {", ".join(f"t.{_quote(c)}" for c in self.columns)}
+            FROM (SELECT DISTINCT row_key FROM {CHANGES_TABLE} WHERE table_name = ? AND seq > ?) c
+            JOIN "{self.name}" t ON {match}
+        """
+
+    def insert(self) -> str:
+        return (f'INSERT OR REPLACE INTO "{self.name}" ({", ".join(_quote(c) for c in self.columns)}) '
+                f'VALUES ({", ".join("?" for _ in self.columns)})')
+
+    def delete(self) -> str:
+        return f'DELETE FROM "{self.name}" WHERE {" AND ".join(f"{_quote(k)} = ?" for k in self.keys)}'
+
+    def triggers(self) -> List[str]:
+        def key(row: str) -> str:
+            return f"json_array({', '.join(f'{row}.{_quote(k)}' for k in self.keys)})"
+
+        log = f"INSERT INTO {CHANGES_TABLE} (table_name, row_key)"
+        return [
+            f"""
+            CREATE TRIGGER IF NOT EXISTS "{CHANGES_TABLE}_{self.name}_insert" AFTER INSERT ON "{self.name}" BEGIN
+                {log} VALUES ('{self.name}', {key("NEW")});
+            END
+            """,
+            f"""
+            CREATE TRIGGER IF NOT EXISTS "{CHANGES_TABLE}_{self.name}_update" AFTER UPDATE ON "{self.name}" BEGIN
+                {log} SELECT '{self.name}', {key("OLD")} UNION SELECT '{self.name}', {key("NEW")};
+            END
+            """,
+            f"""
+            CREATE TRIGGER IF NOT EXISTS "{CHANGES_TABLE}_{self.name}_delete" AFTER DELETE ON "{self.name}" BEGIN
+                {log} VALUES ('{self.name}', {key("OLD")});
+            END
+            """,
+        ]
+
+
+def _quote(column: str) -> str:
+    return column if column == "rowid" else f'"{column}"'
+
+
+class ReplicatedDatabase:
+    """Routes reads to a local SQLite replica and writes to the primary.
+
+    The replica is a native ``SqliteDatabase``, so reads run on its reader
+    threads. It starts from a full copy of the primary and is then kept up
+    to date every ``sync_interval`` seconds by copying only the rows the
+    primary's change log lists since the last sync; a schema change, or a
+    replica that fell behind the ``change_retention`` seconds of log the
+    primary keeps, gets a full copy again. Reads issued after a write from
+    the same request (context) go to the primary until the next sync has
+    completed, so a request always sees its own writes.
+    """
+
+    def __init__(
+        self,
+        primary: DatabasePool,
+        replica_path: str,
+        sync_interval: float = 5.0,
+        change_retention: float = 3600.0,
+    ):
+        self.primary = primary
+        self.replica_path = replica_path
+        self.sync_interval = sync_interval
+        self.change_retention = change_retention
+        self.replica = SqliteDatabase(replica_path, readers=max(1, primary.max_size))
+        self._sync_task: Optional[asyncio.Task] = None
+        self._sync_lock: Optional[asyncio.Lock] = None
+        self._synced_at = 0.0
+        self._pruned_at = 0.0
+        self._opened = False
+
+        # Replication state: the tables copied, the primary's schema version
+        # they were read at and the last change log entry applied
+        self._tables: List[_Table] = []
+        self._schema_version: Optional[int] = None
+        self._cursor: Optional[int] = None
+
+        # Counters exposed through metrics()
+        self._replica_reads = 0
+        self._primary_reads = 0
+        self._writes = 0
+        self._syncs = 0
+        self._full_syncs = 0
+        self._rows_synced = 0
+        self._sync_errors = 0
+        self._last_sync_ms = 0.0
+
+    @property
+    def max_size(self) -> int:
+        return self.primary.max_size
+
+    @property
+    def closed(self) -> bool:
+        return self.primary.closed
+
+    async def open(self) -> "ReplicatedDatabase":
+        """Open both databases, take the first copy and start syncing. Idempotent."""
+        if self._opened:
+            return self
+        self._sync_lock = asyncio.Lock()
+        await self.primary.open()
+        await self.replica.open()
+        await self.sync()
+        if self.sync_interval > 0:
+            self._sync_task = asyncio.create_task(self._sync_loop())
+        self._opened = True
+        return self
+
+    async def close(self) -> None:
+        if self._sync_task is not None:
+            self._sync_task.cancel()
+            try:
+                await self._sync_task
+            except (asyncio.CancelledError, RuntimeError):
+                pass
+            self._sync_task = None
+        await self.replica.close()
+        await self.primary.close()
+
+    def _route(self, sql: str):
+        if not is_read_statement(sql):
+            self._writes += 1
+            _last_write.set(time.monotonic())
+            return self.primary
+        if _last_write.get() >= self._synced_at:
+            # This request wrote something the replica has not seen yet
+            self._primary_reads += 1
+            return self.primary
+        self._replica_reads += 1
+        return self.replica
+
+    async def execute(self, sql: str, args: Any = None) -> ResultSet:
+        return await self._route(sql).execute(sql, args)
+
+    async def batch(self, statements: List[Any]) -> List[ResultSet]:
+        self._writes += 1
+        _last_write.set(time.monotonic())
+        return await self.primary.batch(statements)
+
+    async def fetch_all(self, sql: str, args: Any = None, mapper: Optional[RowMapper] = None) -> List[Record]:
+        result = await self.execute(sql, args)
+        return (mapper or default_mapper).all(result, sql)
+
+    async def fetch_one(self, sql: str, args: Any = None, mapper: Optional[RowMapper] = None) -> Optional[Record]:
+        result = await self.execute(sql, args)
+        return (mapper or default_mapper).one(result, sql)
+
+    def unit_of_work(self) -> UnitOfWork:
+        return UnitOfWork(self)
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            **self.primary.metrics(),
+            "replica": {
+                "path": self.replica_path,
+                "replica_reads": self._replica_reads,
+                "primary_reads": self._primary_reads,
+                "writes": self._writes,
+                "syncs": self._syncs,
+                "full_syncs": self._full_syncs,
+                "rows_synced": self._rows_synced,
+                "sync_errors": self._sync_errors,
+                "last_sync_ms": self._last_sync_ms,
+                "lag_seconds": round(time.monotonic() - self._synced_at, 3) if self._synced_at else None,
+            },
+        }
+
+    async def sync(self) -> None:
+        """Bring the replica up to date with the primary, incrementally when possible."""
+        async with self._sync_lock:
+            started = time.monotonic()
+            if self._cursor is None or not await self._sync_changes():
+                await self._sync_full()
+            self._synced_at = started
+            self._syncs += 1
+            self._last_sync_ms = round((time.monotonic() - started) * 1000, 3)
+            logger.debug(f"Replica synced in {self._last_sync_ms}ms")
+
+            if started - self._pruned_at >= self.change_retention / 4:
+                await self.primary.execute(
+                    f"DELETE FROM {CHANGES_TABLE} WHERE changed_at < ?",
+                    [int(time.time() - self.change_retention)]
+                )
+                self._pruned_at = started
+
+    async def _sync_changes(self) -> bool:
+        """Copy the rows changed since the cursor; False if a full copy is needed."""
+        head = (await self.primary.execute(_HEAD_SQL)).rows[0]
+        if head[0] != self._schema_version:
+            return False
+        if (head[1] or 0) == self._cursor:
+            return True
+
+        # The rows are read in one batch, at the same log position as its head
+        results = await self.primary.batch(
+            [Statement(_HEAD_SQL), Statement(f"SELECT DISTINCT table_name, row_key FROM {CHANGES_TABLE} WHERE seq > ?", [self._cursor])]
+            + [Statement(table.select_changed(), [table.name, self._cursor]) for table in self._tables]
+        )
+        schema_version, last_seq, oldest_seq = results[0].rows[0]
+        if schema_version != self._schema_version:
+            return False
+        if oldest_seq is None or oldest_seq > self._cursor + 1:
+            # Entries past the cursor were pruned before this replica saw them
+            return False
+
+        tables = {table.name: table for table in self._tables}
+        changed: Dict[str, List[Tuple[Any, ...]]] = {}
+        for table_name, row_key in results[1].rows:
+            if table_name in tables:
+                changed.setdefault(table_name, []).append(tuple(json.loads(row_key)))
+        rows = {table.name: result.rows for table, result in zip(self._tables, results[2:])}
+
+        def apply(conn: sqlite3.Connection) -> None:
+            for table_name, keys in changed.items():
+                table = tables[table_name]
+                conn.executemany(table.delete(), keys)
+                conn.executemany(table.insert(), [row.astuple() for row in rows[table_name]])
+
+        await self.replica.run_in_transaction(apply)
+        self._cursor = last_seq
+        self._rows_synced = sum(len(keys) for keys in changed.values())
+        return True
+
+    async def _sync_full(self) -> None:
+        """Replace the replica's contents with a consistent copy of the primary."""
+        self._tables, self._schema_version = await self._install_triggers()
+        # Everything is read in one batch so the copy and its cursor agree
+        results = await self.primary.batch(
+            [_HEAD_SQL, _SCHEMA_SQL] + [table.select() for table in self._tables]
+        )
+        last_seq = results[0].rows[0][1] or 0
+        schema = [row[0] for row in results[1].rows]
+        data = {table.name: result for table, result in zip(self._tables, results[2:])}
+        tables = {table.name: table for table in self._tables}
+
+        def apply(conn: sqlite3.Connection) -> None:
+            existing = conn.execute(
+                "SELECT type, name FROM sqlite_master WHERE type IN ('table', 'view') AND name NOT LIKE 'sqlite_%'"
+            ).fetchall()
+            for kind, name in existing:
+                conn.execute(f'DROP {kind.upper()} IF EXISTS "{name}"')
+            for stmt in schema:
+                conn.execute(stmt)
+            for name, result in data.items():
+                if result.rows:
+                    conn.executemany(tables[name].insert(), [row.astuple() for row in result.rows])
+
+        await self.replica.run_in_transaction(apply)
+        self._cursor = last_seq
+        self._full_syncs += 1
+        self._rows_synced = sum(len(result.rows) for result in data.values())
+
+    async def _install_triggers(self) -> Tuple[List[_Table], int]:
+        """Create the change log and its triggers on the primary (idempotent).
+
+        Returns the replicated tables and the schema version they were read at.
+        """
+        for stmt in _CHANGES_SCHEMA:
+            await self.primary.execute(stmt)
+        columns = await self.primary.execute(_TABLE_COLUMNS_SQL)
+        by_table: Dict[str, Tuple[List[str], List[Tuple[int, str]]]] = {}
+        for table_name, column_name, pk in columns.rows:
+            table_columns, keys = by_table.setdefault(table_name, ([], []))
+            table_columns.append(column_name)
+            if pk:
+                keys.append((pk, column_name))
+        tables = [
+            _Table(name, table_columns, [column for _, column in sorted(keys)])
+            for name, (table_columns, keys) in by_table.items()
+        ]
+        if tables:
+            await self.primary.batch([trigger for table in tables for trigger in table.triggers()])
+        schema_version = (await self.primary.execute(_HEAD_SQL)).rows[0][0]
+        return tables, schema_version
+
+    async def _sync_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            try:
+                await self.sync()
+            except Exception as e:
+                self._sync_errors += 1
+                logger.error(f"Replica sync failed: {str(e)}")
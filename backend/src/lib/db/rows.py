@@ -0,0 +1,177 @@
+import keyword
+import logging
+from collections import OrderedDict
+from operator import itemgetter
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# A serializer field is either a column name or a (column name, converter) pair
+FieldSpec = Union[str, Tuple[str, Callable[[Any], Any]]]
+
+
+class Record:
+    """Read-only view over one result row.
+
+    A record only holds a reference to the driver's value tuple; column and
+    field names are resolved through properties generated once per query
+    shape (see ``record_type``). Values can be read as attributes
+    (``row.user_id``), by name (``row["user_id"]``) or by index (``row[1]``).
+    """
+    __slots__ = ("_values",)
+
+    _fields: Tuple[str, ...] = ()
+    _keys: Tuple[str, ...] = ()
+    _getters: Dict[str, Callable[[Tuple[Any, ...]], Any]] = {}
+
+    def __init__(self, values: Tuple[Any, ...]):
+        self._values = values
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            getter = self._getters.get(key)
+            if getter is None:
+                raise KeyError(key)
+            return getter(self._values)
+        return self._values[key]
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._values)
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, Record):
+            return self._values == other._values
+        return self._values == other
+
+    def __hash__(self) -> int:
+        return hash(self._values)
+
+    def __repr__(self) -> str:
+        items = ", ".join(f"{key}={self[key]!r}" for key in self._keys)
+        return f"{type(self).__name__}({items})"
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self) -> Tuple[str, ...]:
+        """Serialized field names, so that ``dict(record)`` works."""
+        return self._keys
+
+    def _asdict(self) -> Dict[str, Any]:
+        return {key: self[key] for key in self._keys}
+
+
+def _value_getter(index: int, convert: Optional[Callable[[Any], Any]] = None):
+    get = itemgetter(index)
+    if convert is None:
+        return get
+    return lambda values: convert(get(values))
+
+
+def _property(getter) -> property:
+    return property(lambda self: getter(self._values))
+
+
+_record_types: Dict[Tuple, type] = {}
+
+
+def record_type(columns: Tuple[str, ...], fields: Optional[Dict[str, FieldSpec]] = None) -> type:
+    """Get the record class for a result shape, creating it on first use.
+
+    ``fields`` maps serialized names to columns (optionally with a converter),
+    e.g. ``{"userId": "user_id", "lessonPlan": ("lesson_plan", json.loads)}``.
+    Fields whose column is not in the result are left out of the record.
+    """
+    key = (columns, tuple(fields.items()) if fields else None)
+    cls = _record_types.get(key)
+    if cls is not None:
+        return cls
+
+    index = {name: i for i, name in enumerate(columns)}
+    getters = {name: _value_getter(i) for name, i in index.items()}
+    keys = tuple(index)
+
+    # Serializer fields take precedence over raw columns of the same name
+    if fields:
+        keys = []
+        for name, spec in fields.items():
+            column, convert = spec if isinstance(spec, tuple) else (spec, None)
+            if column not in index:
+                continue
+            getters[name] = _value_getter(index[column], convert)
+            keys.append(name)
+        keys = tuple(keys)
+
+    namespace: Dict[str, Any] = {
+        "__slots__": (),
+        "_fields": columns,
+        "_keys": keys,
+        "_getters": getters,
+    }
+    for name, getter in getters.items():
+        # Names that clash with Record methods stay reachable as row["name"]
+        if name.isidentifier() and not keyword.iskeyword(name) and not hasattr(Record, name):
+            namespace[name] = _property(getter)
+
+    cls = type("Record", (Record,), namespace)
+    _record_types[key] = cls
+    return cls
+
+
+def _row_values(row) -> Tuple[Any, ...]:
+    # libsql rows wrap a value tuple; plain tuples are used as-is
+    return row.astuple() if hasattr(row, "astuple") else tuple(row)
+
+
+class RowMapper:
+    """Maps result sets to records, caching the record class per SQL statement.
+
+    The cached class is reused as long as the statement keeps returning the
+    same columns; if the columns change (e.g. a ``SELECT *`` after a schema
+    change) a new class is derived from the result's column metadata.
+    """
+
+    def __init__(self, fields: Optional[Dict[str, FieldSpec]] = None, cache_size: int = 256):
+        self.fields = fields
+        self.cache_size = cache_size
+        self._by_sql: "OrderedDict[str, Tuple[Tuple[str, ...], type]]" = OrderedDict()
+
+    def _record_type(self, columns: Tuple[str, ...], sql: Optional[str]) -> type:
+        if sql is None:
+            return record_type(columns, self.fields)
+
+        cached = self._by_sql.get(sql)
+        if cached is not None and cached[0] == columns:
+            self._by_sql.move_to_end(sql)
+            return cached[1]
+
+        cls = record_type(columns, self.fields)
+        self._by_sql[sql] = (columns, cls)
+        if len(self._by_sql) > self.cache_size:
+            self._by_sql.popitem(last=False)
+        return cls
+
+    def all(self, result, sql: Optional[str] = None) -> List[Record]:
+        """Map every row of a result set."""
+        if not result.rows:
+            return []
+        cls = self._record_type(tuple(result.columns), sql)
+        return [cls(_row_values(row)) for row in result.rows]
+
+    def one(self, result, sql: Optional[str] = None) -> Optional[Record]:
+        """Map the first row of a result set, or return None if it is empty."""
+        if not result.rows:
+            return None
+        cls = self._record_type(tuple(result.columns), sql)
+        return cls(_row_values(result.rows[0]))
+
+
+# Mapper for plain column records, used when no serializer fields are given
+default_mapper = RowMapper()
@@ -60,6 +60,47 @@ CREATE INDEX IF NOT EXISTS idx_user_progress_user_id ON user_progress(user_id);
 CREATE INDEX IF NOT EXISTS idx_user_progress_topic_id ON user_progress(topic_id);
 CREATE INDEX IF NOT EXISTS idx_user_progress_question_id ON user_progress(question_id);
 
+-- Answer counters per user and topic, maintained with every recorded answer
+-- (recompute with `python -m src.lib.progress.stats`)
+CREATE TABLE IF NOT EXISTS topic_progress_stats (
+    user_id TEXT NOT NULL,
+    topic_id TEXT NOT NULL,
+    correct_answers INTEGER NOT NULL DEFAULT 0,
+    incorrect_answers INTEGER NOT NULL DEFAULT 0,
+    correct_questions INTEGER NOT NULL DEFAULT 0, -- distinct questions answered correctly
+    first_answer_at INTEGER,
+    last_answer_at INTEGER,
+    PRIMARY KEY (user_id, topic_id)
+) WITHOUT ROWID;
+
+-- Question count per topic, maintained by the question create/delete batches
+-- (recompute with `python -m src.lib.progress.stats`); topics without a row have none
+CREATE TABLE IF NOT EXISTS topic_question_counts (
+    topic_id TEXT PRIMARY KEY,
+    questions INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+-- Fills in the counts of topics that predate the table
+INSERT OR IGNORE INTO topic_question_counts (topic_id, questions)
+SELECT topic_id, COUNT(*) FROM questions GROUP BY topic_id;
+
+-- Spaced-repetition state per user and question (SM-2), maintained with every
+-- recorded answer (recompute with `python -m src.lib.progress.stats`)
+CREATE TABLE IF NOT EXISTS review_schedule (
+    user_id TEXT NOT NULL,
+    question_id TEXT NOT NULL,
+    topic_id TEXT NOT NULL,
+    repetitions INTEGER NOT NULL DEFAULT 0, -- correct answers in a row
+    interval_days REAL NOT NULL DEFAULT 0,
+    ease REAL NOT NULL DEFAULT 2.5,
+    lapses INTEGER NOT NULL DEFAULT 0,
+    due_at INTEGER NOT NULL,
+    last_answer_at INTEGER NOT NULL,
+    PRIMARY KEY (user_id, question_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_review_schedule_due ON review_schedule(user_id, due_at);
+-- Covers the sampling exclusions (questions mastered or answered recently in a topic)
+CREATE INDEX IF NOT EXISTS idx_review_schedule_topic ON review_schedule(user_id, topic_id, last_answer_at, repetitions);
+
 -- Sessions table
 CREATE TABLE IF NOT EXISTS sessions (
     id TEXT PRIMARY KEY,
@@ -69,4 +110,35 @@ CREATE TABLE IF NOT EXISTS sessions (
     FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
 );
 CREATE INDEX IF NOT EXISTS idx_sessions_user_id ON sessions(user_id);
-CREATE INDEX IF NOT EXISTS idx_sessions_expires_at ON sessions(expires_at);
\ No newline at end of file
+CREATE INDEX IF NOT EXISTS idx_sessions_expires_at ON sessions(expires_at);
+
+-- Logged-out sessions, polled by other workers to drop them from their session caches.
+-- Workers read past the last id they saw; AUTOINCREMENT keeps ids from being reused
+-- once pruning has emptied the table.
+CREATE TABLE IF NOT EXISTS session_invalidation_events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    invalidated_at INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_session_invalidation_events_invalidated_at ON session_invalidation_events(invalidated_at);
+
+-- Refresh tokens; a family is the chain of rotations of one session's token
+CREATE TABLE IF NOT EXISTS refresh_tokens (
+    id TEXT PRIMARY KEY,
+    family_id TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    issued_at INTEGER NOT NULL,
+    expires_at INTEGER NOT NULL,
+    replaced_by TEXT DEFAULT NULL,
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+);
+CREATE INDEX IF NOT EXISTS idx_refresh_tokens_family_id ON refresh_tokens(family_id);
+CREATE INDEX IF NOT EXISTS idx_refresh_tokens_expires_at ON refresh_tokens(expires_at);
+
+-- Revoked token families, mirrored in each worker's revocation Bloom filter
+CREATE TABLE IF NOT EXISTS revoked_tokens (
+    id TEXT PRIMARY KEY,
+    revoked_at INTEGER NOT NULL,
+    expires_at INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_revoked_tokens_expires_at ON revoked_tokens(expires_at);
@@ -0,0 +1,288 @@
+import asyncio
+import logging
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from urllib.parse import quote
+
+from libsql_client import LibsqlError, ResultSet, Row, Statement
+from .rows import Record, RowMapper, default_mapper
+from .stats import query_stats
+from .statements import is_read_statement
+from .unit_of_work import UnitOfWork
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+def _to_sql_value(value: Any) -> Any:
+    # Same conversions libsql_client applies before binding
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, datetime):
+        return int(value.timestamp() * 1000)
+    if isinstance(value, (str, int, float, bytes)) or value is None:
+        return value
+    return bytes(memoryview(value))
+
+
+def _to_sql_args(args: Any) -> Any:
+    if args is None:
+        return ()
+    if isinstance(args, dict):
+        return {key.lstrip(":$@"): _to_sql_value(value) for key, value in args.items()}
+    return [_to_sql_value(value) for value in args]
+
+
+def _run(conn: sqlite3.Connection, sql: str, args: Any = None) -> ResultSet:
+    """Run one statement and build a libsql-compatible result set."""
+    try:
+        cursor = conn.execute(sql, _to_sql_args(args))
+    except sqlite3.Error as e:
+        raise LibsqlError(str(e), getattr(e, "sqlite_errorname", "SQLITE")) from e
+    try:
+        rows = cursor.fetchall()
+        columns = tuple(desc[0] for desc in cursor.description or ())
+        index = {column: i for i, column in enumerate(columns)}
+        return ResultSet(columns, [Row(index, row) for row in rows], cursor.rowcount, cursor.lastrowid)
+    except sqlite3.Error as e:
+        raise LibsqlError(str(e), getattr(e, "sqlite_errorname", "SQLITE")) from e
+    finally:
+        cursor.close()
+
+
+class SqliteDatabase:
+    """Native sqlite3 backend with the same interface as ``DatabasePool``.
+
+    Used for ``file:`` database URLs instead of going through libsql_client.
+    The database runs in WAL mode so readers never block the writer: reads
+    run on read-only connections (one per reader thread, at most
+    ``readers``) and every write goes through a single writer connection,
+    which serializes writes without ``SQLITE_BUSY`` retries. Each connection
+    keeps an LRU of ``statement_cache`` prepared statements.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        readers: int = 4,
+        statement_cache: int = 128,
+        busy_timeout: float = 5.0,
+        on_open: Optional[Callable[["SqliteDatabase"], Awaitable[None]]] = None,
+    ):
+        if readers < 1:
+            raise ValueError("readers must be at least 1")
+
+        self.path = path
+        self.url = f"file:{path}"
+        self.readers = readers
+        self.max_size = readers + 1
+        self.statement_cache = statement_cache
+        self.busy_timeout = busy_timeout
+        self._on_open = on_open
+
+        self._writer: Optional[sqlite3.Connection] = None
+        self._writer_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite-writer")
+        self._reader_executor = ThreadPoolExecutor(max_workers=readers, thread_name_prefix="sqlite-reader")
+        self._local = threading.local()
+        self._reader_conns: List[sqlite3.Connection] = []
+        self._conns_lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._open_lock: Optional[asyncio.Lock] = None
+        self._opened = False
+        self._closed = False
+
+        # Counters exposed through metrics()
+        self._reads = 0
+        self._writes = 0
+        self._batches = 0
+        self._write_wait_total = 0.0
+        self._write_wait_max = 0.0
+
+    async def open(self) -> "SqliteDatabase":
+        """Open the writer connection and run the ``on_open`` hook. Idempotent."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._open_lock = asyncio.Lock()
+        async with self._open_lock:
+            if self._opened:
+                return self
+            self._check_open()
+            logger.info(f"Opening SQLite database {self.path} (readers={self.readers})")
+            await self._on_writer(self._connect_writer)
+            self._opened = True
+            if self._on_open is not None:
+                await self._on_open(self)
+            logger.info("SQLite database opened")
+        return self
+
+    async def close(self) -> None:
+        """Wait for running statements, then close every connection."""
+        if self._closed:
+            return
+        self._closed = True
+        await asyncio.to_thread(self._writer_executor.shutdown)
+        await asyncio.to_thread(self._reader_executor.shutdown)
+
+        with self._conns_lock:
+            conns, self._reader_conns = self._reader_conns, []
+        if self._writer is not None:
+            conns.append(self._writer)
+            self._writer = None
+        for conn in conns:
+            try:
+                conn.close()
+            except sqlite3.Error as e:
+                logger.debug(f"Error closing SQLite connection: {str(e)}")
+        logger.info("SQLite database closed")
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    async def execute(self, sql: str, args: Any = None) -> ResultSet:
+        """Execute a statement; reads use a reader connection, writes the writer."""
+        self._check_open()
+        started = time.perf_counter()
+        try:
+            if is_read_statement(sql):
+                if self._writer is None:
+                    # The writer creates the file and switches it to WAL mode
+                    await self._on_writer(self._connect_writer)
+                self._reads += 1
+                loop = asyncio.get_running_loop()
+                result = await loop.run_in_executor(self._reader_executor, self._read, sql, args)
+            else:
+                self._writes += 1
+                result = await self._on_writer(self._write, sql, args)
+        except Exception:
+            query_stats.record(self, sql, time.perf_counter() - started, args=args, error=True)
+            raise
+        query_stats.record(self, sql, time.perf_counter() - started, result, args)
+        return result
+
+    async def fetch_all(self, sql: str, args: Any = None, mapper: Optional[RowMapper] = None) -> List[Record]:
+        """Execute a query and map its rows to records."""
+        result = await self.execute(sql, args)
+        return (mapper or default_mapper).all(result, sql)
+
+    async def fetch_one(self, sql: str, args: Any = None, mapper: Optional[RowMapper] = None) -> Optional[Record]:
+        """Execute a query and map its first row to a record, if any."""
+        result = await self.execute(sql, args)
+        return (mapper or default_mapper).one(result, sql)
+
+    async def batch(self, statements: List[Any]) -> List[ResultSet]:
+        """Execute statements in one transaction on the writer connection."""
+        self._check_open()
+        self._batches += 1
+        statements = [Statement.convert(stmt) for stmt in statements]
+        started = time.perf_counter()
+        try:
+            results = await self._on_writer(self._batch, statements)
+        except Exception:
+            query_stats.record_batch(statements, time.perf_counter() - started, error=True)
+            raise
+        query_stats.record_batch(statements, time.perf_counter() - started, results)
+        return results
+
+    async def run_in_transaction(self, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+        """Run ``fn(conn)`` in one write transaction on the writer thread.
+
+        For bulk loads that want the raw connection (``executemany``); the
+        statements are not recorded in the query stats.
+        """
+        self._check_open()
+        return await self._on_writer(self._transaction, fn)
+
+    def unit_of_work(self) -> UnitOfWork:
+        """Start a unit of work whose statements are committed as one batch."""
+        return UnitOfWork(self)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Return a snapshot of connection and statement counters."""
+        return {
+            "backend": "sqlite",
+            "size": len(self._reader_conns) + (self._writer is not None),
+            "max_size": self.max_size,
+            "readers": len(self._reader_conns),
+            "max_readers": self.readers,
+            "reads": self._reads,
+            "writes": self._writes,
+            "batches": self._batches,
+            "statement_cache": self.statement_cache,
+            "write_wait_avg_ms": round(self._write_wait_total / (self._writes + self._batches) * 1000, 3)
+            if self._writes + self._batches else 0.0,
+            "write_wait_max_ms": round(self._write_wait_max * 1000, 3),
+        }
+
+    def _check_open(self) -> None:
+        if self._closed:
+            raise LibsqlError("The database was closed", "POOL_CLOSED")
+
+    async def _on_writer(self, fn, *args):
+        """Run ``fn`` on the writer thread, recording how long it queued."""
+        submitted = time.monotonic()
+
+        def run():
+            waited = time.monotonic() - submitted
+            self._write_wait_total += waited
+            self._write_wait_max = max(self._write_wait_max, waited)
+            return fn(*args)
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._writer_executor, run)
+
+    def _connect(self, uri: str) -> sqlite3.Connection:
+        return sqlite3.connect(
+            uri,
+            uri=True,
+            isolation_level=None,
+            check_same_thread=False,
+            timeout=self.busy_timeout,
+            cached_statements=self.statement_cache,
+        )
+
+    def _connect_writer(self) -> None:
+        if self._writer is not None:
+            return
+        conn = self._connect(f"file:{quote(self.path)}")
+        conn.execute("PRAGMA journal_mode = WAL")
+        # WAL makes NORMAL durable across application crashes
+        conn.execute("PRAGMA synchronous = NORMAL")
+        self._writer = conn
+
+    def _reader(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect(f"file:{quote(self.path)}?mode=ro")
+            self._local.conn = conn
+            with self._conns_lock:
+                self._reader_conns.append(conn)
+        return conn
+
+    def _read(self, sql: str, args: Any) -> ResultSet:
+        return _run(self._reader(), sql, args)
+
+    def _write(self, sql: str, args: Any) -> ResultSet:
+        self._connect_writer()
+        return _run(self._writer, sql, args)
+
+    def _batch(self, statements: List[Statement]) -> List[ResultSet]:
+        return self._transaction(lambda conn: [_run(conn, stmt.sql, stmt.args) for stmt in statements])
+
+    def _transaction(self, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+        self._connect_writer()
+        conn = self._writer
+        _run(conn, "BEGIN IMMEDIATE")
+        try:
+            result = fn(conn)
+            _run(conn, "COMMIT")
+            return result
+        except BaseException:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
@@ -0,0 +1,79 @@
+import re
+from typing import Iterator, Optional
+from urllib.parse import urlparse
+
+_READ_PREFIX = re.compile(r"^\s*(?:--[^\n]*\n\s*)*(SELECT|EXPLAIN|WITH)\b", re.IGNORECASE)
+_WRITE_KEYWORD = re.compile(r"\b(INSERT|UPDATE|DELETE|REPLACE)\b", re.IGNORECASE)
+
+# Tokens the statement splitter has to look at; everything else is skipped by the regex engine
+_TOKENS = re.compile(r"""
+      (?P<literal>'(?:[^']|'')*'|"(?:[^"]|"")*"|`[^`]*`|\[[^\]]*\])
+    | (?P<comment>--[^\n]*|/\*.*?(?:\*/|\Z))
+    | (?P<end>;)
+    | (?P<block>\b(?:BEGIN|CASE|END)\b)
+""", re.IGNORECASE | re.VERBOSE | re.DOTALL)
+_CREATE_TRIGGER = re.compile(
+    r"(?:\s|--[^\n]*|/\*.*?\*/)*CREATE\s+(?:TEMP(?:ORARY)?\s+)?TRIGGER\b",
+    re.IGNORECASE | re.DOTALL
+)
+
+
+def is_read_statement(sql: str) -> bool:
+    """Return True if the statement only reads and may run on a read-only connection."""
+    match = _READ_PREFIX.match(sql)
+    if not match:
+        return False
+    if match.group(1).upper() == "WITH":
+        return not _WRITE_KEYWORD.search(sql)
+    return True
+
+
+def sqlite_path(url: str) -> Optional[str]:
+    """Return the file path of a ``file:`` database URL, or None for remote URLs."""
+    parsed = urlparse(url)
+    return parsed.path if parsed.scheme == "file" else None
+
+
+def split_statements(sql: str) -> Iterator[str]:
+    """Yield the statements of a SQL script one at a time.
+
+    Semicolons inside string literals, quoted identifiers, comments and
+    ``CREATE TRIGGER ... BEGIN ... END`` bodies do not end a statement.
+    Chunks that only contain comments are skipped.
+    """
+    start = 0
+    pos = 0
+    has_code = False
+    depth = 0
+    trigger = None
+
+    for match in _TOKENS.finditer(sql):
+        if not has_code and sql[pos:match.start()].strip():
+            has_code = True
+        pos = match.end()
+        kind = match.lastgroup
+
+        if kind == "comment":
+            continue
+        if kind == "block":
+            has_code = True
+            if trigger is None:
+                trigger = bool(_CREATE_TRIGGER.match(sql, start))
+            if trigger:
+                depth += -1 if match.group().upper() == "END" else 1
+            continue
+        if kind == "literal":
+            has_code = True
+            continue
+
+        # Statement terminator
+        if depth > 0:
+            continue
+        if has_code:
+            yield sql[start:match.start()].strip()
+        start = pos
+        has_code = False
+        trigger = None
+
+    if has_code or sql[pos:].strip():
+        yield sql[start:].strip()
@@ -0,0 +1,252 @@
+import os
+import re
+import time
+import random
+import asyncio
+import bisect
+import logging
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open-ended
+BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b|\bx'[0-9a-fA-F]*'")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+_EXPLAINABLE = re.compile(r"^\s*(SELECT|INSERT|UPDATE|DELETE|REPLACE|WITH)\b", re.IGNORECASE)
+
+# Set while the stats collector runs its own EXPLAIN queries, so they are not recorded
+_explaining: contextvars.ContextVar[bool] = contextvars.ContextVar("db_stats_explaining", default=False)
+
+
+class QueryCounter:
+    """Round trips made while the counter is active (see ``count_queries``)."""
+
+    def __init__(self):
+        self.queries = 0
+        self.statements: List[str] = []
+
+    def add(self, statement: str) -> None:
+        self.queries += 1
+        self.statements.append(statement)
+
+
+_counter: contextvars.ContextVar[Optional[QueryCounter]] = contextvars.ContextVar("db_query_counter", default=None)
+
+
+@contextmanager
+def count_queries():
+    """Count the database round trips made in the current context.
+
+    Tasks started inside the block share the counter, so this also covers
+    everything a request handler awaits.
+    """
+    counter = QueryCounter()
+    token = _counter.set(counter)
+    try:
+        yield counter
+    finally:
+        _counter.reset(token)
+
+
+@lru_cache(maxsize=1024)
+def normalize_sql(sql: str) -> str:
+    """Reduce a statement to its shape: literals become ``?``, whitespace collapses."""
+    sql = _LITERALS.sub("?", sql)
+    sql = _PLACEHOLDER_LIST.sub("(?...)", sql)
+    return _WHITESPACE.sub(" ", sql).strip()
+
+
+def result_size(result) -> int:
+    """Approximate the payload size of a result set in bytes."""
+    size = 0
+    for row in result.rows:
+        for value in row.astuple():
+            if isinstance(value, (str, bytes)):
+                size += len(value)
+            elif value is not None:
+                size += 8
+    return size
+
+
+class Histogram:
+    """Latency histogram with fixed, roughly logarithmic buckets."""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def add(self, ms: float) -> None:
+        self.counts[bisect.bisect_left(BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def percentile(self, p: float) -> float:
+        """Upper bound of the bucket holding the p-th percentile (capped at the max)."""
+        if not self.count:
+            return 0.0
+        rank = p / 100 * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                bound = BUCKETS_MS[i] if i < len(BUCKETS_MS) else self.max_ms
+                return min(bound, self.max_ms)
+        return self.max_ms
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "p99_ms": self.percentile(99),
+            "max_ms": round(self.max_ms, 3),
+            "buckets": {
+                (f"le_{bound}" if i < len(BUCKETS_MS) else "inf"): count
+                for i, (bound, count) in enumerate(zip(BUCKETS_MS + (None,), self.counts))
+                if count
+            },
+        }
+
+
+class StatementStats:
+    """Aggregates for one normalized statement."""
+
+    def __init__(self, sql: str):
+        self.sql = sql
+        self.latency = Histogram()
+        self.errors = 0
+        self.batched = 0
+        self.rows = 0
+        self.bytes = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "sql": self.sql,
+            "calls": self.latency.count + self.batched,
+            "batched": self.batched,
+            "errors": self.errors,
+            "rows": self.rows,
+            "bytes": self.bytes,
+            "total_ms": round(self.latency.total_ms, 3),
+            "latency": self.latency.to_dict(),
+        }
+
+
+class QueryStats:
+    """Per-statement latency, row and byte counters plus a sampled slow-query log.
+
+    Backends call ``record()`` after every statement. Statements slower than
+    ``slow_ms`` are sampled (``sample_rate``) into a bounded slow-query log
+    together with their ``EXPLAIN QUERY PLAN`` output.
+    """
+
+    def __init__(self, enabled: bool = True, slow_ms: float = 100.0, sample_rate: float = 1.0, slow_log_size: int = 100):
+        self.enabled = enabled
+        self.slow_ms = slow_ms
+        self.sample_rate = sample_rate
+        self.statements: Dict[str, StatementStats] = {}
+        self.slow_queries: deque = deque(maxlen=slow_log_size)
+        self._pending_explains: set = set()
+
+    def _stats(self, sql: str) -> StatementStats:
+        key = normalize_sql(sql)
+        stats = self.statements.get(key)
+        if stats is None:
+            stats = self.statements[key] = StatementStats(key)
+        return stats
+
+    def record(self, db, sql: str, seconds: float, result=None, args: Any = None, error: bool = False) -> None:
+        """Record one executed statement."""
+        if _explaining.get():
+            return
+        counter = _counter.get()
+        if counter is not None:
+            counter.add(normalize_sql(sql))
+        if not self.enabled:
+            return
+        ms = seconds * 1000
+        stats = self._stats(sql)
+        stats.latency.add(ms)
+        if error:
+            stats.errors += 1
+        elif result is not None:
+            stats.rows += len(result.rows) or max(result.rows_affected, 0)
+            stats.bytes += result_size(result)
+
+        if ms >= self.slow_ms and random.random() < self.sample_rate:
+            entry = {
+                "sql": sql.strip(),
+                "normalized": stats.sql,
+                "duration_ms": round(ms, 3),
+                "rows": len(result.rows) if result is not None else None,
+                "error": error,
+                "at": int(time.time()),
+                "plan": None,
+            }
+            self.slow_queries.append(entry)
+            logger.warning(f"Slow query ({ms:.1f}ms): {stats.sql}")
+            if _EXPLAINABLE.match(sql):
+                task = asyncio.ensure_future(self._explain(db, entry, sql, args))
+                self._pending_explains.add(task)
+                task.add_done_callback(self._pending_explains.discard)
+
+    def record_batch(self, statements: List[Any], seconds: float, results: Optional[List[Any]] = None, error: bool = False) -> None:
+        """Record a batch: latency under ``BATCH``, rows and bytes per statement."""
+        if _explaining.get():
+            return
+        counter = _counter.get()
+        if counter is not None:
+            counter.add(f"BATCH ({len(statements)} statements)")
+        if not self.enabled:
+            return
+        self._stats("BATCH").latency.add(seconds * 1000)
+        for i, stmt in enumerate(statements):
+            stats = self._stats(getattr(stmt, "sql", stmt))
+            stats.batched += 1
+            if error:
+                stats.errors += 1
+            elif results is not None:
+                stats.rows += len(results[i].rows) or max(results[i].rows_affected, 0)
+                stats.bytes += result_size(results[i])
+
+    async def _explain(self, db, entry: Dict[str, Any], sql: str, args: Any) -> None:
+        _explaining.set(True)
+        try:
+            plan = await db.execute(f"EXPLAIN QUERY PLAN {sql}", args)
+            entry["plan"] = [row[-1] for row in plan.rows]
+        except Exception as e:
+            entry["plan"] = [f"unavailable: {str(e)}"]
+
+    def snapshot(self, limit: int = 50, order_by: str = "total_ms") -> Dict[str, Any]:
+        """Return the top statements and the slow-query log."""
+        statements = [stats.to_dict() for stats in self.statements.values()]
+        statements.sort(key=lambda s: s.get(order_by, s["total_ms"]), reverse=True)
+        return {
+            "slow_ms": self.slow_ms,
+            "statements": statements[:limit],
+            "slow_queries": list(self.slow_queries),
+        }
+
+    def reset(self) -> None:
+        self.statements.clear()
+        self.slow_queries.clear()
+
+
+# Process-wide collector used by every backend
+query_stats = QueryStats(
+    enabled=os.getenv("DB_QUERY_STATS", "true").lower() == "true",
+    slow_ms=float(os.getenv("DB_SLOW_QUERY_MS", "100")),
+    sample_rate=float(os.getenv("DB_SLOW_QUERY_SAMPLE_RATE", "1.0")),
+)
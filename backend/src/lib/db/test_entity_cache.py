@@ -0,0 +1,107 @@
+import time
+import pytest
+from src.lib import db as db_module
+from src.lib.db import initialize_db
+from src.lib.db.entity_cache import ENTRY_OVERHEAD, EntityCache, entity_cache
+from src.lib.db.sqlite import SqliteDatabase
+from src.lib.db.stats import count_queries
+from src.lib.questions.service import QuestionCreate, QuestionService
+from src.lib.topics.service import TopicService, TopicUpdate
+
+def test_evicts_least_recently_used_by_bytes():
+    """Entries are evicted oldest-first once their sizes exceed max_bytes."""
+    cache = EntityCache(max_bytes=3 * (ENTRY_OVERHEAD + 100))
+    for key in "abc":
+        assert cache.put(key, key.upper(), 1, 100)
+    assert cache.get("a") == "A"
+    cache.put("d", "D", 1, 100)
+
+    assert cache.get("b") is None
+    assert [cache.get(key) for key in "acd"] == ["A", "C", "D"]
+    assert cache.metrics()["evictions"] == 1
+    assert not cache.put("huge", "X", 1, 10 * (ENTRY_OVERHEAD + 100))
+
+def test_versions_refuse_stale_puts():
+    """A load older than the cached entry, or than an invalidation, is not cached."""
+    cache = EntityCache()
+    cache.put("t", "v2", 2, 10)
+    assert not cache.put("t", "v1", 1, 10)
+    assert cache.get("t") == "v2"
+
+    stamp = cache.stamp()
+    cache.invalidate("t", 3)
+    assert not cache.put("t", "v2", 2, 10)
+    assert not cache.put("t", "v3 read during the write's second", 3, 10, stamp)
+    assert cache.put("t", "v4", 4, 10)
+
+    cache.invalidate("t")
+    assert not cache.put("t", "v5", 5, 10)
+    assert cache.get("t") is None
+    assert cache.metrics()["stale_puts"] == 4
+
+def test_loads_after_an_invalidation_cache_its_version():
+    """A load started after the invalidation may cache the write's own version."""
+    cache = EntityCache()
+    cache.invalidate("t", 3)
+    stamp = cache.stamp()
+    assert cache.put("t", "v3", 3, 10, stamp)
+    assert cache.get("t") == "v3"
+
+def test_entries_expire():
+    """The ttl bounds how long an entry (or a tombstone) is honoured."""
+    cache = EntityCache(ttl=0)
+    cache.put("t", "v", 1, 10)
+    assert cache.get("t") is None
+    cache.invalidate("t")
+    assert cache.put("t", "v", 1, 10)
+
+@pytest.fixture
+async def db(tmp_path, monkeypatch):
+    """Get a database holding one topic with one question."""
+    database = SqliteDatabase(str(tmp_path / "entities.db"), on_open=initialize_db)
+    await database.open()
+    monkeypatch.setattr(db_module, "_db_pool", database)
+    entity_cache.clear()
+    now = int(time.time()) - 10
+    async with database.unit_of_work() as uow:
+        uow.add(
+            "INSERT INTO topics (id, user_id, title, lesson_plan, created_at, updated_at) VALUES ('t1', 'u1', 'T', ?, ?, ?)",
+            ['{"mainTopics": [], "currentTopic": "x", "completedTopics": []}', now, now]
+        )
+        uow.add("INSERT INTO questions (id, topic_id, text, options, correct_answer) VALUES ('q1', 't1', 'Q', '[\"a\", \"b\"]', 0)")
+        uow.add("INSERT INTO topic_question_counts (topic_id, questions) VALUES ('t1', 1)")
+    yield database
+    await database.close()
+
+@pytest.mark.asyncio
+async def test_hot_topics_are_served_from_memory(db):
+    """Repeat reads cost no round trip until the topic is written."""
+    await TopicService.get_topic_by_id("t1")
+    with count_queries() as counter:
+        topic = await TopicService.get_topic_by_id("t1")
+    assert counter.queries == 0
+    assert topic["lessonPlan"]["currentTopic"] == "x"
+
+    await TopicService.update_topic("t1", TopicUpdate(title="New"), "u1")
+    assert (await TopicService.get_topic_by_id("t1"))["title"] == "New"
+    with count_queries() as counter:
+        assert (await TopicService.get_topic_by_id("t1"))["title"] == "New"
+    assert counter.queries == 0
+
+    await TopicService.delete_topic("t1", "u1")
+    assert await TopicService.get_topic_by_id("t1") is None
+
+@pytest.mark.asyncio
+async def test_question_writes_invalidate_the_bank(db):
+    """Adding a question drops the cached list and the topic it versions."""
+    assert len(await QuestionService.get_topic_questions("t1", "u1")) == 1
+    with count_queries() as counter:
+        assert len(await QuestionService.get_topic_questions("t1", "u1")) == 1
+    assert counter.queries == 0
+
+    question = QuestionCreate(text="Q2", options=["a", "b"], correctAnswer=1, explanation="e")
+    await QuestionService.create_question("t1", question, "u1")
+    assert len(await QuestionService.get_topic_questions("t1", "u1")) == 2
+    with count_queries() as counter:
+        assert len(await QuestionService.get_topic_questions("t1", "u1")) == 2
+    assert counter.queries == 0
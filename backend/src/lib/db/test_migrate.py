@@ -0,0 +1,108 @@
+import os
+import sys
+import subprocess
+from pathlib import Path
+import pytest
+from src.lib.db.migrate import MigrationError, discover_migrations, migrate, plan
+from src.lib.db.sqlite import SqliteDatabase
+from src.lib.db.statements import split_statements
+
+@pytest.fixture
+async def db(tmp_path):
+    """Get an opened, empty SQLite database."""
+    database = SqliteDatabase(str(tmp_path / "migrate.db"))
+    await database.open()
+    yield database
+    await database.close()
+
+@pytest.fixture
+def migrations(tmp_path):
+    """Get a directory with two migrations."""
+    directory = tmp_path / "migrations"
+    directory.mkdir()
+    (directory / "001_items.sql").write_text("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT);")
+    (directory / "002_seed.sql").write_text("-- seed; rows\nINSERT INTO items (name) VALUES ('a;b');\nINSERT INTO items (name) VALUES ('c');\n")
+    return directory
+
+def test_split_statements_respects_quotes_comments_and_triggers():
+    """Only top-level semicolons end a statement."""
+    sql = """
+        -- leading; comment
+        INSERT INTO t VALUES ('a;''b', "c;d"); /* block; comment */
+        CREATE TRIGGER trg AFTER INSERT ON t BEGIN
+            UPDATE t SET x = CASE WHEN 1 THEN 2 END;
+        END;
+        -- trailing comment
+    """
+    statements = list(split_statements(sql))
+    assert len(statements) == 2
+    assert statements[0].endswith("""VALUES ('a;''b', "c;d")""")
+    assert statements[1].startswith("/* block; comment */")
+    assert statements[1].endswith("END")
+
+@pytest.mark.asyncio
+async def test_applies_pending_migrations_once(db, migrations):
+    """Applied migrations are recorded and not run again."""
+    applied = await migrate(db, migrations)
+    assert [m.version for m in applied] == ["001_items", "002_seed"]
+    assert db.metrics()["batches"] == 2  # one transaction per migration
+
+    assert await migrate(db, migrations) == []
+    rows = await db.fetch_all("SELECT name FROM items ORDER BY id")
+    assert [r.name for r in rows] == ["a;b", "c"]
+
+@pytest.mark.asyncio
+async def test_failed_migration_is_rolled_back(db, migrations):
+    """A failing migration leaves neither its changes nor a ledger entry."""
+    (migrations / "003_broken.sql").write_text("INSERT INTO items (name) VALUES ('x');\nINSERT INTO missing VALUES (1);")
+    with pytest.raises(MigrationError):
+        await migrate(db, migrations)
+
+    assert [m.version for m in await plan(db, migrations)] == ["003_broken"]
+    count = await db.execute("SELECT COUNT(*) FROM items WHERE name = 'x'")
+    assert count.rows[0][0] == 0
+
+@pytest.mark.asyncio
+async def test_edited_migration_is_rejected(db, migrations):
+    """Changing an applied migration fails the checksum check."""
+    await migrate(db, migrations)
+    (migrations / "001_items.sql").write_text("CREATE TABLE items (id INTEGER PRIMARY KEY);")
+    with pytest.raises(MigrationError, match="001_items was modified"):
+        await plan(db, migrations)
+
+@pytest.mark.asyncio
+async def test_dry_run_plan_and_baseline(db, migrations):
+    """Planning writes nothing; baseline records without running."""
+    assert [m.version for m in await plan(db, migrations)] == ["001_items", "002_seed"]
+    assert db.metrics()["writes"] + db.metrics()["batches"] == 0
+
+    await migrate(db, migrations, baseline=True)
+    assert await plan(db, migrations) == []
+    tables = await db.fetch_all("SELECT name FROM sqlite_master WHERE name = 'items'")
+    assert tables == []
+
+def test_repo_migrations_are_discovered():
+    """Both 004_ migrations get distinct versions."""
+    versions = [m.version for m in discover_migrations()]
+    assert "004_add_sessions" in versions and "004_user_progress" in versions
+
+def test_runs_as_a_module(tmp_path):
+    """``python -m src.lib.db.migrate`` plans and applies the repo's migrations."""
+    backend = Path(__file__).resolve().parents[3]
+    env = {**os.environ, "VITE_LIBSQL_DB_URL": f"file:{tmp_path / 'cli.db'}"}
+
+    def run(*args):
+        return subprocess.run(
+            [sys.executable, "-m", "src.lib.db.migrate", *args],
+            cwd=backend, env=env, capture_output=True, text=True, timeout=60,
+        )
+
+    dry_run = run("--dry-run")
+    assert dry_run.returncode == 0, dry_run.stderr
+    pending = len(discover_migrations())
+    assert f"{pending} pending migration(s)" in dry_run.stdout
+
+    baseline = run("--baseline")
+    assert baseline.returncode == 0, baseline.stderr
+    assert f"Recorded {pending} migration(s)" in baseline.stdout
+    assert "0 pending migration(s)" in run("--dry-run").stdout
@@ -0,0 +1,85 @@
+import pytest
+from src.lib.db.migrate import migrate, plan
+from src.lib.db.online import OnlineMigration
+from src.lib.db.sqlite import SqliteDatabase
+
+NEW_ITEMS = [
+    "CREATE TABLE items (id TEXT PRIMARY KEY, name TEXT NOT NULL, score INTEGER NOT NULL DEFAULT 0)",
+    "CREATE INDEX idx_items_name ON items(name)",
+]
+
+@pytest.fixture
+async def db(tmp_path):
+    """Get a SQLite database with 2500 items that still have a legacy column."""
+    database = SqliteDatabase(str(tmp_path / "online.db"))
+    await database.open()
+    async with database.unit_of_work() as uow:
+        uow.add("CREATE TABLE items (id TEXT PRIMARY KEY, name TEXT NOT NULL, legacy TEXT)")
+        uow.add("""
+            WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 2500)
+            INSERT INTO items (id, name, legacy) SELECT 'id' || i, 'item' || i, 'x' FROM n
+        """)
+    yield database
+    await database.close()
+
+async def columns(db):
+    rows = await db.fetch_all("SELECT name FROM pragma_table_info('items')")
+    return [r.name for r in rows]
+
+@pytest.mark.asyncio
+async def test_rebuild_copies_in_chunks(db):
+    """Rows are copied in bounded transactions and the table is swapped."""
+    migration = OnlineMigration(db, "010_items", NEW_ITEMS, chunk_size=1000, throttle=0)
+    assert await migration.run() == 2500
+    assert await columns(db) == ["id", "name", "score"]
+    assert db.metrics()["batches"] == 1 + 2 + 4 + 1  # fixture, prepare, 3 chunks + final empty one, swap
+
+    row = await db.fetch_one("SELECT name, score FROM items WHERE id = 'id2500'")
+    assert (row.name, row.score) == ("item2500", 0)
+    index = await db.fetch_one("SELECT name FROM sqlite_master WHERE name = 'idx_items_name'")
+    assert index is not None
+
+@pytest.mark.asyncio
+async def test_writes_during_backfill_are_mirrored(db):
+    """Inserts, updates and deletes made mid-copy end up in the new table."""
+    migration = OnlineMigration(db, "010_items", NEW_ITEMS, chunk_size=1000, throttle=0)
+    await migration.prepare()
+    await migration.copy_chunk()
+
+    await db.execute("UPDATE items SET name = 'renamed' WHERE id = 'id1'")      # already copied
+    await db.execute("UPDATE items SET name = 'later' WHERE id = 'id2000'")     # not copied yet
+    await db.execute("DELETE FROM items WHERE id = 'id2'")
+    await db.execute("INSERT INTO items (id, name) VALUES ('new', 'fresh')")
+
+    while await migration.copy_chunk():
+        pass
+    await migration.swap()
+
+    rows = {r.id: r.name for r in await db.fetch_all("SELECT id, name FROM items")}
+    assert len(rows) == 2500
+    assert rows["id1"] == "renamed" and rows["id2000"] == "later" and rows["new"] == "fresh"
+    assert "id2" not in rows
+
+@pytest.mark.asyncio
+async def test_interrupted_copy_resumes_from_checkpoint(db):
+    """A new run continues after the last checkpointed rowid."""
+    first = OnlineMigration(db, "010_items", NEW_ITEMS, chunk_size=1000, throttle=0)
+    await first.prepare()
+    await first.copy_chunk()
+
+    resumed = OnlineMigration(db, "010_items", NEW_ITEMS, chunk_size=1000, throttle=0)
+    await resumed.prepare()
+    assert (resumed.last_rowid, resumed.rows_copied) == (1000, 1000)
+    assert await resumed.run() == 2500
+
+@pytest.mark.asyncio
+async def test_online_migration_file_is_recorded(db, tmp_path):
+    """*.online.sql files are rebuilt online and recorded in the ledger."""
+    directory = tmp_path / "migrations"
+    directory.mkdir()
+    (directory / "010_items.online.sql").write_text(";\n".join(NEW_ITEMS) + ";\n")
+
+    applied = await migrate(db, directory, chunk_size=500, throttle=0)
+    assert [m.version for m in applied] == ["010_items"]
+    assert await plan(db, directory) == []
+    assert await columns(db) == ["id", "name", "score"]
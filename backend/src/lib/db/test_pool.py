@@ -0,0 +1,74 @@
+import asyncio
+import pytest
+from src.lib.db.pool import DatabasePool, PoolTimeoutError
+
+@pytest.fixture
+def db_url(tmp_path):
+    """Get a file URL for a throwaway SQLite database."""
+    return f"file:{tmp_path / 'pool.db'}"
+
+@pytest.mark.asyncio
+async def test_open_warms_up_min_size(db_url):
+    """Opening the pool creates and pings min_size clients."""
+    pool = DatabasePool(db_url, min_size=3, max_size=5, keepalive_interval=0)
+    await pool.open()
+    metrics = pool.metrics()
+    assert metrics["size"] == 3
+    assert metrics["idle"] == 3
+    assert metrics["in_use"] == 0
+    await pool.close()
+
+@pytest.mark.asyncio
+async def test_execute_reuses_clients(db_url):
+    """Sequential queries reuse the same idle client."""
+    pool = DatabasePool(db_url, min_size=1, max_size=5, keepalive_interval=0)
+    await pool.open()
+    await pool.execute("CREATE TABLE t (x INTEGER)")
+    await pool.execute("INSERT INTO t VALUES (?)", [1])
+    result = await pool.execute("SELECT x FROM t")
+    assert result.rows[0][0] == 1
+    assert pool.metrics()["created"] == 1
+    assert pool.metrics()["acquired"] == 3
+    await pool.close()
+
+@pytest.mark.asyncio
+async def test_acquire_timeout(db_url):
+    """Callers beyond max_size fail fast after the acquire timeout."""
+    pool = DatabasePool(db_url, min_size=0, max_size=1, acquire_timeout=0.05, keepalive_interval=0)
+    async with pool.acquire():
+        with pytest.raises(PoolTimeoutError):
+            async with pool.acquire():
+                pass
+    assert pool.metrics()["timeouts"] == 1
+    assert pool.metrics()["in_use"] == 0
+    await pool.close()
+
+@pytest.mark.asyncio
+async def test_concurrency_bounded_by_max_size(db_url):
+    """No more than max_size clients are ever checked out at once."""
+    pool = DatabasePool(db_url, min_size=0, max_size=2, keepalive_interval=0)
+    peak = 0
+
+    async def worker():
+        nonlocal peak
+        async with pool.acquire():
+            peak = max(peak, pool.metrics()["in_use"])
+            await asyncio.sleep(0.01)
+
+    await asyncio.gather(*[worker() for _ in range(8)])
+    assert peak == 2
+    assert pool.metrics()["size"] == 2
+    await pool.close()
+
+@pytest.mark.asyncio
+async def test_keepalive_replaces_broken_clients(db_url):
+    """Idle clients that fail the keep-alive ping are dropped and replaced."""
+    pool = DatabasePool(db_url, min_size=1, max_size=2, keepalive_interval=0.01)
+    await pool.open()
+    client, _ = pool._idle[0]
+    await client.close()
+    await asyncio.sleep(0.05)
+    metrics = pool.metrics()
+    assert metrics["discarded"] >= 1
+    assert metrics["size"] == 1
+    await pool.close()
@@ -0,0 +1,54 @@
+from fastapi import FastAPI, APIRouter
+from fastapi.testclient import TestClient
+from src.lib.db.profiling import QueryBudget, RequestProfiler
+from src.lib.db.stats import query_stats
+
+def make_app(queries_per_request):
+    """Get an app whose only route records a number of fake statements."""
+    router = APIRouter(prefix="/items")
+
+    @router.get("/{item_id}")
+    async def get_item(item_id: str):
+        for _ in range(queries_per_request):
+            query_stats.record(None, "SELECT * FROM items WHERE id = ?", 0.0)
+        return {"id": item_id}
+
+    app = FastAPI()
+    app.include_router(router, prefix="/api")
+    return app
+
+def test_queries_are_counted_per_route_template():
+    """Requests are grouped by route template and their round trips counted."""
+    profiler = RequestProfiler(make_app(1))
+    client = TestClient(profiler)
+    client.get("/api/items/a")
+    client.get("/api/items/b")
+
+    report = profiler.report()
+    assert report[("GET", "/api/items/{item_id}")]["requests"] == 2
+    assert report[("GET", "/api/items/{item_id}")]["max_queries"] == 1
+    assert profiler.violations({("GET", "/api/items/{item_id}"): QueryBudget(queries=1)}) == []
+
+def test_exceeding_the_budget_is_reported():
+    """An N+1 route fails its budget and names the statements."""
+    profiler = RequestProfiler(make_app(3))
+    TestClient(profiler).get("/api/items/a")
+
+    [violation] = profiler.violations({("GET", "/api/items/{item_id}"): QueryBudget(queries=1)})
+    assert "3 queries > budget 1" in violation
+    assert "SELECT * FROM items WHERE id = ?" in violation
+
+def test_routes_without_budget_are_reported():
+    """Every exercised route needs a declared budget."""
+    profiler = RequestProfiler(make_app(0))
+    TestClient(profiler).get("/api/items/a")
+    assert profiler.violations({}) == ["GET /api/items/{item_id}: no budget declared"]
+
+def test_latency_budgets_can_be_skipped():
+    """Round-trip budgets are always checked; wall-time budgets only on request."""
+    profiler = RequestProfiler(make_app(1))
+    TestClient(profiler).get("/api/items/a")
+    budgets = {("GET", "/api/items/{item_id}"): QueryBudget(queries=1, p95_ms=0)}
+    [violation] = profiler.violations(budgets)
+    assert "p95" in violation
+    assert profiler.violations(budgets, latency=False) == []
@@ -0,0 +1,107 @@
+import asyncio
+import pytest
+from src.lib.db.pool import DatabasePool
+from src.lib.db.replica import ReplicatedDatabase
+from src.lib.db.statements import is_read_statement
+
+@pytest.fixture
+async def db(tmp_path):
+    """Get a replicated database over two throwaway SQLite files."""
+    primary = DatabasePool(f"file:{tmp_path / 'primary.db'}", min_size=1, max_size=2, keepalive_interval=0)
+    await primary.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)")
+    await primary.execute("INSERT INTO items (name) VALUES ('seed')")
+    replicated = ReplicatedDatabase(primary, str(tmp_path / "replica.db"), sync_interval=0)
+    await replicated.open()
+    yield replicated
+    await replicated.close()
+
+def test_statement_classification():
+    """Only pure reads may be routed to the replica."""
+    assert is_read_statement("  select * from items")
+    assert is_read_statement("WITH t AS (SELECT 1) SELECT * FROM t")
+    assert not is_read_statement("WITH t AS (SELECT 1) DELETE FROM items")
+    assert not is_read_statement("UPDATE items SET name = 'x'")
+    assert not is_read_statement("INSERT INTO items (name) VALUES ('x') RETURNING id")
+
+@pytest.mark.asyncio
+async def test_reads_served_by_replica(db):
+    """Reads go to the replica file once it is synced."""
+    row = await db.fetch_one("SELECT name FROM items")
+    assert row.name == "seed"
+    assert db.metrics()["replica"]["replica_reads"] == 1
+
+@pytest.mark.asyncio
+async def test_read_your_writes(db):
+    """After a write, the same context reads from the primary until the next sync."""
+    await db.execute("INSERT INTO items (name) VALUES ('new')")
+    rows = await db.fetch_all("SELECT name FROM items ORDER BY id")
+    assert [r.name for r in rows] == ["seed", "new"]
+    assert db.metrics()["replica"]["primary_reads"] == 1
+
+    await db.sync()
+    rows = await db.fetch_all("SELECT name FROM items ORDER BY id")
+    assert [r.name for r in rows] == ["seed", "new"]
+    assert db.metrics()["replica"]["replica_reads"] == 1
+
+async def _replica_names(db):
+    rows = await db.replica.fetch_all("SELECT id, name FROM items ORDER BY id")
+    return [(r.id, r.name) for r in rows]
+
+@pytest.mark.asyncio
+async def test_sync_copies_only_changed_rows(db):
+    """Inserts, updates and deletes reach the replica without a full copy."""
+    for name in ("a", "b", "c"):
+        await db.primary.execute("INSERT INTO items (name) VALUES (?)", [name])
+    await db.sync()
+    assert db.metrics()["replica"]["rows_synced"] == 3
+
+    await db.primary.execute("UPDATE items SET name = 'seed2' WHERE id = 1")
+    await db.primary.execute("DELETE FROM items WHERE id = 3")
+    await db.sync()
+    assert await _replica_names(db) == [(1, "seed2"), (2, "a"), (4, "c")]
+    metrics = db.metrics()["replica"]
+    assert (metrics["full_syncs"], metrics["rows_synced"]) == (1, 2)
+
+    await db.sync()
+    assert db.metrics()["replica"]["syncs"] == 4
+
+@pytest.mark.asyncio
+async def test_schema_changes_and_pruned_logs_get_a_full_copy(db):
+    """A new table, or log entries pruned before the replica saw them, mean a full copy."""
+    await db.primary.execute("CREATE TABLE tags (name TEXT PRIMARY KEY) WITHOUT ROWID")
+    await db.primary.execute("INSERT INTO tags (name) VALUES ('x')")
+    await db.sync()
+    assert db.metrics()["replica"]["full_syncs"] == 2
+
+    await db.primary.execute("INSERT INTO tags (name) VALUES ('y')")
+    await db.sync()
+    assert [r.name for r in await db.replica.fetch_all("SELECT name FROM tags ORDER BY name")] == ["x", "y"]
+    assert db.metrics()["replica"]["full_syncs"] == 2
+
+    await db.primary.execute("DELETE FROM items")
+    await db.primary.execute("DELETE FROM replica_changes")
+    await db.sync()
+    assert await _replica_names(db) == []
+    assert db.metrics()["replica"]["full_syncs"] == 3
+
+@pytest.mark.asyncio
+async def test_replica_reads_do_not_block_the_event_loop(db):
+    """A slow replica read runs on a reader thread while the loop keeps going."""
+    ticks = 0
+
+    async def tick():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.001)
+
+    ticker = asyncio.create_task(tick())
+    try:
+        row = await db.fetch_one(
+            "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 2000000) SELECT COUNT(*) AS c FROM n"
+        )
+    finally:
+        ticker.cancel()
+    assert row.c == 2000000
+    assert db.metrics()["replica"]["replica_reads"] == 1
+    assert ticks > 5
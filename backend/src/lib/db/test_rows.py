@@ -0,0 +1,53 @@
+import json
+from libsql_client import ResultSet, Row
+from src.lib.db.rows import RowMapper, default_mapper
+
+def make_result(columns, rows):
+    """Build a libsql result set from plain tuples."""
+    index = {column: i for i, column in enumerate(columns)}
+    return ResultSet(tuple(columns), [Row(index, tuple(row)) for row in rows], 0, None)
+
+def test_records_expose_columns():
+    """Records can be read by attribute, name and index."""
+    result = make_result(["id", "email"], [("u1", "a@example.com")])
+    record = default_mapper.one(result)
+    assert record.id == "u1"
+    assert record["email"] == "a@example.com"
+    assert record[1] == "a@example.com"
+    assert dict(record) == {"id": "u1", "email": "a@example.com"}
+
+def test_records_share_value_tuple():
+    """A record is a view over the driver's values, not a copy."""
+    result = make_result(["id"], [("u1",)])
+    record = default_mapper.one(result)
+    assert record._values is result.rows[0].astuple()
+
+def test_serializer_fields_and_converters():
+    """Serializer fields rename columns and convert values on access."""
+    mapper = RowMapper({"userId": "user_id", "plan": ("plan", json.loads)})
+    result = make_result(["user_id", "plan"], [("u1", '{"a": 1}')])
+    record = mapper.one(result)
+    assert record.userId == "u1"
+    assert record["plan"] == {"a": 1}
+    assert dict(record) == {"userId": "u1", "plan": {"a": 1}}
+
+def test_record_type_cached_per_statement():
+    """The same statement reuses one record class for every row."""
+    sql = "SELECT id FROM users"
+    records = default_mapper.all(make_result(["id"], [("a",), ("b",)]), sql)
+    again = default_mapper.all(make_result(["id"], [("c",)]), sql)
+    assert type(records[0]) is type(records[1]) is type(again[0])
+
+def test_new_column_does_not_break_mapping():
+    """A statement whose columns change gets a fresh record class."""
+    sql = "SELECT * FROM users"
+    before = default_mapper.one(make_result(["id", "name"], [("a", "A")]), sql)
+    after = default_mapper.one(make_result(["id", "extra", "name"], [("a", 1, "A")]), sql)
+    assert before.name == after.name == "A"
+    assert after.extra == 1
+
+def test_empty_result():
+    """Empty results map to an empty list or None."""
+    result = make_result(["id"], [])
+    assert default_mapper.all(result) == []
+    assert default_mapper.one(result) is None
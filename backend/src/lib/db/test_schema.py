@@ -0,0 +1,44 @@
+import pytest
+from src.lib.db import initialize_db, load_schema
+from src.lib.db.sqlite import SqliteDatabase
+
+@pytest.fixture
+async def db(tmp_path):
+    """Get an opened, uninitialized SQLite database."""
+    database = SqliteDatabase(str(tmp_path / "schema.db"))
+    await database.open()
+    yield database
+    await database.close()
+
+@pytest.mark.asyncio
+async def test_first_run_applies_schema_and_records_fingerprint(db):
+    """A fresh database gets every table plus the schema fingerprint."""
+    await initialize_db(db)
+    tables = await db.fetch_all("SELECT name FROM sqlite_master WHERE type = 'table'")
+    assert {"users", "topics", "questions", "user_progress", "sessions", "schema_version"} <= {t.name for t in tables}
+    version = await db.fetch_one("SELECT fingerprint FROM schema_version")
+    assert version.fingerprint == load_schema()[1]
+    assert db.metrics()["batches"] == 1
+
+@pytest.mark.asyncio
+async def test_unchanged_schema_costs_one_query(db):
+    """With a matching fingerprint, initialization only reads schema_version."""
+    await initialize_db(db)
+    before = db.metrics()
+    await initialize_db(db)
+    after = db.metrics()
+    assert after["reads"] - before["reads"] == 1
+    assert (after["writes"], after["batches"]) == (before["writes"], before["batches"])
+
+@pytest.mark.asyncio
+async def test_test_user_is_opt_in(db, monkeypatch):
+    """The test user is only seeded when DB_SEED_TEST_USER is enabled."""
+    monkeypatch.delenv("DB_SEED_TEST_USER", raising=False)
+    await initialize_db(db)
+    assert await db.fetch_one("SELECT id FROM users") is None
+
+    monkeypatch.setenv("DB_SEED_TEST_USER", "true")
+    await initialize_db(db)
+    await initialize_db(db)
+    users = await db.fetch_all("SELECT email FROM users")
+    assert [u.email for u in users] == ["test@example.com"]
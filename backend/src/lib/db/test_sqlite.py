@@ -0,0 +1,65 @@
+import asyncio
+import pytest
+from libsql_client import LibsqlError
+from src.lib.db.sqlite import SqliteDatabase
+
+@pytest.fixture
+async def db(tmp_path):
+    """Get an opened native SQLite database on a throwaway file."""
+    database = SqliteDatabase(str(tmp_path / "native.db"), readers=2)
+    await database.open()
+    await database.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT UNIQUE NOT NULL)")
+    yield database
+    await database.close()
+
+@pytest.mark.asyncio
+async def test_wal_mode_and_result_contract(db):
+    """The file runs in WAL mode and results match the libsql contract."""
+    mode = await db.execute("PRAGMA journal_mode")
+    assert mode.rows[0][0] == "wal"
+
+    inserted = await db.execute("INSERT INTO items (name) VALUES (?)", ["a"])
+    assert inserted.rows_affected == 1
+    assert inserted.last_insert_rowid == 1
+
+    row = await db.fetch_one("SELECT id, name FROM items WHERE name = :name", {":name": "a"})
+    assert (row.id, row.name) == (1, "a")
+    assert db.metrics()["readers"] == 1
+
+@pytest.mark.asyncio
+async def test_reads_use_read_only_connections(db):
+    """Readers cannot write, so writes can only happen on the single writer."""
+    await db.execute("INSERT INTO items (name) VALUES ('a')")
+    with pytest.raises(LibsqlError):
+        db._reader_executor.submit(db._read, "DELETE FROM items", None).result()
+    rows = await db.fetch_all("SELECT name FROM items")
+    assert [r.name for r in rows] == ["a"]
+
+@pytest.mark.asyncio
+async def test_sqlite_errors_are_libsql_errors(db):
+    """Constraint violations surface as LibsqlError like the libsql backend."""
+    await db.execute("INSERT INTO items (name) VALUES ('dup')")
+    with pytest.raises(LibsqlError, match="UNIQUE constraint failed"):
+        await db.execute("INSERT INTO items (name) VALUES ('dup')")
+
+@pytest.mark.asyncio
+async def test_batch_is_atomic(db):
+    """A failing batch statement rolls back the whole batch."""
+    async with db.unit_of_work() as uow:
+        uow.add("INSERT INTO items (name) VALUES (?)", ["a"])
+    with pytest.raises(LibsqlError):
+        async with db.unit_of_work() as uow:
+            uow.add("INSERT INTO items (name) VALUES (?)", ["b"])
+            uow.add("INSERT INTO items (name) VALUES (?)", ["a"])
+
+    rows = await db.fetch_all("SELECT name FROM items ORDER BY name")
+    assert [r.name for r in rows] == ["a"]
+
+@pytest.mark.asyncio
+async def test_concurrent_writes_are_serialized(db):
+    """Concurrent writers queue on the writer connection instead of failing busy."""
+    await asyncio.gather(*[
+        db.execute("INSERT INTO items (name) VALUES (?)", [f"n{i}"]) for i in range(20)
+    ])
+    count = await db.execute("SELECT COUNT(*) FROM items")
+    assert count.rows[0][0] == 20
@@ -0,0 +1,65 @@
+import asyncio
+import pytest
+from src.lib.db.sqlite import SqliteDatabase
+from src.lib.db.stats import Histogram, normalize_sql, query_stats
+
+@pytest.fixture
+async def db(tmp_path):
+    """Get a SQLite database and a clean statistics collector."""
+    database = SqliteDatabase(str(tmp_path / "stats.db"))
+    await database.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)")
+    query_stats.reset()
+    yield database
+    await database.close()
+    query_stats.reset()
+
+def test_normalize_sql():
+    """Literals and placeholder lists collapse so equal shapes share a key."""
+    assert normalize_sql("SELECT *  FROM t\n WHERE id = 42 AND name = 'it''s'") == "SELECT * FROM t WHERE id = ? AND name = ?"
+    assert normalize_sql("SELECT * FROM t WHERE id IN (?, ?, ?)") == normalize_sql("SELECT * FROM t WHERE id IN (?,?)")
+
+def test_histogram_percentiles():
+    """Percentiles resolve to bucket bounds, capped at the observed max."""
+    histogram = Histogram()
+    for ms in [0.2] * 90 + [30] * 10:
+        histogram.add(ms)
+    assert histogram.percentile(50) == 0.25
+    assert histogram.percentile(95) == 30
+    assert histogram.to_dict()["count"] == 100
+
+@pytest.mark.asyncio
+async def test_statements_are_aggregated_by_shape(db):
+    """Calls, rows and bytes accumulate per normalized statement."""
+    for name in ["a", "bb"]:
+        await db.execute("INSERT INTO items (name) VALUES (?)", [name])
+    await db.fetch_all("SELECT name FROM items WHERE id > 0")
+    await db.fetch_all("SELECT name FROM items WHERE id > 1")
+
+    stats = {s["sql"]: s for s in query_stats.snapshot()["statements"]}
+    assert stats["INSERT INTO items (name) VALUES (?)"]["calls"] == 2
+    select = stats["SELECT name FROM items WHERE id > ?"]
+    assert (select["calls"], select["rows"], select["bytes"]) == (2, 3, 5)
+
+@pytest.mark.asyncio
+async def test_batches_count_statements_and_latency(db):
+    """A batch records its latency once and each statement as batched."""
+    async with db.unit_of_work() as uow:
+        uow.add("INSERT INTO items (name) VALUES (?)", ["a"])
+        uow.add("INSERT INTO items (name) VALUES (?)", ["b"])
+
+    stats = {s["sql"]: s for s in query_stats.snapshot()["statements"]}
+    assert stats["BATCH"]["latency"]["count"] == 1
+    assert stats["INSERT INTO items (name) VALUES (?)"]["batched"] == 2
+
+@pytest.mark.asyncio
+async def test_slow_queries_capture_query_plan(db, monkeypatch):
+    """Slow statements are logged with their EXPLAIN QUERY PLAN output."""
+    monkeypatch.setattr(query_stats, "slow_ms", 0)
+    await db.fetch_all("SELECT name FROM items WHERE id = ?", [1])
+    await asyncio.gather(*query_stats._pending_explains)
+
+    [entry] = query_stats.snapshot()["slow_queries"]
+    assert entry["normalized"] == "SELECT name FROM items WHERE id = ?"
+    assert any("items" in step for step in entry["plan"])
+    # The EXPLAIN itself is not recorded
+    assert not any(s["sql"].startswith("EXPLAIN") for s in query_stats.snapshot()["statements"])
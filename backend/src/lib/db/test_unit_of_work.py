@@ -0,0 +1,48 @@
+import pytest
+from libsql_client import LibsqlError
+from src.lib.db.pool import DatabasePool
+
+@pytest.fixture
+async def db(tmp_path):
+    """Get an opened pool on a throwaway SQLite database."""
+    pool = DatabasePool(f"file:{tmp_path / 'uow.db'}", min_size=1, max_size=2, keepalive_interval=0)
+    await pool.open()
+    await pool.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT UNIQUE NOT NULL)")
+    yield pool
+    await pool.close()
+
+@pytest.mark.asyncio
+async def test_commit_returns_per_statement_results(db):
+    """Each queued statement gets its own result set, in order."""
+    async with db.unit_of_work() as uow:
+        first = uow.add("INSERT INTO items (name) VALUES (?) RETURNING id", ["a"])
+        second = uow.add("INSERT INTO items (name) VALUES (?) RETURNING id", ["b"])
+        count = uow.add("SELECT COUNT(*) FROM items")
+
+    assert uow.results[first].rows[0][0] == 1
+    assert uow.results[second].rows[0][0] == 2
+    assert uow.results[count].rows[0][0] == 2
+    assert db.metrics()["acquired"] == 2  # CREATE TABLE + one batch
+
+@pytest.mark.asyncio
+async def test_failed_statement_rolls_back_batch(db):
+    """A failing statement leaves none of the batch applied."""
+    uow = db.unit_of_work()
+    uow.add("INSERT INTO items (name) VALUES (?)", ["dup"])
+    uow.add("INSERT INTO items (name) VALUES (?)", ["dup"])
+    with pytest.raises(LibsqlError):
+        await uow.commit()
+
+    result = await db.execute("SELECT COUNT(*) FROM items")
+    assert result.rows[0][0] == 0
+
+@pytest.mark.asyncio
+async def test_exception_in_block_discards_statements(db):
+    """Leaving the block with an exception sends nothing."""
+    with pytest.raises(ValueError):
+        async with db.unit_of_work() as uow:
+            uow.add("INSERT INTO items (name) VALUES (?)", ["x"])
+            raise ValueError("abort")
+
+    result = await db.execute("SELECT COUNT(*) FROM items")
+    assert result.rows[0][0] == 0
@@ -0,0 +1,61 @@
+import logging
+from typing import Any, List, Optional
+
+from libsql_client import ResultSet, Statement
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+class UnitOfWork:
+    """Collects statements and sends them to the database as one batch.
+
+    The batch runs inside a single transaction, so either every statement is
+    applied or none is, and it costs one network round trip regardless of the
+    number of statements. ``add()`` returns the index of the statement's
+    result in the list returned by ``commit()``.
+
+    Usage::
+
+        async with db.unit_of_work() as uow:
+            insert = uow.add("INSERT INTO ... RETURNING id", [...])
+            uow.add("DELETE FROM ...", [...])
+        row = uow.results[insert].rows[0]
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self._statements: List[Statement] = []
+        self.results: Optional[List[ResultSet]] = None
+
+    def add(self, sql: str, args: Any = None) -> int:
+        """Queue a statement and return the index of its result."""
+        if self.results is not None:
+            raise RuntimeError("Unit of work has already been committed")
+        self._statements.append(Statement(sql, args))
+        return len(self._statements) - 1
+
+    def __len__(self) -> int:
+        return len(self._statements)
+
+    async def commit(self) -> List[ResultSet]:
+        """Send all queued statements as one transactional batch."""
+        if self.results is not None:
+            return self.results
+        if not self._statements:
+            self.results = []
+            return self.results
+
+        logger.debug(f"Committing unit of work with {len(self._statements)} statements")
+        self.results = await self.db.batch(self._statements)
+        return self.results
+
+    async def __aenter__(self) -> "UnitOfWork":
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        # Statements were only queued, so discarding them is the rollback
+        if exc_type is None:
+            await self.commit()
+        else:
+            self._statements.clear()
@@ -0,0 +1,312 @@
+import os
+import json
+import time
+import fcntl
+import asyncio
+import logging
+import contextvars
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from src.lib.progress.stats import EVENT_FIELDS, record_statements
+
+logger = logging.getLogger(__name__)
+
+
+class JournalFull(Exception):
+    """Raised when too many journaled events are waiting to be flushed."""
+
+
+class JournalLocked(Exception):
+    """Raised when another process already owns the journal at this path."""
+
+
+class ProgressJournal:
+    """Write-behind buffer for recorded answers, backed by append-only files.
+
+    ``append()`` writes the event to the journal, waits until it is on disk
+    and returns; a background task flushes pending events to
+    ``user_progress`` in multi-row batches of up to ``batch_size``, one
+    transaction each. fsyncs are shared by every append waiting on one
+    (group commit).
+
+    The journal is a series of numbered segment files (``<path>.<n>``).
+    Appends go to the newest one, which is rotated once it holds
+    ``batch_size`` events; segments whose events have all been flushed are
+    deleted, so the files stay bounded by the backlog even when it never
+    drains. On start every segment left by a previous process is replayed,
+    which is safe because flushes skip events that are already stored, and
+    new appends go to a fresh segment.
+
+    A process holds an exclusive lock on ``<path>.lock`` while the journal
+    is open; a second one gets ``JournalLocked``. With ``max_pending``
+    events waiting, ``append()`` raises ``JournalFull`` so that callers shed
+    load instead of growing the backlog.
+    """
+
+    def __init__(
+        self,
+        db,
+        path: str,
+        batch_size: int = 500,
+        flush_interval: float = 0.05,
+        max_pending: int = 10000,
+        fsync: bool = True,
+    ):
+        self.db = db
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.fsync = fsync
+        # (segment number, event), oldest first
+        self._pending: Deque[Tuple[int, Dict[str, Any]]] = deque()
+        self._segments: List[int] = []
+        self._segment = 0
+        self._segment_events = 0
+        self._fd: Optional[int] = None
+        self._lock_fd: Optional[int] = None
+        self._written = 0
+        self._synced = 0
+        self._sync_lock = asyncio.Lock()
+        self._flush_lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.appended = 0
+        self.flushed = 0
+        self.batches = 0
+        self.rejected = 0
+        self.replayed = 0
+        self.last_flush_ms = 0.0
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    async def start(self) -> None:
+        """Lock the journal, replay what a previous process left, and start flushing."""
+        if self._task is not None:
+            return
+        self._lock_fd = os.open(f"{self.path}.lock", os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+            raise JournalLocked(f"{self.path} is in use by another process")
+        self._segments = self._existing_segments()
+        for number in self._segments:
+            self._pending.extend((number, event) for event in self._read(self._segment_path(number)))
+        self.replayed = len(self._pending)
+        if self.replayed:
+            logger.info(f"Replaying {self.replayed} journaled progress events")
+        # Never append behind a replayed segment's (possibly torn) tail
+        self._segment = self._segments[-1] + 1 if self._segments else 0
+        self._fd = self._create_segment(self._segment)
+        self._segments.append(self._segment)
+        self._task = asyncio.get_running_loop().create_task(self._loop(), context=contextvars.Context())
+
+    def _segment_path(self, number: int) -> str:
+        return f"{self.path}.{number}"
+
+    def _existing_segments(self) -> List[int]:
+        directory, name = os.path.split(os.path.abspath(self.path))
+        prefix = f"{name}."
+        return sorted(
+            int(entry[len(prefix):]) for entry in os.listdir(directory)
+            if entry.startswith(prefix) and entry[len(prefix):].isdigit()
+        )
+
+    def _create_segment(self, number: int) -> int:
+        fd = os.open(self._segment_path(number), os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o600)
+        if self.fsync:
+            # The new file's directory entry has to be durable too
+            directory = os.open(os.path.dirname(os.path.abspath(self.path)), os.O_RDONLY)
+            try:
+                os.fsync(directory)
+            finally:
+                os.close(directory)
+        return fd
+
+    def _read(self, path: str) -> List[Dict[str, Any]]:
+        events = []
+        with open(path, "r+b") as f:
+            data = f.read()
+            complete = data.rfind(b"\n") + 1
+            if complete < len(data):
+                # A torn write at the tail: the append was never acknowledged
+                logger.warning(f"Dropping a torn progress journal entry at the end of {path}")
+                f.truncate(complete)
+        for line in data[:complete].splitlines():
+            try:
+                events.append(dict(zip(EVENT_FIELDS, json.loads(line))))
+            except ValueError:
+                logger.warning("Skipping an unreadable progress journal entry")
+        return events
+
+    async def stop(self) -> None:
+        """Flush everything pending, then close the journal."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except (asyncio.CancelledError, RuntimeError):
+            pass
+        self._task = None
+        try:
+            while self._pending:
+                await self.flush()
+        except Exception as e:
+            logger.error(f"Could not flush progress journal on shutdown, will replay on start: {str(e)}")
+        os.close(self._fd)
+        self._fd = None
+        os.close(self._lock_fd)
+        self._lock_fd = None
+
+    async def append(self, event: Dict[str, Any]) -> None:
+        """Journal one event; returns once it is durable."""
+        if len(self._pending) >= self.max_pending:
+            self.rejected += 1
+            raise JournalFull(f"{len(self._pending)} progress events waiting to be written")
+        os.write(self._fd, json.dumps([event[field] for field in EVENT_FIELDS]).encode() + b"\n")
+        self._written += 1
+        self._segment_events += 1
+        self._pending.append((self._segment, event))
+        self.appended += 1
+        if len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+        if self.fsync:
+            await self._sync(self._written)
+
+    async def _sync(self, upto: int) -> None:
+        # Group commit: whoever holds the lock syncs every write so far, so
+        # the appends queued behind it usually find their write synced
+        async with self._sync_lock:
+            if self._synced >= upto:
+                return
+            written = self._written
+            await asyncio.get_running_loop().run_in_executor(None, os.fsync, self._fd)
+            self._synced = written
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                while self._pending:
+                    await self.flush()
+            except Exception as e:
+                # Events stay pending (and journaled) and are retried
+                logger.error(f"Progress journal flush failed: {str(e)}")
+                await asyncio.sleep(self.flush_interval)
+
+    async def flush(self) -> int:
+        """Write up to ``batch_size`` pending events in one transaction."""
+        async with self._flush_lock:
+            return await self._flush()
+
+    async def _flush(self) -> int:
+        events = [self._pending[i][1] for i in range(min(self.batch_size, len(self._pending)))]
+        if not events:
+            return 0
+        started = time.monotonic()
+        async with self.db.unit_of_work() as uow:
+            for sql, args in record_statements(events):
+                uow.add(sql, args)
+        for _ in events:
+            self._pending.popleft()
+        self.flushed += len(events)
+        self.batches += 1
+        self.last_flush_ms = round((time.monotonic() - started) * 1000, 1)
+        if not self._pending:
+            # Every journaled event is stored. Appends write and enqueue
+            # without awaiting in between, so none can be half-done here.
+            os.ftruncate(self._fd, 0)
+            self._segment_events = 0
+        elif self._segment_events >= self.batch_size:
+            await self._rotate()
+        self._drop_flushed_segments()
+        return len(events)
+
+    async def _rotate(self) -> None:
+        # Under the sync lock, so that no group commit fsyncs the old
+        # segment's descriptor after it is closed; appends made before the
+        # switch are synced here, later ones by the next group commit
+        async with self._sync_lock:
+            loop = asyncio.get_running_loop()
+            number = self._segment + 1
+            fd = await loop.run_in_executor(None, self._create_segment, number)
+            old, written = self._fd, self._written
+            self._fd, self._segment, self._segment_events = fd, number, 0
+            self._segments.append(number)
+            if self.fsync:
+                await loop.run_in_executor(None, os.fsync, old)
+                self._synced = max(self._synced, written)
+            os.close(old)
+
+    def _drop_flushed_segments(self) -> None:
+        oldest = self._pending[0][0] if self._pending else self._segment
+        while self._segments[0] < oldest:
+            number = self._segments.pop(0)
+            try:
+                os.unlink(self._segment_path(number))
+            except FileNotFoundError:
+                pass
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "pending": len(self._pending),
+            "max_pending": self.max_pending,
+            "batch_size": self.batch_size,
+            "appended": self.appended,
+            "flushed": self.flushed,
+            "batches": self.batches,
+            "rejected": self.rejected,
+            "replayed": self.replayed,
+            "segments": len(self._segments),
+            "last_flush_ms": self.last_flush_ms,
+        }
+
+
+# Set by the app when PROGRESS_JOURNAL_PATH is configured
+progress_journal: Optional[ProgressJournal] = None
+
+
+def create_journal(db, path: Optional[str] = None) -> Optional[ProgressJournal]:
+    """Create a journal configured from the environment, or None if disabled."""
+    path = path or os.getenv("PROGRESS_JOURNAL_PATH")
+    if not path:
+        return None
+    return ProgressJournal(
+        db,
+        path,
+        batch_size=int(os.getenv("PROGRESS_JOURNAL_BATCH_SIZE", "500")),
+        flush_interval=float(os.getenv("PROGRESS_JOURNAL_FLUSH_INTERVAL", "0.05")),
+        max_pending=int(os.getenv("PROGRESS_JOURNAL_MAX_PENDING", "10000")),
+        fsync=os.getenv("PROGRESS_JOURNAL_FSYNC", "true").lower() == "true",
+    )
+
+
+async def open_journal(db) -> Optional[ProgressJournal]:
+    """Start a journal in the first free slot, or return None if disabled or all are taken.
+
+    Each worker needs a journal of its own: slot 0 is ``PROGRESS_JOURNAL_PATH``
+    and slot ``i`` is ``<path>-<i>``, up to ``PROGRESS_JOURNAL_SLOTS``. A
+    restarted worker claims the slot its predecessor released and replays
+    what it left behind.
+    """
+    path = os.getenv("PROGRESS_JOURNAL_PATH")
+    if not path:
+        return None
+    for slot in range(int(os.getenv("PROGRESS_JOURNAL_SLOTS", "1"))):
+        journal = create_journal(db, path if slot == 0 else f"{path}-{slot}")
+        try:
+            await journal.start()
+            return journal
+        except JournalLocked:
+            continue
+    return None
@@ -0,0 +1,47 @@
+from fastapi import APIRouter, Depends, Response
+from src.lib.auth.principal import Principal
+from src.lib.auth.service import get_principal
+from src.lib.progress import journal as progress_journal
+from src.lib.progress.service import ProgressService, ProgressCreate
+from pydantic import BaseModel
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/progress", tags=["progress"])
+
+class ProgressResponse(BaseModel):
+    id: str
+    userId: str
+    topicId: str
+    questionId: str
+    isCorrect: bool
+    createdAt: int
+
+class TopicProgressResponse(BaseModel):
+    correctAnswers: int
+    incorrectAnswers: int
+    totalQuestions: int
+    timeSpentMinutes: int
+
+@router.get("/topic/{topic_id}", response_model=TopicProgressResponse)
+async def get_topic_progress(topic_id: str, current_user: Principal = Depends(get_principal)):
+    """Get progress statistics for a topic the user owns (any topic for admins)."""
+    return await ProgressService.get_topic_progress(topic_id, current_user.id, current_user.is_admin)
+
+@router.post("/topic/{topic_id}", response_model=ProgressResponse)
+async def record_progress(
+    topic_id: str,
+    progress: ProgressCreate,
+    response: Response,
+    current_user: Principal = Depends(get_principal)
+):
+    """Record an answer to a question of one of the user's own topics.
+
+    With the progress journal enabled the answer is acknowledged with 202
+    once it is journaled, and stored by a background batch.
+    """
+    if progress_journal.progress_journal is not None:
+        response.status_code = 202
+        return await ProgressService.journal_progress(topic_id, current_user.id, progress)
+    return await ProgressService.record_progress(topic_id, current_user.id, progress)
@@ -0,0 +1,162 @@
+from typing import Any, Dict
+import time
+import uuid
+from src.lib.db import get_db, Record, RowMapper
+from src.lib.progress import journal as progress_journal
+from src.lib.progress.stats import APPLY_ANSWER_SQL, APPLY_TOPIC_PROGRESS_SQL
+from src.lib.review.schedule import SCHEDULE_ANSWER_SQL
+from src.lib.questions.service import QuestionService
+from pydantic import BaseModel
+from fastapi import HTTPException
+import logging
+
+logger = logging.getLogger(__name__)
+
+class ProgressCreate(BaseModel):
+    questionId: str
+    isCorrect: bool
+
+# Serialized progress fields (API name -> column), read straight off result rows
+PROGRESS_FIELDS = {
+    "id": "id",
+    "userId": "user_id",
+    "topicId": "topic_id",
+    "questionId": "question_id",
+    "isCorrect": ("is_correct", bool),
+    "createdAt": ("created_at", int),
+}
+progress_mapper = RowMapper(PROGRESS_FIELDS)
+
+PROGRESS_COLUMNS = "id, user_id, topic_id, question_id, is_correct, created_at"
+
+class ProgressService:
+    @staticmethod
+    async def record_progress(topic_id: str, user_id: str, data: ProgressCreate) -> Record:
+        """Record an answer to a question of a topic owned by ``user_id``.
+
+        The INSERT only selects its row if the topic is the user's and the
+        question belongs to it. A probe batched ahead of it reports the
+        topic's owner and the question's topic, so a refused insert maps to
+        404, 403 or 400 without another round trip. The topic's counters,
+        ``topics.progress`` and the question's review schedule are updated in
+        the same transaction.
+        """
+        try:
+            sql = f"""
+                INSERT INTO user_progress (id, user_id, topic_id, question_id, is_correct, created_at)
+                SELECT ?, ?, ?, ?, ?, ?
+                WHERE EXISTS (
+                    SELECT 1 FROM topics t JOIN questions q ON q.topic_id = t.id
+                    WHERE t.id = ? AND t.user_id = ? AND q.id = ?
+                )
+                RETURNING {PROGRESS_COLUMNS}
+            """
+            progress_id = str(uuid.uuid4())
+            async with get_db().unit_of_work() as uow:
+                probe = uow.add("""
+                    SELECT (SELECT user_id FROM topics WHERE id = ?) AS owner_id,
+                           (SELECT topic_id FROM questions WHERE id = ?) AS question_topic_id
+                """, [topic_id, data.questionId])
+                created = uow.add(sql, [
+                    progress_id,
+                    user_id,
+                    topic_id,
+                    data.questionId,
+                    int(data.isCorrect),
+                    int(time.time()),
+                    topic_id,
+                    user_id,
+                    data.questionId,
+                ])
+                # All are no-ops if the insert was refused
+                uow.add(APPLY_ANSWER_SQL, [progress_id])
+                uow.add(APPLY_TOPIC_PROGRESS_SQL, [topic_id, progress_id])
+                uow.add(SCHEDULE_ANSWER_SQL, [progress_id])
+
+            progress = progress_mapper.one(uow.results[created], sql)
+            if progress is None:
+                row = uow.results[probe].rows[0]
+                owner_id, question_topic_id = row[0], row[1]
+                if owner_id is None:
+                    raise HTTPException(status_code=404, detail="Topic not found")
+                if owner_id != user_id:
+                    raise HTTPException(status_code=403, detail="You can only record progress for your own topics")
+                if question_topic_id is None:
+                    raise HTTPException(status_code=404, detail="Question not found")
+                raise HTTPException(status_code=400, detail="Question does not belong to this topic")
+            return progress
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Error recording progress for topic {topic_id}")
+            logger.exception(e)
+            raise HTTPException(status_code=500, detail={"error": str(e), "type": str(type(e))})
+
+    @staticmethod
+    async def journal_progress(topic_id: str, user_id: str, data: ProgressCreate) -> Dict[str, Any]:
+        """Validate an answer in memory and append it to the progress journal.
+
+        Ownership and the question's topic are checked against the cached
+        question bank, so an accepted answer usually costs no round trip;
+        the journal writes it to ``user_progress`` in a later batch.
+        """
+        journal = progress_journal.progress_journal
+        questions = await QuestionService.get_topic_questions(topic_id, user_id)
+        if not any(question["id"] == data.questionId for question in questions):
+            raise HTTPException(status_code=404, detail="Question not found in this topic")
+
+        event = {
+            "id": str(uuid.uuid4()),
+            "user_id": user_id,
+            "topic_id": topic_id,
+            "question_id": data.questionId,
+            "is_correct": int(data.isCorrect),
+            "created_at": int(time.time()),
+        }
+        try:
+            await journal.append(event)
+        except progress_journal.JournalFull as e:
+            logger.warning(f"Shedding progress event: {str(e)}")
+            raise HTTPException(status_code=503, detail="Too many answers are waiting to be saved", headers={"Retry-After": "1"})
+        return {
+            "id": event["id"],
+            "userId": user_id,
+            "topicId": topic_id,
+            "questionId": data.questionId,
+            "isCorrect": data.isCorrect,
+            "createdAt": event["created_at"],
+        }
+
+    @staticmethod
+    async def get_topic_progress(topic_id: str, user_id: str, is_admin: bool = False) -> Dict[str, Any]:
+        """Get the owner's answer counts for a topic owned by ``user_id`` (any topic for admins).
+
+        Reads the maintained answer counters and question count by primary
+        key instead of aggregating the answer and question tables.
+        """
+        try:
+            row = await get_db().fetch_one("""
+                SELECT t.user_id AS owner_id, s.correct_answers, s.incorrect_answers, s.first_answer_at,
+                       c.questions AS total_questions
+                FROM topics t
+                LEFT JOIN topic_progress_stats s ON s.user_id = t.user_id AND s.topic_id = t.id
+                LEFT JOIN topic_question_counts c ON c.topic_id = t.id
+                WHERE t.id = ?
+            """, [topic_id])
+            if row is None:
+                raise HTTPException(status_code=404, detail="Topic not found")
+            if row.owner_id != user_id and not is_admin:
+                raise HTTPException(status_code=403, detail="You don't have permission to access progress for this topic")
+            started = row.first_answer_at
+            return {
+                "correctAnswers": row.correct_answers or 0,
+                "incorrectAnswers": row.incorrect_answers or 0,
+                "totalQuestions": row.total_questions or 0,
+                "timeSpentMinutes": (int(time.time()) - started) // 60 if started else 0,
+            }
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Error getting progress for topic {topic_id}")
+            logger.exception(e)
+            raise HTTPException(status_code=500, detail={"error": str(e), "type": str(type(e))})
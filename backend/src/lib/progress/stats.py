@@ -0,0 +1,210 @@
+import os
+import asyncio
+import logging
+import argparse
+from typing import Any, Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+from src.lib.review.schedule import SCHEDULE_ANSWERS_SQL, schedule_rebuild_statements
+
+logger = logging.getLogger(__name__)
+
+# topics.progress: the share (percent) of the topic's questions its owner
+# has answered correctly at least once. Evaluated against a topics row.
+TOPIC_PROGRESS_EXPR = """
+    COALESCE((SELECT s.correct_questions FROM topic_progress_stats s
+              WHERE s.user_id = topics.user_id AND s.topic_id = topics.id), 0)
+    * 100 / MAX(1, COALESCE((SELECT c.questions FROM topic_question_counts c WHERE c.topic_id = topics.id), 0))
+"""
+
+# Counts a question created in the same batch (no-op if it was not inserted)
+ADD_QUESTION_COUNT_SQL = """
+    INSERT INTO topic_question_counts (topic_id, questions)
+    SELECT topic_id, 1 FROM questions WHERE id = ?
+    ON CONFLICT (topic_id) DO UPDATE SET questions = questions + 1
+"""
+
+# Uncounts a question ahead of deleting it (args: a guard on ``questions`` rows)
+REMOVE_QUESTION_COUNT_SQL = """
+    UPDATE topic_question_counts SET questions = questions - 1
+    WHERE topic_id IN (SELECT topic_id FROM questions WHERE {guard})
+"""
+
+_COUNT_QUESTIONS_SQL = """
+    INSERT INTO topic_question_counts (topic_id, questions)
+    SELECT topic_id, COUNT(*) FROM questions
+    {where}
+    GROUP BY topic_id
+"""
+
+# Folds one recorded answer (by user_progress id) into its counters. A
+# correct answer only counts towards correct_questions the first time.
+APPLY_ANSWER_SQL = """
+    INSERT INTO topic_progress_stats (
+        user_id, topic_id, correct_answers, incorrect_answers, correct_questions, first_answer_at, last_answer_at
+    )
+    SELECT p.user_id, p.topic_id, p.is_correct, 1 - p.is_correct,
+           p.is_correct AND NOT EXISTS (
+               SELECT 1 FROM user_progress e
+               WHERE e.question_id = p.question_id AND e.user_id = p.user_id AND e.is_correct = 1 AND e.id != p.id
+           ),
+           p.created_at, p.created_at
+    FROM user_progress p
+    WHERE p.id = ?
+    ON CONFLICT (user_id, topic_id) DO UPDATE SET
+        correct_answers = correct_answers + excluded.correct_answers,
+        incorrect_answers = incorrect_answers + excluded.incorrect_answers,
+        correct_questions = correct_questions + excluded.correct_questions,
+        last_answer_at = excluded.last_answer_at
+"""
+
+# Refreshes topics.progress after an answer was recorded (no-op otherwise)
+APPLY_TOPIC_PROGRESS_SQL = f"""
+    UPDATE topics SET progress = {TOPIC_PROGRESS_EXPR}
+    WHERE id = ? AND EXISTS (SELECT 1 FROM user_progress WHERE id = ?)
+"""
+
+# Takes a question's answers out of its topic's counters, ahead of deleting
+# the question (args: question id, then a guard on ``questions`` rows)
+REMOVE_QUESTION_SQL = """
+    UPDATE topic_progress_stats AS s SET
+        correct_answers = s.correct_answers - a.correct,
+        incorrect_answers = s.incorrect_answers - a.incorrect,
+        correct_questions = s.correct_questions - (a.correct > 0)
+    FROM (
+        SELECT user_id, topic_id, SUM(is_correct = 1) AS correct, SUM(is_correct = 0) AS incorrect
+        FROM user_progress
+        WHERE question_id = ?
+        GROUP BY user_id, topic_id
+    ) AS a
+    WHERE s.user_id = a.user_id AND s.topic_id = a.topic_id
+      AND a.topic_id IN (SELECT topic_id FROM questions WHERE {guard})
+"""
+
+_AGGREGATE_SQL = """
+    INSERT INTO topic_progress_stats (
+        user_id, topic_id, correct_answers, incorrect_answers, correct_questions, first_answer_at, last_answer_at
+    )
+    SELECT user_id, topic_id,
+           SUM(is_correct = 1), SUM(is_correct = 0),
+           COUNT(DISTINCT CASE WHEN is_correct = 1 THEN question_id END),
+           MIN(created_at), MAX(created_at)
+    FROM user_progress
+    {where}
+    GROUP BY user_id, topic_id
+"""
+
+
+# Answer event fields, in journal and VALUES column order
+EVENT_FIELDS = ("id", "user_id", "topic_id", "question_id", "is_correct", "created_at")
+
+
+def _values(count: int) -> str:
+    # The event fields, then the event's position in its batch
+    return ", ".join(["(?, ?, ?, ?, ?, ?, ?)"] * count)
+
+
+def record_statements(events: List[Dict[str, Any]]) -> List[tuple]:
+    """Statements that store a batch of answers, idempotently, in one transaction.
+
+    Answers are matched by id: ones already in ``user_progress`` (e.g. a
+    journal replay after a crash between commit and truncation) are
+    skipped, and so are answers whose question has since left its topic.
+    The counters and the review schedule are folded in before the insert,
+    so the NOT EXISTS checks still see the history without this batch.
+    """
+    args = [value for seq, event in enumerate(events) for value in (*(event[field] for field in EVENT_FIELDS), seq)]
+    batch = f"""
+        SELECT column1 AS id, column2 AS user_id, column3 AS topic_id,
+               column4 AS question_id, column5 AS is_correct, column6 AS created_at, column7 AS seq
+        FROM (VALUES {_values(len(events))})
+    """
+    fresh = f"""
+        SELECT e.* FROM ({batch}) e
+        JOIN questions q ON q.id = e.question_id AND q.topic_id = e.topic_id
+        WHERE NOT EXISTS (SELECT 1 FROM user_progress p WHERE p.id = e.id)
+    """
+    topic_ids = sorted({event["topic_id"] for event in events})
+    return [
+        (f"""
+            INSERT INTO topic_progress_stats (
+                user_id, topic_id, correct_answers, incorrect_answers, correct_questions, first_answer_at, last_answer_at
+            )
+            SELECT user_id, topic_id, SUM(is_correct = 1), SUM(is_correct = 0),
+                   COUNT(DISTINCT CASE WHEN is_correct = 1 AND NOT EXISTS (
+                       SELECT 1 FROM user_progress x
+                       WHERE x.question_id = f.question_id AND x.user_id = f.user_id AND x.is_correct = 1
+                   ) THEN question_id END),
+                   MIN(created_at), MAX(created_at)
+            FROM ({fresh}) f
+            GROUP BY user_id, topic_id
+            ON CONFLICT (user_id, topic_id) DO UPDATE SET
+                correct_answers = correct_answers + excluded.correct_answers,
+                incorrect_answers = incorrect_answers + excluded.incorrect_answers,
+                correct_questions = correct_questions + excluded.correct_questions,
+                last_answer_at = MAX(last_answer_at, excluded.last_answer_at)
+        """, args),
+        (SCHEDULE_ANSWERS_SQL.format(source=fresh), args),
+        (f"""
+            INSERT OR IGNORE INTO user_progress (id, user_id, topic_id, question_id, is_correct, created_at)
+            SELECT id, user_id, topic_id, question_id, is_correct, created_at FROM ({fresh}) ORDER BY seq
+        """, args),
+        (f"""
+            UPDATE topics SET progress = {TOPIC_PROGRESS_EXPR}
+            WHERE id IN ({", ".join("?" * len(topic_ids))})
+        """, topic_ids),
+    ]
+
+
+def rebuild_statements(topic_id: Optional[str] = None) -> List[Tuple[str, List[Any]]]:
+    """Statements that recompute the counters, question counts and the review schedule (of one topic, or all) from raw history."""
+    if topic_id is None:
+        return [
+            ("DELETE FROM topic_progress_stats", []),
+            (_AGGREGATE_SQL.format(where=""), []),
+            ("DELETE FROM topic_question_counts", []),
+            (_COUNT_QUESTIONS_SQL.format(where=""), []),
+            (f"UPDATE topics SET progress = {TOPIC_PROGRESS_EXPR}", []),
+        ] + schedule_rebuild_statements()
+    return [
+        ("DELETE FROM topic_progress_stats WHERE topic_id = ?", [topic_id]),
+        (_AGGREGATE_SQL.format(where="WHERE topic_id = ?"), [topic_id]),
+        ("DELETE FROM topic_question_counts WHERE topic_id = ?", [topic_id]),
+        (_COUNT_QUESTIONS_SQL.format(where="WHERE topic_id = ?"), [topic_id]),
+        (f"UPDATE topics SET progress = {TOPIC_PROGRESS_EXPR} WHERE id = ?", [topic_id]),
+    ] + schedule_rebuild_statements(topic_id)
+
+
+async def rebuild_stats(db, topic_id: Optional[str] = None) -> int:
+    """Recompute ``topic_progress_stats``, ``topic_question_counts``, ``topics.progress`` and ``review_schedule`` in one batch.
+
+    Returns the number of counter rows written.
+    """
+    async with db.unit_of_work() as uow:
+        for sql, args in rebuild_statements(topic_id):
+            uow.add(sql, args)
+    return uow.results[1].rows_affected
+
+
+async def main(argv=None):
+    parser = argparse.ArgumentParser(description="Recompute per-topic progress counters and the review schedule from the answer history.")
+    parser.add_argument("--topic", help="only rebuild this topic's counters")
+    args = parser.parse_args(argv)
+
+    # Load environment variables
+    load_dotenv()
+    if not os.getenv('VITE_LIBSQL_DB_URL'):
+        raise ValueError("Database URL must be set in environment variables")
+
+    from ..db import create_pool
+
+    db = create_pool()
+    try:
+        await db.open()
+        rows = await rebuild_stats(db, args.topic)
+        print(f"Rebuilt {rows} progress counter row(s)")
+    finally:
+        await db.close()
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    asyncio.run(main())
@@ -0,0 +1,165 @@
+import os
+import time
+import uuid
+import pytest
+from src.lib.db import initialize_db
+from src.lib.db.sqlite import SqliteDatabase
+from src.lib.db.stats import count_queries
+from src.lib.progress.journal import JournalFull, JournalLocked, ProgressJournal
+from src.lib.progress.stats import rebuild_stats
+
+@pytest.fixture
+async def db(tmp_path):
+    """Get a database with a topic owned by u1 holding two questions."""
+    database = SqliteDatabase(str(tmp_path / "journal.db"), on_open=initialize_db)
+    await database.open()
+    now = int(time.time())
+    async with database.unit_of_work() as uow:
+        uow.add("INSERT INTO topics (id, user_id, title, lesson_plan, created_at, updated_at) VALUES ('t1', 'u1', 'T', '{}', ?, ?)", [now, now])
+        for question_id in ("q1", "q2"):
+            uow.add("INSERT INTO questions (id, topic_id, text, options, correct_answer) VALUES (?, 't1', 'Q', '[]', 0)", [question_id])
+        uow.add("INSERT INTO topic_question_counts (topic_id, questions) VALUES ('t1', 2)")
+    yield database
+    await database.close()
+
+def _event(question_id, correct):
+    return {
+        "id": str(uuid.uuid4()),
+        "user_id": "u1",
+        "topic_id": "t1",
+        "question_id": question_id,
+        "is_correct": int(correct),
+        "created_at": int(time.time()),
+    }
+
+def _journaled(journal):
+    """Events left in the journal's segment files."""
+    lines = 0
+    for number in journal._existing_segments():
+        with open(journal._segment_path(number), "rb") as f:
+            lines += f.read().count(b"\n")
+    return lines
+
+async def _state(db):
+    answers = (await db.fetch_one("SELECT COUNT(*) AS n FROM user_progress")).n
+    stats = await db.fetch_one("SELECT correct_answers, incorrect_answers, correct_questions FROM topic_progress_stats")
+    progress = (await db.fetch_one("SELECT progress FROM topics WHERE id = 't1'")).progress
+    return answers, tuple(stats) if stats else None, progress
+
+@pytest.mark.asyncio
+async def test_events_are_flushed_in_one_batch(db, tmp_path):
+    """Journaled answers land in user_progress and the counters with one round trip."""
+    journal = ProgressJournal(db, str(tmp_path / "progress.journal"), flush_interval=60)
+    await journal.start()
+    for question_id, correct in (("q1", True), ("q1", True), ("q2", False), ("gone", True)):
+        await journal.append(_event(question_id, correct))
+    assert journal.pending == 4
+
+    with count_queries() as counter:
+        assert await journal.flush() == 4
+    assert counter.queries == 1
+    # The answer to a question outside the topic is dropped
+    assert await _state(db) == (3, (2, 1, 1), 50)
+    assert _journaled(journal) == 0
+
+    await rebuild_stats(db)
+    assert await _state(db) == (3, (2, 1, 1), 50)
+    await journal.stop()
+
+def _crash(journal):
+    journal._task.cancel()
+    os.close(journal._fd)
+    os.close(journal._lock_fd)
+
+@pytest.mark.asyncio
+async def test_replay_after_a_crash_is_idempotent(db, tmp_path):
+    """Unflushed events are replayed on start; already stored ones are not applied twice."""
+    path = str(tmp_path / "progress.journal")
+    crashed = ProgressJournal(db, path, flush_interval=60)
+    await crashed.start()
+    stored = _event("q1", True)
+    await crashed.append(stored)
+    await crashed.flush()
+    await crashed.append(_event("q2", True))
+    _crash(crashed)
+
+    # A crash between a commit and the truncation leaves stored events behind
+    with open(crashed._segment_path(crashed._segment), "ab") as f:
+        f.write(b'["%s", "u1", "t1", "q1", 1, 0]\n["torn' % stored["id"].encode())
+
+    journal = ProgressJournal(db, path, flush_interval=60)
+    await journal.start()
+    assert journal.replayed == 2
+    await journal.stop()
+    assert await _state(db) == (2, (2, 0, 2), 100)
+
+@pytest.mark.asyncio
+async def test_appends_after_a_torn_tail_survive_the_next_replay(db, tmp_path):
+    """A torn last line is cut off, so later appends stay readable."""
+    path = str(tmp_path / "progress.journal")
+    crashed = ProgressJournal(db, path, flush_interval=60)
+    await crashed.start()
+    await crashed.append(_event("q1", True))
+    _crash(crashed)
+    with open(crashed._segment_path(crashed._segment), "ab") as f:
+        f.write(b'["torn')
+
+    restarted = ProgressJournal(db, path, flush_interval=60)
+    await restarted.start()
+    await restarted.append(_event("q2", False))
+    _crash(restarted)
+
+    journal = ProgressJournal(db, path, flush_interval=60)
+    await journal.start()
+    assert journal.replayed == 2
+    await journal.stop()
+    assert await _state(db) == (2, (1, 1, 1), 50)
+
+@pytest.mark.asyncio
+async def test_segments_stay_bounded_while_the_backlog_never_drains(db, tmp_path):
+    """Flushed segments are deleted even though events are always pending."""
+    journal = ProgressJournal(db, str(tmp_path / "progress.journal"), batch_size=4, flush_interval=60, fsync=False)
+    await journal.start()
+    # Flush by hand only
+    journal._task.cancel()
+    await journal.append(_event("q1", True))
+    for _ in range(50):
+        for _ in range(4):
+            await journal.append(_event("q2", False))
+        await journal.flush()
+        assert journal.pending == 1
+        assert _journaled(journal) <= journal.pending + 2 * journal.batch_size
+        assert len(journal._existing_segments()) <= 3
+    await journal.stop()
+    assert _journaled(journal) == 0
+    assert (await db.fetch_one("SELECT COUNT(*) AS n FROM user_progress")).n == 201
+
+@pytest.mark.asyncio
+async def test_a_journal_path_has_one_owner(db, tmp_path):
+    """A second journal on a locked path is refused until the first one stops."""
+    path = str(tmp_path / "progress.journal")
+    journal = ProgressJournal(db, path, flush_interval=60)
+    await journal.start()
+    with pytest.raises(JournalLocked):
+        await ProgressJournal(db, path, flush_interval=60).start()
+    await journal.stop()
+
+    other = ProgressJournal(db, path, flush_interval=60)
+    await other.start()
+    await other.stop()
+
+@pytest.mark.asyncio
+async def test_backlog_is_bounded(db, tmp_path):
+    """Appends are refused once max_pending events wait to be flushed."""
+    journal = ProgressJournal(db, str(tmp_path / "progress.journal"), flush_interval=60, max_pending=2, fsync=False)
+    await journal.start()
+    await journal.append(_event("q1", True))
+    await journal.append(_event("q2", True))
+    with pytest.raises(JournalFull):
+        await journal.append(_event("q2", False))
+    assert journal.metrics()["rejected"] == 1
+
+    await journal.flush()
+    await journal.append(_event("q2", False))
+    await journal.stop()
+    assert await _state(db) == (3, (2, 1, 2), 100)
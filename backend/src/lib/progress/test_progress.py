@@ -0,0 +1,144 @@
+import time
+import pytest
+from fastapi import HTTPException
+from src.lib import db as db_module
+from src.lib.db import initialize_db
+from src.lib.db.entity_cache import entity_cache
+from src.lib.db.sqlite import SqliteDatabase
+from src.lib.db.stats import count_queries
+from src.lib.progress.service import ProgressCreate, ProgressService
+from src.lib.progress.stats import rebuild_stats
+from src.lib.questions.service import QuestionCreate, QuestionService
+from src.lib.topics.service import TopicService, TopicUpdate
+
+@pytest.fixture
+async def db(tmp_path, monkeypatch):
+    """Get a database with two users, a topic owned by u1 and one of its questions."""
+    database = SqliteDatabase(str(tmp_path / "progress.db"), on_open=initialize_db)
+    await database.open()
+    monkeypatch.setattr(db_module, "_db_pool", database)
+    entity_cache.clear()
+    now = int(time.time())
+    async with database.unit_of_work() as uow:
+        for user_id in ("u1", "u2"):
+            uow.add(
+                "INSERT INTO users (id, email, name, password_hash, roles, created_at, updated_at) VALUES (?, ?, ?, 'x', 'role_user', ?, ?)",
+                [user_id, f"{user_id}@example.com", user_id, now, now]
+            )
+        for topic_id, user_id in (("t1", "u1"), ("t2", "u2")):
+            uow.add(
+                "INSERT INTO topics (id, user_id, title, lesson_plan, created_at, updated_at) VALUES (?, ?, 'T', '{}', ?, ?)",
+                [topic_id, user_id, now, now]
+            )
+            uow.add(
+                "INSERT INTO questions (id, topic_id, text, options, correct_answer) VALUES (?, ?, 'Q', '[\"a\", \"b\"]', 0)",
+                [f"q-{topic_id}", topic_id]
+            )
+            uow.add("INSERT INTO topic_question_counts (topic_id, questions) VALUES (?, 1)", [topic_id])
+    yield database
+    await database.close()
+
+async def _status(coro):
+    with pytest.raises(HTTPException) as excinfo:
+        await coro
+    return excinfo.value.status_code
+
+@pytest.mark.asyncio
+async def test_record_progress_is_one_round_trip(db):
+    """A valid answer is stored with a single batch."""
+    with count_queries() as counter:
+        progress = await ProgressService.record_progress("t1", "u1", ProgressCreate(questionId="q-t1", isCorrect=True))
+    assert counter.queries == 1
+    assert (progress["topicId"], progress["isCorrect"]) == ("t1", True)
+
+    stats = await ProgressService.get_topic_progress("t1", "u1")
+    assert (stats["correctAnswers"], stats["totalQuestions"]) == (1, 1)
+
+@pytest.mark.asyncio
+async def test_refused_progress_is_told_apart(db):
+    """Missing topic, foreign topic, missing and misplaced questions map to distinct errors."""
+    answer = ProgressCreate(questionId="q-t1", isCorrect=False)
+    assert await _status(ProgressService.record_progress("missing", "u1", answer)) == 404
+    assert await _status(ProgressService.record_progress("t1", "u2", answer)) == 403
+    assert await _status(ProgressService.record_progress("t1", "u1", ProgressCreate(questionId="nope", isCorrect=False))) == 404
+    assert await _status(ProgressService.record_progress("t1", "u1", ProgressCreate(questionId="q-t2", isCorrect=False))) == 400
+    assert (await db.fetch_one("SELECT COUNT(*) AS n FROM user_progress")).n == 0
+
+@pytest.mark.asyncio
+async def test_topic_writes_are_guarded_by_ownership(db):
+    """Another user's update or delete changes nothing; admins may do both."""
+    assert await _status(TopicService.update_topic("t1", TopicUpdate(title="x"), "u2")) == 403
+    assert await _status(TopicService.update_topic("missing", TopicUpdate(title="x"), "u1")) == 404
+    assert await _status(TopicService.delete_topic("t1", "u2")) == 403
+    assert (await db.fetch_one("SELECT title FROM topics WHERE id = 't1'")).title == "T"
+    assert (await db.fetch_one("SELECT COUNT(*) AS n FROM questions WHERE topic_id = 't1'")).n == 1
+
+    updated = await TopicService.update_topic("t1", TopicUpdate(title="x"), "u2", is_admin=True)
+    assert updated["title"] == "x"
+    with count_queries() as counter:
+        await TopicService.delete_topic("t1", "u1")
+    assert counter.queries == 1
+    assert await _status(TopicService.delete_topic("t1", "u1")) == 404
+
+@pytest.mark.asyncio
+async def test_question_writes_are_guarded_by_ownership(db):
+    """Questions can only be added to and changed in the caller's own topics."""
+    question = QuestionCreate(text="Q2", options=["a", "b", "c"], correctAnswer=2, explanation="e")
+    assert await _status(QuestionService.create_question("t1", question, "u2")) == 403
+    assert await _status(QuestionService.create_question("missing", question, "u1")) == 404
+    assert await _status(QuestionService.update_question("q-t1", question, "u2")) == 403
+    assert await _status(QuestionService.update_question("nope", question, "u1")) == 404
+
+    created = await QuestionService.create_question("t1", question, "u1")
+    assert created["options"] == ["a", "b", "c"]
+    assert len(await QuestionService.get_topic_questions("t1", "u1")) == 2
+    assert await _status(QuestionService.get_topic_questions("t1", "u2")) == 403
+
+async def _counters(db):
+    row = await db.fetch_one("""
+        SELECT s.correct_answers, s.incorrect_answers, s.correct_questions, t.progress
+        FROM topics t LEFT JOIN topic_progress_stats s ON s.topic_id = t.id AND s.user_id = t.user_id
+        WHERE t.id = 't1'
+    """)
+    return tuple(row)
+
+@pytest.mark.asyncio
+async def test_counters_follow_answers_and_match_a_rebuild(db):
+    """Answers update the counters and topics.progress in step with the raw history."""
+    await QuestionService.create_question("t1", QuestionCreate(text="Q2", options=["a", "b"], correctAnswer=1, explanation="e"), "u1")
+    second = (await QuestionService.get_topic_questions("t1", "u1"))[1]["id"]
+    for question_id, correct in (("q-t1", False), ("q-t1", True), ("q-t1", True), (second, False)):
+        await ProgressService.record_progress("t1", "u1", ProgressCreate(questionId=question_id, isCorrect=correct))
+
+    assert await _counters(db) == (2, 2, 1, 50)
+    stats = await ProgressService.get_topic_progress("t1", "u1")
+    assert (stats["correctAnswers"], stats["incorrectAnswers"], stats["totalQuestions"]) == (2, 2, 2)
+
+    await db.execute("UPDATE topic_progress_stats SET correct_answers = 99")
+    assert await rebuild_stats(db) == 1
+    assert await _counters(db) == (2, 2, 1, 50)
+
+    await QuestionService.delete_question("q-t1", "u1")
+    assert await _counters(db) == (0, 1, 0, 0)
+    assert (await ProgressService.get_topic_progress("t1", "u1"))["totalQuestions"] == 1
+    await db.execute("UPDATE topic_question_counts SET questions = 99")
+    await rebuild_stats(db, "t1")
+    assert await _counters(db) == (0, 1, 0, 0)
+    assert (await ProgressService.get_topic_progress("t1", "u1"))["totalQuestions"] == 1
+
+@pytest.mark.asyncio
+async def test_sampling_skips_mastered_questions(db):
+    """Sampling draws from the cached bank and can leave out what the user already knows."""
+    await ProgressService.record_progress("t1", "u1", ProgressCreate(questionId="q-t1", isCorrect=True))
+    assert len(await QuestionService.sample_topic_questions("t1", "u1", 5, seed=3)) == 1
+
+    with count_queries() as counter:
+        assert await QuestionService.sample_topic_questions("t1", "u1", 5, exclude_mastered=True) == []
+    assert counter.queries == 1
+    assert await QuestionService.sample_topic_questions("t1", "u1", 5, exclude_recent=60) == []
+    assert await QuestionService.sample_topic_questions("t1", "u1", 5, exclude=["q-t1"]) == []
+    assert await _status(QuestionService.sample_topic_questions("t1", "u2", 5)) == 403
+
+    # A wrong answer puts the question back into play
+    await ProgressService.record_progress("t1", "u1", ProgressCreate(questionId="q-t1", isCorrect=False))
+    assert len(await QuestionService.sample_topic_questions("t1", "u1", 5, exclude_mastered=True)) == 1
@@ -0,0 +1,71 @@
+from fastapi import APIRouter, Depends, Query
+from typing import List, Optional
+from src.lib.auth.principal import Principal
+from src.lib.auth.service import get_principal
+from src.lib.questions.service import QuestionService, QuestionCreate, QuestionUpdate
+from pydantic import BaseModel
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/questions", tags=["questions"])
+
+class QuestionResponse(BaseModel):
+    id: str
+    topicId: str
+    text: str
+    options: List[str]
+    correctAnswer: int
+    explanation: str | None = None
+    createdAt: int
+    updatedAt: int
+
+@router.get("/topic/{topic_id}", response_model=List[QuestionResponse])
+async def get_topic_questions(topic_id: str, current_user: Principal = Depends(get_principal)):
+    """Get all questions of a topic the user owns (any topic for admins)."""
+    return await QuestionService.get_topic_questions(topic_id, current_user.id, current_user.is_admin)
+
+@router.get("/topic/{topic_id}/sample", response_model=List[QuestionResponse])
+async def sample_topic_questions(
+    topic_id: str,
+    n: int = Query(10, ge=1, le=200),
+    seed: Optional[int] = None,
+    exclude: List[str] = Query([]),
+    excludeMastered: bool = False,
+    excludeRecent: int = Query(0, ge=0),
+    current_user: Principal = Depends(get_principal)
+):
+    """Get up to ``n`` random questions of a topic the user owns (any topic for admins).
+
+    - ``seed`` makes the sample deterministic
+    - ``exclude`` skips the given question ids (repeatable)
+    - ``excludeMastered`` skips questions whose latest answer was correct
+    - ``excludeRecent`` skips questions the user answered in the last that many seconds
+    """
+    return await QuestionService.sample_topic_questions(
+        topic_id,
+        current_user.id,
+        n,
+        is_admin=current_user.is_admin,
+        seed=seed,
+        exclude=exclude,
+        exclude_mastered=excludeMastered,
+        exclude_recent=excludeRecent,
+    )
+
+@router.post("/topic/{topic_id}", response_model=QuestionResponse)
+async def create_question(topic_id: str, question: QuestionCreate, current_user: Principal = Depends(get_principal)):
+    """Add a question to a topic the user owns (any topic for admins)."""
+    logger.info(f"Creating question in topic {topic_id} for user {current_user.id}")
+    return await QuestionService.create_question(topic_id, question, current_user.id, current_user.is_admin)
+
+@router.put("/{question_id}", response_model=QuestionResponse)
+async def update_question(question_id: str, question: QuestionUpdate, current_user: Principal = Depends(get_principal)):
+    """Update a question of a topic the user owns (any topic for admins)."""
+    return await QuestionService.update_question(question_id, question, current_user.id, current_user.is_admin)
+
+@router.delete("/{question_id}")
+async def delete_question(question_id: str, current_user: Principal = Depends(get_principal)):
+    """Delete a question of a topic the user owns (any topic for admins)."""
+    await QuestionService.delete_question(question_id, current_user.id, current_user.is_admin)
+    return {"message": "Question deleted successfully"}
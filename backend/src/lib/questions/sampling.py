@@ -0,0 +1,34 @@
+import random
+from typing import Any, Collection, Dict, List, Optional, Sequence
+
+
+def sample_questions(
+    questions: Sequence[Dict[str, Any]],
+    n: int,
+    rng: Optional[random.Random] = None,
+    exclude: Collection[str] = (),
+) -> List[Dict[str, Any]]:
+    """Draw up to ``n`` distinct questions uniformly at random, in random order.
+
+    A partial Fisher–Yates shuffle over the bank's positions: only the
+    swapped positions are remembered (in a dict), so the bank is neither
+    copied nor shuffled and a draw costs O(n) rather than O(bank size).
+    Questions whose id is in ``exclude`` are skipped as they are drawn;
+    with heavy exclusion that degrades towards a walk over the whole bank,
+    never beyond it. The same ``rng`` seed over the same bank (banks are
+    kept in creation order) gives the same sample.
+    """
+    rng = rng or random.Random()
+    swapped: Dict[int, int] = {}
+    picked = []
+    size = len(questions)
+    for i in range(size):
+        if len(picked) == n:
+            break
+        j = rng.randrange(i, size)
+        position = swapped.get(j, j)
+        swapped[j] = swapped.get(i, i)
+        question = questions[position]
+        if question["id"] not in exclude:
+            picked.append(question)
+    return picked
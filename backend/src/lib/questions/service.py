@@ -0,0 +1,278 @@
+from typing import Any, Collection, Dict, List, Optional
+import time
+import random
+import uuid
+from src.lib.db import get_db, Record, RowMapper
+from src.lib.db.entity_cache import entity_cache, estimate_size
+from src.lib.progress.stats import (
+    ADD_QUESTION_COUNT_SQL, REMOVE_QUESTION_COUNT_SQL, REMOVE_QUESTION_SQL, TOPIC_PROGRESS_EXPR
+)
+from src.lib.questions.sampling import sample_questions
+from src.lib.topics.service import (
+    OWNED_TOPIC, TOPIC_OWNER_SQL, questions_cache_key, raise_for_topic_access, topic_cache_key
+)
+from pydantic import BaseModel
+from fastapi import HTTPException
+import logging
+import json
+
+logger = logging.getLogger(__name__)
+
+class QuestionCreate(BaseModel):
+    text: str
+    options: List[str]
+    correctAnswer: int
+    explanation: str
+
+class QuestionUpdate(QuestionCreate):
+    pass
+
+# Serialized question fields (API name -> column), read straight off result rows
+QUESTION_FIELDS = {
+    "id": "id",
+    "topicId": "topic_id",
+    "text": "text",
+    "options": ("options", json.loads),
+    "correctAnswer": "correct_answer",
+    "explanation": "explanation",
+    "createdAt": ("created_at", int),
+    "updatedAt": ("updated_at", int),
+}
+question_mapper = RowMapper(QUESTION_FIELDS)
+
+QUESTION_COLUMNS = "id, topic_id, text, options, correct_answer, explanation, created_at, updated_at"
+
+# Owner probe for question writes: (owner id, topic id), no row if the question is missing
+QUESTION_OWNER_SQL = """
+    SELECT t.user_id, t.id FROM questions q JOIN topics t ON t.id = q.topic_id
+    WHERE q.id = ?
+"""
+
+# Question writes bump their topic's updated_at, which versions the cached
+# question list, and adding or removing one moves topics.progress
+# (args: time, then the topic or question guard args)
+TOUCH_TOPIC_SQL = f"UPDATE topics SET updated_at = ?, progress = {TOPIC_PROGRESS_EXPR} WHERE {OWNED_TOPIC}"
+TOUCH_QUESTION_TOPIC_SQL = """
+    UPDATE topics SET updated_at = ?
+    WHERE id = (SELECT topic_id FROM questions WHERE id = ?) AND (user_id = ? OR ?)
+"""
+TOUCH_DELETED_QUESTION_TOPIC_SQL = f"""
+    UPDATE topics SET updated_at = ?, progress = {TOPIC_PROGRESS_EXPR}
+    WHERE id = (SELECT topic_id FROM questions WHERE id = ?) AND (user_id = ? OR ?)
+"""
+
+def validate_question(data: QuestionCreate) -> None:
+    """Reject questions with too few options or an out-of-range answer."""
+    if len(data.options) < 2:
+        raise HTTPException(status_code=400, detail="Questions must have at least 2 options")
+    if not 0 <= data.correctAnswer < len(data.options):
+        raise HTTPException(status_code=400, detail="Correct answer index must be less than the number of options")
+
+class QuestionService:
+    @staticmethod
+    async def get_topic_questions(topic_id: str, user_id: str, is_admin: bool = False) -> List[Dict[str, Any]]:
+        """Get the questions of a topic owned by ``user_id`` (any topic for admins).
+
+        Question banks are read far more often than edited, so the decoded
+        list is kept in the entity cache, versioned by the topic's
+        ``updated_at`` (which every question write bumps).
+        """
+        try:
+            cached = entity_cache.get(questions_cache_key(topic_id))
+            if cached is None:
+                cached = await QuestionService._load_topic_questions(topic_id)
+            owner_id, questions = cached
+            if owner_id != user_id and not is_admin:
+                raise HTTPException(status_code=403, detail="Not authorized to view questions for this topic")
+            return questions
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Error getting questions for topic {topic_id}")
+            logger.exception(e)
+            raise HTTPException(status_code=500, detail={"error": str(e), "type": str(type(e))})
+
+    @staticmethod
+    async def sample_topic_questions(
+        topic_id: str,
+        user_id: str,
+        n: int,
+        is_admin: bool = False,
+        seed: Optional[int] = None,
+        exclude: Collection[str] = (),
+        exclude_mastered: bool = False,
+        exclude_recent: int = 0,
+    ) -> List[Dict[str, Any]]:
+        """Draw up to ``n`` random questions of a topic owned by ``user_id`` (any topic for admins).
+
+        Sampling runs over the cached question bank. Besides the ids in
+        ``exclude``, it can skip the questions whose latest answer was
+        correct (``exclude_mastered``) or that were answered in the last
+        ``exclude_recent`` seconds. Both are read from the review schedule,
+        one row per answered question, rather than the answer history.
+        """
+        questions = await QuestionService.get_topic_questions(topic_id, user_id, is_admin)
+        excluded = set(exclude)
+        if questions and (exclude_mastered or exclude_recent > 0):
+            try:
+                rows = await get_db().fetch_all(
+                    """
+                    SELECT question_id FROM review_schedule
+                    WHERE user_id = ? AND topic_id = ? AND ((? AND repetitions > 0) OR last_answer_at >= ?)
+                    """,
+                    [user_id, topic_id, int(exclude_mastered), int(time.time()) - exclude_recent if exclude_recent > 0 else None]
+                )
+            except Exception as e:
+                logger.error(f"Error reading the review schedule for topic {topic_id}")
+                logger.exception(e)
+                raise HTTPException(status_code=500, detail={"error": str(e), "type": str(type(e))})
+            excluded.update(row["question_id"] for row in rows)
+        return sample_questions(questions, n, random.Random(seed), excluded)
+
+    @staticmethod
+    async def _load_topic_questions(topic_id: str):
+        # One round trip: an unknown topic yields no row, a topic without
+        # questions yields a single row of NULL question columns
+        sql = """
+            SELECT t.user_id AS owner_id, t.updated_at AS topic_updated_at,
+                   q.id, q.topic_id, q.text, q.options,
+                   q.correct_answer, q.explanation, q.created_at, q.updated_at
+            FROM topics t
+            LEFT JOIN questions q ON q.topic_id = t.id
+            WHERE t.id = ?
+            ORDER BY q.created_at ASC
+        """
+        stamp = entity_cache.stamp()
+        rows = await get_db().fetch_all(sql, [topic_id], mapper=question_mapper)
+        if not rows:
+            raise HTTPException(status_code=404, detail="Topic not found")
+        questions = [dict(row) for row in rows] if rows[0]["id"] is not None else []
+        cached = (rows[0]["owner_id"], questions)
+        entity_cache.put(questions_cache_key(topic_id), cached, rows[0]["topic_updated_at"], estimate_size(rows), stamp)
+        return cached
+
+    @staticmethod
+    def _invalidate_topic(topic_id: str, version: int) -> None:
+        entity_cache.invalidate(topic_cache_key(topic_id), version)
+        entity_cache.invalidate(questions_cache_key(topic_id), version)
+
+    @staticmethod
+    async def create_question(topic_id: str, data: QuestionCreate, user_id: str, is_admin: bool = False) -> Record:
+        """Add a question to a topic owned by ``user_id`` (any topic for admins).
+
+        The INSERT only selects its row if the topic passes the ownership
+        guard; the owner probe in the same batch tells 404 from 403.
+        """
+        validate_question(data)
+        try:
+            current_time = int(time.time())
+            sql = f"""
+                INSERT INTO questions (id, topic_id, text, options, correct_answer, explanation, created_at, updated_at)
+                SELECT ?, ?, ?, ?, ?, ?, ?, ?
+                WHERE EXISTS (SELECT 1 FROM topics WHERE {OWNED_TOPIC})
+                RETURNING {QUESTION_COLUMNS}
+            """
+            question_id = str(uuid.uuid4())
+            async with get_db().unit_of_work() as uow:
+                owner = uow.add(TOPIC_OWNER_SQL, [topic_id])
+                created = uow.add(sql, [
+                    question_id,
+                    topic_id,
+                    data.text,
+                    json.dumps(data.options),
+                    data.correctAnswer,
+                    data.explanation,
+                    current_time,
+                    current_time,
+                    topic_id,
+                    user_id,
+                    int(is_admin),
+                ])
+                uow.add(ADD_QUESTION_COUNT_SQL, [question_id])
+                uow.add(TOUCH_TOPIC_SQL, [current_time, topic_id, user_id, int(is_admin)])
+
+            question = question_mapper.one(uow.results[created], sql)
+            if question is None:
+                raise_for_topic_access(uow.results[owner], "add questions to")
+            QuestionService._invalidate_topic(topic_id, current_time)
+            return question
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Error creating question for topic {topic_id}")
+            logger.exception(e)
+            raise HTTPException(status_code=500, detail={"error": str(e), "type": str(type(e))})
+
+    @staticmethod
+    async def update_question(question_id: str, data: QuestionUpdate, user_id: str, is_admin: bool = False) -> Record:
+        """Update a question whose topic is owned by ``user_id`` (any for admins)."""
+        validate_question(data)
+        try:
+            sql = f"""
+                UPDATE questions
+                SET text = ?, options = ?, correct_answer = ?, explanation = ?, updated_at = ?
+                WHERE id = ? AND topic_id IN (SELECT id FROM topics WHERE user_id = ? OR ?)
+                RETURNING {QUESTION_COLUMNS}
+            """
+            current_time = int(time.time())
+            async with get_db().unit_of_work() as uow:
+                owner = uow.add(QUESTION_OWNER_SQL, [question_id])
+                updated = uow.add(sql, [
+                    data.text,
+                    json.dumps(data.options),
+                    data.correctAnswer,
+                    data.explanation,
+                    current_time,
+                    question_id,
+                    user_id,
+                    int(is_admin),
+                ])
+                uow.add(TOUCH_QUESTION_TOPIC_SQL, [current_time, question_id, user_id, int(is_admin)])
+
+            question = question_mapper.one(uow.results[updated], sql)
+            if question is None:
+                if not uow.results[owner].rows:
+                    raise HTTPException(status_code=404, detail="Question not found")
+                raise HTTPException(status_code=403, detail="Not authorized to update this question")
+            QuestionService._invalidate_topic(question["topicId"], current_time)
+            return question
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Error updating question {question_id}")
+            logger.exception(e)
+            raise HTTPException(status_code=500, detail={"error": str(e), "type": str(type(e))})
+
+    @staticmethod
+    async def delete_question(question_id: str, user_id: str, is_admin: bool = False) -> None:
+        """Delete a question and its progress, if its topic is owned by ``user_id``."""
+        try:
+            owned = "id = ? AND topic_id IN (SELECT id FROM topics WHERE user_id = ? OR ?)"
+            args = [question_id, user_id, int(is_admin)]
+            current_time = int(time.time())
+            async with get_db().unit_of_work() as uow:
+                owner = uow.add(QUESTION_OWNER_SQL, [question_id])
+                # Counters and topic are updated while the question still
+                # points at its topic
+                uow.add(REMOVE_QUESTION_SQL.format(guard=owned), [question_id] + args)
+                uow.add(REMOVE_QUESTION_COUNT_SQL.format(guard=owned), args)
+                uow.add(TOUCH_DELETED_QUESTION_TOPIC_SQL, [current_time] + args)
+                uow.add(f"DELETE FROM user_progress WHERE question_id IN (SELECT id FROM questions WHERE {owned})", args)
+                uow.add(f"""
+                    DELETE FROM review_schedule
+                    WHERE user_id IN (SELECT user_id FROM topics WHERE id IN (SELECT topic_id FROM questions WHERE {owned}))
+                      AND question_id = ?
+                """, args + [question_id])
+                deleted = uow.add(f"DELETE FROM questions WHERE {owned} RETURNING id", args)
+
+            if not uow.results[deleted].rows:
+                if not uow.results[owner].rows:
+                    raise HTTPException(status_code=404, detail="Question not found")
+                raise HTTPException(status_code=403, detail="Not authorized to delete this question")
+            QuestionService._invalidate_topic(uow.results[owner].rows[0][1], current_time)
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Error deleting question {question_id}")
+            logger.exception(e)
+            raise HTTPException(status_code=500, detail={"error": str(e), "type": str(type(e))})
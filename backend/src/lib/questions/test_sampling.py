@@ -0,0 +1,34 @@
+import random
+from collections import Counter
+from src.lib.questions.sampling import sample_questions
+
+BANK = [{"id": f"q{i}"} for i in range(50)]
+
+def _ids(questions):
+    return [question["id"] for question in questions]
+
+def test_samples_are_distinct_and_bounded():
+    """A sample never repeats a question and is capped by the bank size."""
+    sample = sample_questions(BANK, 10)
+    assert len(set(_ids(sample))) == 10
+    assert sorted(_ids(sample_questions(BANK, 500)), key=lambda id: int(id[1:])) == _ids(BANK)
+    assert sample_questions([], 5) == []
+
+def test_seeds_are_deterministic():
+    """The same seed over the same bank draws the same questions in the same order."""
+    assert sample_questions(BANK, 10, random.Random(7)) == sample_questions(BANK, 10, random.Random(7))
+    assert sample_questions(BANK, 10, random.Random(7)) != sample_questions(BANK, 10, random.Random(8))
+
+def test_excluded_questions_are_skipped():
+    """Excluded ids are never drawn, and the rest of the bank still fills the sample."""
+    exclude = {f"q{i}" for i in range(45)}
+    assert sorted(_ids(sample_questions(BANK, 10, exclude=exclude))) == ["q45", "q46", "q47", "q48", "q49"]
+    assert not exclude & set(_ids(sample_questions(BANK, 3, exclude=exclude)))
+
+def test_draws_are_uniform():
+    """Every question is about equally likely to be drawn."""
+    rng = random.Random(1)
+    counts = Counter(id for _ in range(2000) for id in _ids(sample_questions(BANK, 5, rng)))
+    # 200 expected draws per question
+    assert len(counts) == 50
+    assert 140 < min(counts.values()) and max(counts.values()) < 260
@@ -0,0 +1,24 @@
+from fastapi import APIRouter, Depends, Query
+from src.lib.auth.principal import Principal
+from src.lib.auth.service import get_principal
+from src.lib.quiz.service import QuizService, AnswerBatch
+
+router = APIRouter(prefix="/quiz", tags=["quiz"])
+
+@router.post("/{topic_id}/start")
+async def start_quiz(
+    topic_id: str,
+    count: int = Query(20, ge=1, le=200),
+    current_user: Principal = Depends(get_principal)
+):
+    """Start a quiz on one of the user's topics.
+
+    Returns a session id and up to ``count`` questions in random order,
+    without their answers; the answer key is kept server-side.
+    """
+    return await QuizService.start_quiz(topic_id, current_user.id, count)
+
+@router.post("/{session_id}/answers")
+async def submit_answers(session_id: str, batch: AnswerBatch, current_user: Principal = Depends(get_principal)):
+    """Submit a batch of answers to a quiz; they are graded and stored in one transaction."""
+    return await QuizService.submit_answers(session_id, current_user.id, batch)
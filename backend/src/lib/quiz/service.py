@@ -0,0 +1,202 @@
+import os
+import time
+import uuid
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel
+from fastapi import HTTPException
+from src.lib.db import get_db
+from src.lib.progress.stats import record_statements
+from src.lib.questions.sampling import sample_questions
+from src.lib.questions.service import QuestionService
+
+logger = logging.getLogger(__name__)
+
+class AnswerSubmission(BaseModel):
+    questionId: str
+    answer: int
+
+class AnswerBatch(BaseModel):
+    answers: List[AnswerSubmission]
+
+
+class QuizSession:
+    """An ordered question set and its answer key, held server-side."""
+
+    __slots__ = ("id", "user_id", "topic_id", "question_ids", "key", "answered", "recorded", "correct", "expires_at")
+
+    def __init__(self, user_id: str, topic_id: str, questions: List[Dict[str, Any]], ttl: float):
+        self.id = str(uuid.uuid4())
+        self.user_id = user_id
+        self.topic_id = topic_id
+        self.question_ids = [question["id"] for question in questions]
+        # question id -> (correct option, explanation)
+        self.key = {question["id"]: (question["correctAnswer"], question["explanation"]) for question in questions}
+        # Questions with an answer stored or being stored, and how many are stored
+        self.answered: set = set()
+        self.recorded = 0
+        self.correct = 0
+        self.expires_at = time.time() + ttl
+
+    @property
+    def completed(self) -> bool:
+        return self.recorded == len(self.question_ids)
+
+
+class QuizSessionStore:
+    """Bounded TTL/LRU store of quiz sessions, keyed by session id.
+
+    Sessions live in the worker that started them, so a quiz needs the
+    same worker for its answers (as with sticky sessions); a session that
+    expired or was evicted answers 404 and the quiz is restarted.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl: float = 3600.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._sessions: "OrderedDict[str, QuizSession]" = OrderedDict()
+        self.started = 0
+        self.completed = 0
+        self.expired = 0
+
+    def create(self, user_id: str, topic_id: str, questions: List[Dict[str, Any]]) -> QuizSession:
+        session = QuizSession(user_id, topic_id, questions, self.ttl)
+        self._sessions[session.id] = session
+        while len(self._sessions) > self.max_entries:
+            self._sessions.popitem(last=False)
+        self.started += 1
+        return session
+
+    def get(self, session_id: str) -> Optional[QuizSession]:
+        session = self._sessions.get(session_id)
+        if session is None:
+            return None
+        if session.expires_at <= time.time():
+            del self._sessions[session_id]
+            self.expired += 1
+            return None
+        self._sessions.move_to_end(session_id)
+        return session
+
+    def finish(self, session: QuizSession) -> None:
+        if self._sessions.pop(session.id, None) is not None:
+            self.completed += 1
+
+    def clear(self) -> None:
+        self._sessions.clear()
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "active": len(self._sessions),
+            "max_entries": self.max_entries,
+            "started": self.started,
+            "completed": self.completed,
+            "expired": self.expired,
+        }
+
+
+# Process-wide quiz sessions
+quiz_sessions = QuizSessionStore(
+    max_entries=int(os.getenv("QUIZ_SESSION_MAX_ENTRIES", "10000")),
+    ttl=float(os.getenv("QUIZ_SESSION_TTL", "3600")),
+)
+
+class QuizService:
+    @staticmethod
+    async def start_quiz(topic_id: str, user_id: str, count: int) -> Dict[str, Any]:
+        """Pick up to ``count`` questions of one of the user's topics, in random order.
+
+        The question bank comes from the entity cache, so starting a quiz
+        on a hot topic costs no round trip. The answer key stays on the
+        server; the client only gets the questions and their options.
+        """
+        questions = await QuestionService.get_topic_questions(topic_id, user_id)
+        if not questions:
+            raise HTTPException(status_code=400, detail="This topic has no questions yet")
+        picked = sample_questions(questions, count)
+        session = quiz_sessions.create(user_id, topic_id, picked)
+        logger.info(f"Started quiz {session.id} on topic {topic_id} with {len(picked)} questions")
+        return {
+            "sessionId": session.id,
+            "topicId": topic_id,
+            "expiresAt": int(session.expires_at),
+            "questions": [
+                {"id": question["id"], "text": question["text"], "options": question["options"]}
+                for question in picked
+            ],
+        }
+
+    @staticmethod
+    async def submit_answers(session_id: str, user_id: str, batch: AnswerBatch) -> Dict[str, Any]:
+        """Grade a batch of answers against the session's key and store them in one transaction.
+
+        Answers to questions outside the quiz, or already answered, are
+        rejected before anything is written. The questions are reserved in
+        the session before the write is awaited, so a concurrent or retried
+        submission of the same answers gets 409 instead of storing them
+        twice; they are released again if the write fails.
+        """
+        session = quiz_sessions.get(session_id)
+        if session is None or session.user_id != user_id:
+            raise HTTPException(status_code=404, detail="Quiz session not found or expired")
+
+        seen = set()
+        for submission in batch.answers:
+            if submission.questionId not in session.key:
+                raise HTTPException(status_code=400, detail=f"Question {submission.questionId} is not part of this quiz")
+            if submission.questionId in session.answered or submission.questionId in seen:
+                raise HTTPException(status_code=409, detail=f"Question {submission.questionId} was already answered")
+            seen.add(submission.questionId)
+
+        # Reserved before awaiting the write; no await since the check above
+        session.answered.update(seen)
+
+        now = int(time.time())
+        results = []
+        events = []
+        for submission in batch.answers:
+            correct_answer, explanation = session.key[submission.questionId]
+            is_correct = submission.answer == correct_answer
+            results.append({
+                "questionId": submission.questionId,
+                "isCorrect": is_correct,
+                "correctAnswer": correct_answer,
+                "explanation": explanation,
+            })
+            events.append({
+                "id": str(uuid.uuid4()),
+                "user_id": user_id,
+                "topic_id": session.topic_id,
+                "question_id": submission.questionId,
+                "is_correct": int(is_correct),
+                "created_at": now,
+            })
+
+        if events:
+            try:
+                async with get_db().unit_of_work() as uow:
+                    for sql, args in record_statements(events):
+                        uow.add(sql, args)
+            except Exception as e:
+                # Release the questions so that the submission can be retried
+                session.answered.difference_update(seen)
+                logger.error(f"Error storing answers for quiz {session_id}")
+                logger.exception(e)
+                raise HTTPException(status_code=500, detail={"error": str(e), "type": str(type(e))})
+
+        session.recorded += len(seen)
+        session.correct += sum(result["isCorrect"] for result in results)
+        completed = session.completed
+        if completed:
+            quiz_sessions.finish(session)
+        return {
+            "sessionId": session.id,
+            "results": results,
+            "score": {
+                "correct": session.correct,
+                "answered": session.recorded,
+                "total": len(session.question_ids),
+            },
+            "completed": completed,
+        }
@@ -0,0 +1,106 @@
+import time
+import asyncio
+import pytest
+from fastapi import HTTPException
+from src.lib import db as db_module
+from src.lib.db import initialize_db
+from src.lib.db.entity_cache import entity_cache
+from src.lib.db.sqlite import SqliteDatabase
+from src.lib.db.stats import count_queries
+from src.lib.progress.stats import rebuild_stats
+from src.lib.quiz import service as quiz_service
+from src.lib.quiz.service import AnswerBatch, AnswerSubmission, QuizService, quiz_sessions
+
+@pytest.fixture
+async def db(tmp_path, monkeypatch):
+    """Get a database with a topic owned by u1 holding twenty questions, all answered with option 1."""
+    database = SqliteDatabase(str(tmp_path / "quiz.db"), on_open=initialize_db)
+    await database.open()
+    monkeypatch.setattr(db_module, "_db_pool", database)
+    entity_cache.clear()
+    quiz_sessions.clear()
+    now = int(time.time())
+    async with database.unit_of_work() as uow:
+        uow.add("INSERT INTO topics (id, user_id, title, lesson_plan, created_at, updated_at) VALUES ('t1', 'u1', 'T', '{}', ?, ?)", [now, now])
+        for i in range(20):
+            uow.add(
+                "INSERT INTO questions (id, topic_id, text, options, correct_answer, explanation) VALUES (?, 't1', 'Q', '[\"a\", \"b\"]', 1, 'e')",
+                [f"q{i}"]
+            )
+        uow.add("INSERT INTO topic_question_counts (topic_id, questions) VALUES ('t1', 20)")
+    yield database
+    await database.close()
+
+def _answers(questions, answer=1):
+    return AnswerBatch(answers=[AnswerSubmission(questionId=question["id"], answer=answer) for question in questions])
+
+async def _status(coro):
+    with pytest.raises(HTTPException) as excinfo:
+        await coro
+    return excinfo.value.status_code
+
+@pytest.mark.asyncio
+async def test_a_quiz_is_two_round_trips(db):
+    """Starting on a cached bank and submitting every answer costs one query in total."""
+    await QuizService.start_quiz("t1", "u1", 20)
+
+    with count_queries() as counter:
+        quiz = await QuizService.start_quiz("t1", "u1", 20)
+        result = await QuizService.submit_answers(quiz["sessionId"], "u1", _answers(quiz["questions"][:15]))
+    assert counter.queries == 1
+    assert "correctAnswer" not in quiz["questions"][0]
+    assert result["score"] == {"correct": 15, "answered": 15, "total": 20}
+    assert not result["completed"]
+
+    result = await QuizService.submit_answers(quiz["sessionId"], "u1", _answers(quiz["questions"][15:], answer=0))
+    assert result["score"] == {"correct": 15, "answered": 20, "total": 20}
+    assert result["completed"] and not result["results"][0]["isCorrect"]
+    assert quiz_sessions.get(quiz["sessionId"]) is None
+
+    stats = await db.fetch_one("SELECT correct_answers, incorrect_answers, correct_questions FROM topic_progress_stats")
+    assert tuple(stats) == (15, 5, 15)
+    await rebuild_stats(db)
+    stats = await db.fetch_one("SELECT correct_answers, incorrect_answers, correct_questions FROM topic_progress_stats")
+    assert tuple(stats) == (15, 5, 15)
+
+@pytest.mark.asyncio
+async def test_invalid_answers_are_refused_before_writing(db):
+    """Foreign sessions, questions outside the quiz and repeated answers write nothing."""
+    quiz = await QuizService.start_quiz("t1", "u1", 5)
+    picked = {question["id"] for question in quiz["questions"]}
+    outside = next(f"q{i}" for i in range(20) if f"q{i}" not in picked)
+
+    assert await _status(QuizService.submit_answers(quiz["sessionId"], "u2", _answers(quiz["questions"]))) == 404
+    assert await _status(QuizService.submit_answers("missing", "u1", _answers(quiz["questions"]))) == 404
+    assert await _status(QuizService.submit_answers(quiz["sessionId"], "u1", _answers([{"id": outside}]))) == 400
+    assert await _status(QuizService.submit_answers(quiz["sessionId"], "u1", _answers(quiz["questions"][:1] * 2))) == 409
+    assert (await db.fetch_one("SELECT COUNT(*) AS n FROM user_progress")).n == 0
+
+    await QuizService.submit_answers(quiz["sessionId"], "u1", _answers(quiz["questions"][:1]))
+    assert await _status(QuizService.submit_answers(quiz["sessionId"], "u1", _answers(quiz["questions"][:1]))) == 409
+    assert (await db.fetch_one("SELECT COUNT(*) AS n FROM user_progress")).n == 1
+    assert await _status(QuizService.start_quiz("t1", "u2", 5)) == 403
+
+@pytest.mark.asyncio
+async def test_concurrent_submissions_store_answers_once(db, monkeypatch):
+    """A retry racing the original submission is refused; a failed write can be retried."""
+    quiz = await QuizService.start_quiz("t1", "u1", 5)
+    batch = _answers(quiz["questions"])
+    first, second = await asyncio.gather(
+        QuizService.submit_answers(quiz["sessionId"], "u1", batch),
+        QuizService.submit_answers(quiz["sessionId"], "u1", batch),
+        return_exceptions=True,
+    )
+    assert first["completed"] and first["score"]["answered"] == 5
+    assert isinstance(second, HTTPException) and second.status_code == 409
+    assert (await db.fetch_one("SELECT COUNT(*) AS n FROM user_progress")).n == 5
+    assert (await db.fetch_one("SELECT correct_answers FROM topic_progress_stats")).correct_answers == 5
+
+    quiz = await QuizService.start_quiz("t1", "u1", 5)
+    batch = _answers(quiz["questions"])
+    with monkeypatch.context() as patch:
+        patch.setattr(quiz_service, "record_statements", lambda events: [("INSERT INTO missing VALUES (1)", [])])
+        assert await _status(QuizService.submit_answers(quiz["sessionId"], "u1", batch)) == 500
+    result = await QuizService.submit_answers(quiz["sessionId"], "u1", batch)
+    assert result["completed"]
+    assert (await db.fetch_one("SELECT COUNT(*) AS n FROM user_progress")).n == 10
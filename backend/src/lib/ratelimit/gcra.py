@@ -0,0 +1,199 @@
+import os
+import time
+import asyncio
+import sqlite3
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, NamedTuple, Optional
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+class RatePolicy(NamedTuple):
+    """``rate`` requests per ``period`` seconds, of which ``burst`` may arrive at once."""
+    name: str
+    rate: int
+    period: float = 60.0
+    burst: Optional[int] = None
+
+    @property
+    def interval(self) -> float:
+        """Seconds between requests at the sustained rate (the GCRA emission interval)."""
+        return self.period / self.rate
+
+    @property
+    def window(self) -> float:
+        """How far the theoretical arrival time may run ahead of now."""
+        return self.interval * (self.burst or self.rate)
+
+
+class Decision(NamedTuple):
+    allowed: bool
+    retry_after: float = 0.0
+
+
+class MemoryStore:
+    """Per-worker GCRA state: one float (theoretical arrival time) per key.
+
+    Keys whose arrival time has passed are back at a full burst, so they
+    are dropped when the store grows past ``max_keys``.
+    """
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._tats: Dict[str, float] = {}
+
+    def update(self, key: str, now: float, interval: float, window: float) -> Decision:
+        tat = max(self._tats.get(key, now), now) + interval
+        if tat - now > window:
+            return Decision(False, tat - now - window)
+        self._tats[key] = tat
+        if len(self._tats) > self.max_keys:
+            self._purge(now)
+        return Decision(True)
+
+    async def update_async(self, key: str, now: float, interval: float, window: float) -> Decision:
+        return self.update(key, now, interval, window)
+
+    def _purge(self, now: float) -> None:
+        self._tats = {key: tat for key, tat in self._tats.items() if tat > now}
+        if len(self._tats) > self.max_keys:
+            # Still full of active keys: forget the ones closest to recovering
+            keep = sorted(self._tats.items(), key=lambda item: item[1])[-self.max_keys // 2:]
+            self._tats = dict(keep)
+
+    def __len__(self) -> int:
+        return len(self._tats)
+
+
+class SqliteStore:
+    """GCRA state shared by the workers of one host through a local SQLite file.
+
+    Each decision is a single UPSERT, so concurrent workers can't both
+    spend the same slot. The file only holds rate-limit state: it runs
+    with ``synchronous = OFF`` and never touches the application database.
+
+    A busy file can make an UPSERT wait up to ``busy_timeout``, so
+    ``update_async()`` runs decisions on the store's own thread; the event
+    loop keeps serving requests meanwhile.
+    """
+
+    def __init__(self, path: str, busy_timeout: float = 1.0):
+        self.path = path
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ratelimit")
+        self._conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False, timeout=busy_timeout)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = OFF")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS rate_limits (key TEXT PRIMARY KEY, tat REAL NOT NULL) WITHOUT ROWID")
+        self._updates = 0
+
+    def update(self, key: str, now: float, interval: float, window: float) -> Decision:
+        # The conflict branch only updates (and returns a row) when the request fits
+        row = self._conn.execute(
+            """
+            INSERT INTO rate_limits (key, tat) VALUES (:key, :now + :interval)
+            ON CONFLICT(key) DO UPDATE SET tat = max(tat, :now) + :interval
+            WHERE max(tat, :now) + :interval - :now <= :window
+            RETURNING tat
+            """,
+            {"key": key, "now": now, "interval": interval, "window": window}
+        ).fetchone()
+
+        self._updates += 1
+        if self._updates % 10000 == 0:
+            self._conn.execute("DELETE FROM rate_limits WHERE tat < ?", [now])
+
+        if row is not None:
+            return Decision(True)
+        tat = self._conn.execute("SELECT tat FROM rate_limits WHERE key = ?", [key]).fetchone()[0]
+        return Decision(False, max(tat, now) + interval - now - window)
+
+    async def update_async(self, key: str, now: float, interval: float, window: float) -> Decision:
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor, self.update, key, now, interval, window
+        )
+
+    def close(self) -> None:
+        self._executor.shutdown()
+        self._conn.close()
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM rate_limits").fetchone()[0]
+
+
+class RateLimiter:
+    """Generic cell rate algorithm (GCRA) limiter over a pluggable store.
+
+    Each key costs one number of state; a request is allowed if, after
+    adding one emission interval, the key's theoretical arrival time is no
+    more than ``policy.window`` ahead of now.
+    """
+
+    def __init__(self, store=None, enabled: bool = True):
+        self.store = store if store is not None else MemoryStore()
+        self.enabled = enabled
+        self.allowed = 0
+        self.limited = 0
+
+    def hit(self, policy: RatePolicy, key: str, now: Optional[float] = None) -> Decision:
+        """Count one request for ``key`` under ``policy``, running the store inline."""
+        if not self.enabled:
+            return Decision(True)
+        if now is None:
+            now = time.time()
+        try:
+            decision = self.store.update(f"{policy.name}:{key}", now, policy.interval, policy.window)
+        except sqlite3.Error as e:
+            return self._failed(e)
+        return self._count(decision)
+
+    async def hit_async(self, policy: RatePolicy, key: str, now: Optional[float] = None) -> Decision:
+        """Count one request for ``key`` under ``policy``, without blocking the event loop."""
+        if not self.enabled:
+            return Decision(True)
+        if now is None:
+            now = time.time()
+        try:
+            decision = await self.store.update_async(f"{policy.name}:{key}", now, policy.interval, policy.window)
+        except sqlite3.Error as e:
+            return self._failed(e)
+        return self._count(decision)
+
+    def _failed(self, error: Exception) -> Decision:
+        # Fail open: a broken limiter must not take the API down with it
+        logger.error(f"Rate limit store failed: {str(error)}")
+        return Decision(True)
+
+    def _count(self, decision: Decision) -> Decision:
+        if decision.allowed:
+            self.allowed += 1
+        else:
+            self.limited += 1
+        return decision
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "store": type(self.store).__name__,
+            "keys": len(self.store),
+            "allowed": self.allowed,
+            "limited": self.limited,
+        }
+
+
+def create_limiter() -> RateLimiter:
+    """Create the limiter configured from the environment.
+
+    ``RATE_LIMIT_SYNC_PATH`` shares state between the workers of a host
+    through a local SQLite file, at the cost of a thread hop per decision;
+    without it each worker limits on its own, in memory.
+    """
+    enabled = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+    sync_path = os.getenv("RATE_LIMIT_SYNC_PATH")
+    store = SqliteStore(sync_path) if sync_path else MemoryStore()
+    return RateLimiter(store, enabled=enabled)
+
+
+# Process-wide limiter used by the middleware and the login route
+rate_limiter = create_limiter()
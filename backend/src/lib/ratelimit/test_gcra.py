@@ -0,0 +1,115 @@
+import time
+import asyncio
+import sqlite3
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from src.lib.ratelimit.gcra import MemoryStore, RateLimiter, RatePolicy, SqliteStore
+from src.lib.ratelimit.middleware import RateLimitMiddleware, RateRule
+
+POLICY = RatePolicy("test", rate=6, period=60, burst=3)  # one every 10s, three at once
+
+@pytest.fixture(params=["memory", "sqlite"])
+def limiter(request, tmp_path):
+    """Get a limiter on each store."""
+    if request.param == "memory":
+        yield RateLimiter(MemoryStore())
+    else:
+        store = SqliteStore(str(tmp_path / "limits.db"))
+        yield RateLimiter(store)
+        store.close()
+
+def test_allows_burst_then_sustained_rate(limiter):
+    """A full burst passes at once, then one request per emission interval."""
+    assert [limiter.hit(POLICY, "k", now=100).allowed for _ in range(3)] == [True] * 3
+
+    denied = limiter.hit(POLICY, "k", now=100)
+    assert not denied.allowed
+    assert denied.retry_after == pytest.approx(10)
+
+    assert not limiter.hit(POLICY, "k", now=109).allowed
+    assert limiter.hit(POLICY, "k", now=110).allowed
+    assert not limiter.hit(POLICY, "k", now=110).allowed
+    assert limiter.hit(POLICY, "other", now=110).allowed
+
+def test_idle_keys_recover_a_full_burst(limiter):
+    """After a long pause a key gets its whole burst back, not more."""
+    for _ in range(3):
+        limiter.hit(POLICY, "k", now=100)
+    assert [limiter.hit(POLICY, "k", now=1000).allowed for _ in range(4)] == [True, True, True, False]
+    assert limiter.metrics()["limited"] == 1
+
+def test_workers_share_sqlite_state(tmp_path):
+    """Two limiters on the same file spend the same budget."""
+    path = str(tmp_path / "shared.db")
+    first, second = RateLimiter(SqliteStore(path)), RateLimiter(SqliteStore(path))
+    assert first.hit(POLICY, "k", now=100).allowed
+    assert second.hit(POLICY, "k", now=100).allowed
+    assert first.hit(POLICY, "k", now=100).allowed
+    assert not second.hit(POLICY, "k", now=100).allowed
+
+def test_memory_store_stays_bounded():
+    """Recovered keys are purged once the store is full."""
+    store = MemoryStore(max_keys=10)
+    limiter = RateLimiter(store)
+    for i in range(25):
+        limiter.hit(POLICY, f"k{i}", now=100 + i * 100)
+    assert len(store) <= 10
+
+def test_middleware_returns_429_with_retry_after():
+    """Requests over the limit are answered before reaching the app."""
+    app = FastAPI()
+
+    @app.get("/api/v1/ping")
+    async def ping():
+        return {"ok": True}
+
+    limiter = RateLimiter()
+    rules = [RateRule("/api/v1/", RatePolicy("ping", rate=2, period=60), "ip")]
+    client = TestClient(RateLimitMiddleware(app, limiter, rules))
+
+    assert [client.get("/api/v1/ping").status_code for _ in range(2)] == [200, 200]
+    response = client.get("/api/v1/ping")
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) == 30
+    assert response.json()["detail"]["error_code"] == "RATE_LIMITED"
+
+    limiter.enabled = False
+    assert client.get("/api/v1/ping").status_code == 200
+
+@pytest.mark.asyncio
+async def test_busy_shared_store_does_not_block_the_event_loop(tmp_path):
+    """Waiting on a locked rate-limit file happens off the loop, then fails open."""
+    path = str(tmp_path / "limits.db")
+    store = SqliteStore(path, busy_timeout=0.3)
+    limiter = RateLimiter(store)
+    holder = sqlite3.connect(path, isolation_level=None)
+    holder.execute("BEGIN EXCLUSIVE")
+    try:
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticker = asyncio.create_task(tick())
+        started = time.monotonic()
+        decision = await limiter.hit_async(POLICY, "k")
+        waited = time.monotonic() - started
+        ticker.cancel()
+        assert decision.allowed
+        assert waited >= 0.25
+        # The loop kept running while the store waited for the lock
+        assert ticks >= 10
+    finally:
+        holder.execute("ROLLBACK")
+        holder.close()
+        store.close()
+
+@pytest.mark.asyncio
+async def test_hit_async_matches_hit(limiter):
+    """Both entry points make the same decisions."""
+    assert [(await limiter.hit_async(POLICY, "k", now=100)).allowed for _ in range(4)] == [True, True, True, False]
+    assert not limiter.hit(POLICY, "k", now=100).allowed
@@ -0,0 +1,25 @@
+from fastapi import APIRouter, Depends, Query
+from typing import List
+from src.lib.auth.principal import Principal
+from src.lib.auth.service import get_principal
+from src.lib.review.service import ReviewService
+from pydantic import BaseModel
+
+router = APIRouter(prefix="/review", tags=["review"])
+
+class ReviewItemResponse(BaseModel):
+    questionId: str
+    topicId: str
+    text: str
+    options: List[str]
+    dueAt: int
+    lastAnswerAt: int
+    intervalDays: float
+    ease: float
+    repetitions: int
+    lapses: int
+
+@router.get("/due", response_model=List[ReviewItemResponse])
+async def get_due_reviews(limit: int = Query(20, ge=1, le=200), current_user: Principal = Depends(get_principal)):
+    """Get up to ``limit`` of the user's questions that are due for review, most overdue first."""
+    return await ReviewService.get_due(current_user.id, limit)
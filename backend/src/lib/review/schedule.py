@@ -0,0 +1,68 @@
+from typing import Any, List, Optional, Tuple
+
+# SM-2 with pass/fail grades. A correct answer moves a question to its next
+# interval (1 day, 6 days, then the last interval times the ease); a wrong
+# one lowers the ease and brings the question back after RELEARN_SECONDS.
+INITIAL_EASE = 2.5
+MIN_EASE = 1.3
+LAPSE_EASE_PENALTY = 0.2
+RELEARN_SECONDS = 600
+DAY_SECONDS = 86400
+
+# Next interval (days) after a correct answer, against a review_schedule row
+_NEXT_INTERVAL = """
+    CASE review_schedule.repetitions
+        WHEN 0 THEN 1
+        WHEN 1 THEN 6
+        ELSE ROUND(review_schedule.interval_days * review_schedule.ease)
+    END
+"""
+
+# Folds answers into the schedule. ``{source}`` selects (user_id,
+# question_id, topic_id, is_correct, created_at, seq), seq breaking ties
+# between answers of the same second; rows are applied one by one in
+# answer order, so a batch or a full history replays like single answers
+# would. The inserted row is the state after a first answer; on
+# conflict its ``repetitions`` (1 or 0) says whether the answer was correct.
+SCHEDULE_ANSWERS_SQL = f"""
+    INSERT INTO review_schedule (
+        user_id, question_id, topic_id, repetitions, interval_days, ease, lapses, due_at, last_answer_at
+    )
+    SELECT user_id, question_id, topic_id, is_correct,
+           is_correct,
+           CASE WHEN is_correct THEN {INITIAL_EASE} ELSE {INITIAL_EASE - LAPSE_EASE_PENALTY} END,
+           1 - is_correct,
+           created_at + CASE WHEN is_correct THEN {DAY_SECONDS} ELSE {RELEARN_SECONDS} END,
+           created_at
+    FROM ({{source}})
+    WHERE true
+    ORDER BY created_at, seq
+    ON CONFLICT (user_id, question_id) DO UPDATE SET
+        repetitions = CASE WHEN excluded.repetitions THEN review_schedule.repetitions + 1 ELSE 0 END,
+        interval_days = CASE WHEN excluded.repetitions THEN {_NEXT_INTERVAL} ELSE 0 END,
+        ease = CASE WHEN excluded.repetitions THEN review_schedule.ease
+                    ELSE ROUND(MAX({MIN_EASE}, review_schedule.ease - {LAPSE_EASE_PENALTY}), 2) END,
+        lapses = review_schedule.lapses + excluded.lapses,
+        due_at = excluded.last_answer_at + CASE WHEN excluded.repetitions
+                                                THEN {_NEXT_INTERVAL} * {DAY_SECONDS}
+                                                ELSE {RELEARN_SECONDS} END,
+        last_answer_at = excluded.last_answer_at
+"""
+
+_HISTORY_SOURCE = "SELECT user_id, question_id, topic_id, is_correct, created_at, rowid AS seq FROM user_progress"
+
+# Schedules one recorded answer, by user_progress id (no-op if there is none)
+SCHEDULE_ANSWER_SQL = SCHEDULE_ANSWERS_SQL.format(source=f"{_HISTORY_SOURCE} WHERE id = ?")
+
+
+def schedule_rebuild_statements(topic_id: Optional[str] = None) -> List[Tuple[str, List[Any]]]:
+    """Statements that replay the answer history (of one topic, or all) into the schedule."""
+    if topic_id is None:
+        return [
+            ("DELETE FROM review_schedule", []),
+            (SCHEDULE_ANSWERS_SQL.format(source=_HISTORY_SOURCE), []),
+        ]
+    return [
+        ("DELETE FROM review_schedule WHERE topic_id = ?", [topic_id]),
+        (SCHEDULE_ANSWERS_SQL.format(source=f"{_HISTORY_SOURCE} WHERE topic_id = ?"), [topic_id]),
+    ]
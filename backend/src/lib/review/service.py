@@ -0,0 +1,49 @@
+from typing import Any, Dict, List
+import json
+import time
+from src.lib.db import get_db, RowMapper
+from fastapi import HTTPException
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Serialized review item fields (API name -> column), read straight off result rows
+REVIEW_FIELDS = {
+    "questionId": "question_id",
+    "topicId": "topic_id",
+    "text": "text",
+    "options": ("options", json.loads),
+    "dueAt": ("due_at", int),
+    "lastAnswerAt": ("last_answer_at", int),
+    "intervalDays": ("interval_days", float),
+    "ease": ("ease", float),
+    "repetitions": "repetitions",
+    "lapses": "lapses",
+}
+review_mapper = RowMapper(REVIEW_FIELDS)
+
+class ReviewService:
+    @staticmethod
+    async def get_due(user_id: str, limit: int) -> List[Dict[str, Any]]:
+        """Get the user's questions that are due for review, most overdue first.
+
+        One range scan over ``idx_review_schedule_due`` (user, due time),
+        which also yields the order; each item joins its question by
+        primary key.
+        """
+        try:
+            sql = """
+                SELECT s.question_id, s.topic_id, q.text, q.options, s.due_at, s.last_answer_at,
+                       s.interval_days, s.ease, s.repetitions, s.lapses
+                FROM review_schedule s
+                JOIN questions q ON q.id = s.question_id
+                WHERE s.user_id = ? AND s.due_at <= ?
+                ORDER BY s.due_at
+                LIMIT ?
+            """
+            rows = await get_db().fetch_all(sql, [user_id, int(time.time()), limit], mapper=review_mapper)
+            return [dict(row) for row in rows]
+        except Exception as e:
+            logger.error(f"Error getting due reviews for user {user_id}")
+            logger.exception(e)
+            raise HTTPException(status_code=500, detail={"error": str(e), "type": str(type(e))})
@@ -0,0 +1,92 @@
+import time
+import uuid
+import pytest
+from src.lib import db as db_module
+from src.lib.db import initialize_db
+from src.lib.db.entity_cache import entity_cache
+from src.lib.db.sqlite import SqliteDatabase
+from src.lib.db.stats import count_queries
+from src.lib.progress.stats import rebuild_stats, record_statements
+from src.lib.questions.service import QuestionService
+from src.lib.review.service import ReviewService
+from src.lib.topics.service import TopicService
+
+DAY = 86400
+
+@pytest.fixture
+async def db(tmp_path, monkeypatch):
+    """Get a database with a topic owned by u1 holding two questions."""
+    database = SqliteDatabase(str(tmp_path / "review.db"), on_open=initialize_db)
+    await database.open()
+    monkeypatch.setattr(db_module, "_db_pool", database)
+    entity_cache.clear()
+    now = int(time.time())
+    async with database.unit_of_work() as uow:
+        uow.add("INSERT INTO topics (id, user_id, title, lesson_plan, created_at, updated_at) VALUES ('t1', 'u1', 'T', '{}', ?, ?)", [now, now])
+        for question_id in ("q1", "q2"):
+            uow.add("INSERT INTO questions (id, topic_id, text, options, correct_answer) VALUES (?, 't1', 'Q', '[\"a\", \"b\"]', 0)", [question_id])
+        uow.add("INSERT INTO topic_question_counts (topic_id, questions) VALUES ('t1', 2)")
+    yield database
+    await database.close()
+
+async def _answer(db, *answers):
+    """Record (question id, correct, answered at) answers as one batch."""
+    events = [
+        {"id": str(uuid.uuid4()), "user_id": "u1", "topic_id": "t1", "question_id": question_id, "is_correct": int(correct), "created_at": at}
+        for question_id, correct, at in answers
+    ]
+    async with db.unit_of_work() as uow:
+        for sql, args in record_statements(events):
+            uow.add(sql, args)
+
+async def _schedule(db):
+    rows = await db.fetch_all("""
+        SELECT question_id, repetitions, interval_days, ease, lapses, due_at FROM review_schedule ORDER BY question_id
+    """)
+    return [tuple(row) for row in rows]
+
+@pytest.mark.asyncio
+async def test_answers_move_questions_through_sm2_intervals(db):
+    """Correct answers grow the interval by the ease; a lapse resets it and lowers the ease."""
+    t = 1_000_000
+    await _answer(db, ("q1", True, t))
+    assert await _schedule(db) == [("q1", 1, 1, 2.5, 0, t + DAY)]
+    # Several answers to the same question in one batch apply in order
+    await _answer(db, ("q1", True, t + DAY), ("q1", True, t + 7 * DAY), ("q2", False, t))
+    assert await _schedule(db) == [("q1", 3, 15, 2.5, 0, t + 22 * DAY), ("q2", 0, 0, 2.3, 1, t + 600)]
+    await _answer(db, ("q1", False, t + 22 * DAY), ("q1", False, t + 22 * DAY))
+    assert await _schedule(db) == [("q1", 0, 0, 2.1, 2, t + 22 * DAY + 600), ("q2", 0, 0, 2.3, 1, t + 600)]
+
+    # Replaying the history gives the same schedule
+    expected = await _schedule(db)
+    await db.execute("DELETE FROM review_schedule")
+    await rebuild_stats(db)
+    assert await _schedule(db) == expected
+    await rebuild_stats(db, "t1")
+    assert await _schedule(db) == expected
+
+@pytest.mark.asyncio
+async def test_due_questions_come_from_one_index_range_scan(db):
+    """Only due questions are listed, most overdue first, with one indexed query."""
+    now = int(time.time())
+    await _answer(db, ("q1", False, now - 3600), ("q2", True, now))
+
+    with count_queries() as counter:
+        due = await ReviewService.get_due("u1", 10)
+    assert counter.queries == 1
+    assert [(item["questionId"], item["options"]) for item in due] == [("q1", ["a", "b"])]
+    assert await ReviewService.get_due("u2", 10) == []
+
+    plan = " ".join(str(row[-1]) for row in await db.fetch_all(
+        "EXPLAIN QUERY PLAN SELECT * FROM review_schedule WHERE user_id = ? AND due_at <= ? ORDER BY due_at", ["u1", now]
+    ))
+    assert "idx_review_schedule_due" in plan and "TEMP B-TREE" not in plan
+
+@pytest.mark.asyncio
+async def test_deletes_drop_the_schedule(db):
+    """Deleting a question or its topic removes their review state."""
+    await _answer(db, ("q1", True, 1), ("q2", True, 1))
+    await QuestionService.delete_question("q1", "u1")
+    assert [row[0] for row in await _schedule(db)] == ["q2"]
+    await TopicService.delete_topic("t1", "u1")
+    assert await _schedule(db) == []
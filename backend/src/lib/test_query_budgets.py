@@ -0,0 +1,105 @@
+import gc
+import os
+import pytest
+from fastapi.testclient import TestClient
+from src.lib import db as db_module
+from src.lib.app import app
+from src.lib.db import SqliteDatabase, initialize_db
+from src.lib.db.profiling import QueryBudget, RequestProfiler
+from src.lib.ratelimit.gcra import rate_limiter
+
+# Round trips per request and p95 wall time (in-process, native sqlite backend).
+# Login and register hash passwords with bcrypt, so only their queries are budgeted.
+# Round trips are always enforced; wall time only with ENFORCE_LATENCY_BUDGETS=true,
+# since it depends on the machine (shared CI runners are too noisy for it).
+ENFORCE_LATENCY = os.getenv("ENFORCE_LATENCY_BUDGETS", "false").lower() == "true"
+
+BUDGETS = {
+    ("POST", "/api/v1/auth/register"): QueryBudget(queries=1),
+    ("POST", "/api/v1/auth/login"): QueryBudget(queries=2),
+    ("GET", "/api/v1/auth/me"): QueryBudget(queries=0, p95_ms=10),
+    ("POST", "/api/v1/topics"): QueryBudget(queries=1, p95_ms=25),
+    ("GET", "/api/v1/topics/user/{user_id}"): QueryBudget(queries=1, p95_ms=10),
+    ("GET", "/api/v1/topics/{topic_id}"): QueryBudget(queries=1, p95_ms=10),
+    # Were 2 (read, then write) until the writes became single guarded batches
+    ("PUT", "/api/v1/topics/{topic_id}"): QueryBudget(queries=1, p95_ms=25),
+    ("DELETE", "/api/v1/topics/{topic_id}"): QueryBudget(queries=1, p95_ms=25),
+    ("POST", "/api/v1/questions/topic/{topic_id}"): QueryBudget(queries=1, p95_ms=25),
+    ("GET", "/api/v1/questions/topic/{topic_id}"): QueryBudget(queries=1, p95_ms=10),
+    # Loading the bank on a cache miss, plus the review schedule for excludeMastered
+    ("GET", "/api/v1/questions/topic/{topic_id}/sample"): QueryBudget(queries=2, p95_ms=10),
+    ("PUT", "/api/v1/questions/{question_id}"): QueryBudget(queries=1, p95_ms=25),
+    ("POST", "/api/v1/progress/topic/{topic_id}"): QueryBudget(queries=1, p95_ms=25),
+    ("GET", "/api/v1/progress/topic/{topic_id}"): QueryBudget(queries=1, p95_ms=10),
+    ("POST", "/api/v1/quiz/{topic_id}/start"): QueryBudget(queries=1, p95_ms=10),
+    ("POST", "/api/v1/quiz/{session_id}/answers"): QueryBudget(queries=1, p95_ms=25),
+    ("GET", "/api/v1/review/due"): QueryBudget(queries=1, p95_ms=10),
+    ("GET", "/api/v1/users"): QueryBudget(queries=1, p95_ms=10),
+}
+
+@pytest.fixture
+def profiled_client(tmp_path, monkeypatch):
+    """Get a client for the app on a fresh sqlite database, with request profiling."""
+    database = SqliteDatabase(str(tmp_path / "budget.db"), on_open=initialize_db)
+    monkeypatch.setattr(db_module, "_db_pool", database)
+    monkeypatch.setattr(rate_limiter, "enabled", False)
+    if hasattr(app.state, "db"):
+        del app.state.db
+
+    profiler = RequestProfiler(app)
+    with TestClient(profiler) as client:
+        client.portal.call(database.open)
+        # Keep full collections over the test process's own heap out of the
+        # latency samples
+        gc.collect()
+        gc.freeze()
+        try:
+            yield client, profiler, database
+        finally:
+            gc.unfreeze()
+
+def test_routes_stay_within_query_budgets(profiled_client):
+    """Every exercised route stays within its round-trip and latency budget."""
+    client, profiler, database = profiled_client
+    response = client.post("/api/v1/auth/register", params={"username": "a@example.com", "password": "secret123", "name": "A"})
+    assert response.status_code == 200
+    user_id = response.json()["user"]["id"]
+    client.portal.call(database.execute, "UPDATE users SET roles = 'role_user,role_admin' WHERE id = ?", [user_id])
+
+    response = client.post("/api/v1/auth/login", data={"username": "a@example.com", "password": "secret123"})
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    topic_ids = []
+    for i in range(20):
+        response = client.post("/api/v1/topics", json={"userId": user_id, "title": f"T{i}", "description": "d"}, headers=headers)
+        assert response.status_code == 200
+        topic_ids.append(response.json()["id"])
+
+    for topic_id in topic_ids:
+        assert client.get("/api/v1/auth/me", headers=headers).status_code == 200
+        assert client.get(f"/api/v1/topics/user/{user_id}", headers=headers).status_code == 200
+        assert client.get(f"/api/v1/topics/{topic_id}", headers=headers).status_code == 200
+        assert client.put(f"/api/v1/topics/{topic_id}", json={"title": "x"}, headers=headers).status_code == 200
+        question = {"text": "Q", "options": ["a", "b"], "correctAnswer": 1, "explanation": "e"}
+        response = client.post(f"/api/v1/questions/topic/{topic_id}", json=question, headers=headers)
+        assert response.status_code == 200
+        question_id = response.json()["id"]
+        assert client.put(f"/api/v1/questions/{question_id}", json=question, headers=headers).status_code == 200
+        assert client.get(f"/api/v1/questions/topic/{topic_id}", headers=headers).status_code == 200
+        params = {"n": 5, "excludeMastered": True}
+        assert client.get(f"/api/v1/questions/topic/{topic_id}/sample", params=params, headers=headers).status_code == 200
+        answer = {"questionId": question_id, "isCorrect": True}
+        assert client.post(f"/api/v1/progress/topic/{topic_id}", json=answer, headers=headers).status_code == 200
+        assert client.get(f"/api/v1/progress/topic/{topic_id}", headers=headers).status_code == 200
+        response = client.post(f"/api/v1/quiz/{topic_id}/start", headers=headers)
+        assert response.status_code == 200
+        session_id = response.json()["sessionId"]
+        answers = {"answers": [{"questionId": question_id, "answer": 1}]}
+        assert client.post(f"/api/v1/quiz/{session_id}/answers", json=answers, headers=headers).status_code == 200
+        assert client.get("/api/v1/review/due", params={"limit": 20}, headers=headers).status_code == 200
+        assert client.get("/api/v1/users", headers=headers).status_code == 200
+    for topic_id in topic_ids:
+        assert client.delete(f"/api/v1/topics/{topic_id}", headers=headers).status_code == 200
+
+    violations = profiler.violations(BUDGETS, latency=ENFORCE_LATENCY)
+    assert not violations, "\n".join(violations)
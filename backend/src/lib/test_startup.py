@@ -0,0 +1,52 @@
+import asyncio
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from src.lib import db as db_module
+from src.lib.app import app
+from src.lib.auth import session_cache
+from src.lib.db import SqliteDatabase, initialize_db
+from src.lib.ratelimit.gcra import rate_limiter
+
+@pytest.mark.asyncio
+async def test_concurrent_first_requests_start_the_worker_once(tmp_path, monkeypatch):
+    """Background tasks are started by exactly one of several concurrent first requests."""
+    database = SqliteDatabase(str(tmp_path / "startup.db"), on_open=initialize_db)
+    monkeypatch.setattr(db_module, "_db_pool", database)
+    monkeypatch.setattr(rate_limiter, "enabled", False)
+    monkeypatch.setenv("SESSION_INVALIDATION_POLL_INTERVAL", "60")
+    monkeypatch.setattr(session_cache, "invalidation_channel", None)
+    if hasattr(app.state, "db"):
+        del app.state.db
+
+    starts = []
+    start = session_cache.SessionInvalidationChannel.start
+
+    async def slow_start(channel):
+        starts.append(channel)
+        await asyncio.sleep(0.05)
+        await start(channel)
+
+    monkeypatch.setattr(session_cache.SessionInvalidationChannel, "start", slow_start)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            responses = await asyncio.gather(*(client.get("/api/v1/auth/me") for _ in range(5)))
+        assert [response.status_code for response in responses] == [401] * 5
+        assert len(starts) == 1
+        assert session_cache.invalidation_channel is starts[0]
+        await app.state.revocations_loaded
+    assert session_cache.invalidation_channel is None
+
+def test_each_lifespan_starts_the_worker_afresh(tmp_path, monkeypatch):
+    """Shutdown forgets the closed database, so the next lifespan (on a new loop) opens its own."""
+    monkeypatch.setattr(rate_limiter, "enabled", False)
+    if hasattr(app.state, "db"):
+        del app.state.db
+    for run in range(2):
+        database = SqliteDatabase(str(tmp_path / f"run{run}.db"), on_open=initialize_db)
+        monkeypatch.setattr(db_module, "_db_pool", database)
+        with TestClient(app) as client:
+            assert client.get("/api/v1/auth/me").status_code == 401
+            assert app.state.db is database
+        assert database.closed
+        assert not hasattr(app.state, "db") and not hasattr(app.state, "auth_service")
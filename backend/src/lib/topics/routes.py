@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException
 from typing import List
-from src.lib.auth.service import get_current_user, require_admin
+from src.lib.auth.principal import Principal
+from src.lib.auth.service import get_principal, require_admin
 from src.lib.topics.service import TopicService, TopicCreate, TopicUpdate, LessonPlan
 from pydantic import BaseModel, ValidationError
 import logging
@@ -20,13 +21,13 @@ class TopicResponse(BaseModel):
     updatedAt: int
 
 @router.get("/user/{user_id}", response_model=List[TopicResponse])
-async def get_user_topics(user_id: str, current_user = Depends(get_current_user)):
+async def get_user_topics(user_id: str, current_user: Principal = Depends(get_principal)):
     """Get all topics for a specific user."""
-    if current_user["id"] != user_id and "role_admin" not in current_user.get("roles", []):
+    if current_user.id != user_id and not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Not authorized to view these topics")
     try:
         logger.info(f"Getting topics for user {user_id}")
-        topics = TopicService.get_user_topics(user_id)
+        topics = await TopicService.get_user_topics(user_id)
         logger.info(f"Successfully retrieved {len(topics)} topics")
         return topics
     except HTTPException as e:
@@ -40,10 +41,10 @@ async def get_user_topics(user_id: str, current_user = Depends(get_current_user)
         raise HTTPException(status_code=500, detail={"error": str(e), "type": str(type(e))})
 
 @router.get("/{topic_id}", response_model=TopicResponse)
-async def get_topic(topic_id: str, current_user = Depends(get_current_user)):
+async def get_topic(topic_id: str, current_user: Principal = Depends(get_principal)):
     """Get a specific topic by ID."""
     try:
-        logger.info(f"Fetching topic {topic_id} for user {current_user['id']}")
+        logger.info(f"Fetching topic {topic_id} for user {current_user.id}")
         topic = await TopicService.get_topic_by_id(topic_id)
         
         if not topic:
@@ -52,8 +53,8 @@ async def get_topic(topic_id: str, current_user = Depends(get_current_user)):
             
         logger.info(f"Topic data retrieved: {topic}")
         
-        if topic["userId"] != current_user["id"] and "role_admin" not in current_user.get("roles", []):
-            logger.error(f"User {current_user['id']} not authorized to view topic {topic_id}")
+        if topic["userId"] != current_user.id and not current_user.is_admin:
+            logger.error(f"User {current_user.id} not authorized to view topic {topic_id}")
             raise HTTPException(status_code=403, detail="Not authorized to view this topic")
             
         logger.info(f"Successfully returning topic {topic_id}")
@@ -69,14 +70,14 @@ async def get_topic(topic_id: str, current_user = Depends(get_current_user)):
         raise HTTPException(status_code=500, detail={"error": str(e), "type": str(type(e))})
 
 @router.post("", response_model=TopicResponse)
-def create_topic(topic: TopicCreate, current_user = Depends(get_current_user)):
+async def create_topic(topic: TopicCreate, current_user: Principal = Depends(get_principal)):
     """Create a new topic."""
     try:
-        logger.info(f"Creating topic for user {current_user['id']}")
-        topic.userId = current_user["id"]
+        logger.info(f"Creating topic for user {current_user.id}")
+        topic.userId = current_user.id
         logger.info(f"Topic data: {topic.dict()}")
         
-        new_topic = TopicService.create_topic(topic)
+        new_topic = await TopicService.create_topic(topic)
         logger.info(f"Topic created successfully: {new_topic}")
         return new_topic
     except HTTPException as e:
@@ -90,27 +91,15 @@ def create_topic(topic: TopicCreate, current_user = Depends(get_current_user)):
         raise HTTPException(status_code=500, detail={"error": str(e), "type": str(type(e))})
 
 @router.put("/{topic_id}", response_model=TopicResponse)
-async def update_topic(topic_id: str, topic: TopicUpdate, current_user = Depends(get_current_user)):
+async def update_topic(topic_id: str, topic: TopicUpdate, current_user: Principal = Depends(get_principal)):
     """Update a topic."""
-    existing_topic = await TopicService.get_topic_by_id(topic_id)
-    if not existing_topic:
-        raise HTTPException(status_code=404, detail="Topic not found")
-    if existing_topic["userId"] != current_user["id"] and "role_admin" not in current_user.get("roles", []):
-        raise HTTPException(status_code=403, detail="Not authorized to update this topic")
-    
-    updated_topic = await TopicService.update_topic(topic_id, topic)
+    updated_topic = await TopicService.update_topic(topic_id, topic, current_user.id, current_user.is_admin)
     if not updated_topic:
         raise HTTPException(status_code=400, detail="No fields to update")
     return updated_topic
 
 @router.delete("/{topic_id}")
-async def delete_topic(topic_id: str, current_user = Depends(get_current_user)):
+async def delete_topic(topic_id: str, current_user: Principal = Depends(get_principal)):
     """Delete a topic."""
-    existing_topic = await TopicService.get_topic_by_id(topic_id)
-    if not existing_topic:
-        raise HTTPException(status_code=404, detail="Topic not found")
-    if existing_topic["userId"] != current_user["id"] and "role_admin" not in current_user.get("roles", []):
-        raise HTTPException(status_code=403, detail="Not authorized to delete this topic")
-    
-    await TopicService.delete_topic(topic_id)
+    await TopicService.delete_topic(topic_id, current_user.id, current_user.is_admin)
     return {"message": "Topic deleted successfully"}
@@ -1,7 +1,8 @@
 from typing import List, Optional, Dict, Any
 import time
 import uuid
-from src.lib.db import get_db
+from src.lib.db import get_db, Record, RowMapper
+from src.lib.db.entity_cache import entity_cache, estimate_size
 from pydantic import BaseModel, ValidationError
 from fastapi import HTTPException
 import logging
@@ -60,51 +61,73 @@ class Topic(BaseModel):
             LessonPlan: lambda v: v.dict()
         }
 
-class TopicService:
-    db = get_db()
+def parse_lesson_plan(raw: Optional[str]) -> Dict[str, Any]:
+    """Decode the lesson_plan column, falling back to an empty plan."""
+    if not raw:
+        return {"mainTopics": [], "currentTopic": "", "completedTopics": []}
+    try:
+        return json.loads(raw)
+    except json.JSONDecodeError as e:
+        logger.error(f"Error decoding lesson_plan JSON: {e}")
+        logger.error(f"Raw lesson_plan value: {raw}")
+        return {"mainTopics": [], "currentTopic": "", "completedTopics": []}
+
+# Serialized topic fields (API name -> column), read straight off result rows
+TOPIC_FIELDS = {
+    "id": "id",
+    "userId": "user_id",
+    "title": "title",
+    "description": "description",
+    "lessonPlan": ("lesson_plan", parse_lesson_plan),
+    "createdAt": ("created_at", int),
+    "updatedAt": ("updated_at", int),
+}
+topic_mapper = RowMapper(TOPIC_FIELDS)
+
+TOPIC_COLUMNS = "id, user_id, title, description, lesson_plan, created_at, updated_at"
+
+# Guarded writes match a topic only if the caller owns it or is an admin
+# (args: topic id, user id, is_admin)
+OWNED_TOPIC = "id = ? AND (user_id = ? OR ?)"
+
+# Batched ahead of a guarded write to tell a missing topic from someone else's
+TOPIC_OWNER_SQL = "SELECT user_id FROM topics WHERE id = ?"
+
+def topic_cache_key(topic_id: str) -> str:
+    return f"topic:{topic_id}"
+
+def questions_cache_key(topic_id: str) -> str:
+    """Entity cache key of a topic's question list, versioned by the topic's updated_at."""
+    return f"questions:{topic_id}"
+
+def raise_for_topic_access(owner_result, action: str) -> None:
+    """Raise 404 or 403 for a guarded write that matched no row."""
+    if not owner_result.rows:
+        raise HTTPException(status_code=404, detail="Topic not found")
+    raise HTTPException(status_code=403, detail=f"Not authorized to {action} this topic")
 
+class TopicService:
     @staticmethod
-    def get_user_topics(user_id: str) -> List[Dict[str, Any]]:
+    async def get_user_topics(user_id: str) -> List[Record]:
         """Get all topics for a user."""
         try:
             logger.info(f"Getting topics for user {user_id}")
             
-            # First check if user exists
-            user_result = get_db().execute("SELECT id FROM users WHERE id = ?", [user_id])
-            user = user_result.rows
-            if not user:
+            # One round trip: an unknown user yields no row, a user without
+            # topics yields a single row of NULL topic columns
+            topics = await get_db().fetch_all("""
+                SELECT t.id, t.user_id, t.title, t.description, t.lesson_plan, t.created_at, t.updated_at
+                FROM users u
+                LEFT JOIN topics t ON t.user_id = u.id
+                WHERE u.id = ?
+                ORDER BY t.created_at DESC
+            """, [user_id], mapper=topic_mapper)
+            if not topics:
                 logger.error(f"User {user_id} not found")
                 raise HTTPException(status_code=404, detail=f"User {user_id} not found")
-
-            # Get topics
-            logger.info(f"User found, fetching their topics")
-            result = get_db().execute("""
-                SELECT id, user_id, title, description, lesson_plan, created_at, updated_at 
-                FROM topics
-                WHERE user_id = ?
-                ORDER BY created_at DESC
-            """, [user_id])
-            logger.info(f"Found {len(result.rows)} topics")
-
-            topics = []
-            for row in result.rows:
-                try:
-                    # Convert row tuple to dict with proper field names
-                    topic_dict = {
-                        "id": row[0],
-                        "userId": row[1],
-                        "title": row[2],
-                        "description": row[3],
-                        "lessonPlan": json.loads(row[4]) if row[4] else {"mainTopics": [], "currentTopic": "", "completedTopics": []},
-                        "createdAt": row[5],
-                        "updatedAt": row[6]
-                    }
-                    topics.append(topic_dict)
-                except Exception as e:
-                    logger.error(f"Error processing topic row: {row}")
-                    logger.error(f"Error: {str(e)}")
-                    logger.exception(e)
-                    continue
+            if topics[0]["id"] is None:
+                topics = []
+            logger.info(f"Found {len(topics)} topics")
 
             return topics
         except HTTPException as e:
@@ -118,47 +141,29 @@ class TopicService:
 
     @staticmethod
     async def get_topic_by_id(topic_id: str) -> Optional[Dict[str, Any]]:
-        """Get a specific topic by ID."""
+        """Get a specific topic by ID, from the entity cache when possible."""
         try:
+            cached = entity_cache.get(topic_cache_key(topic_id))
+            if cached is not None:
+                return cached
+
             logger.info(f"Getting topic {topic_id}")
-            db = get_db()
-            result = db.execute("""
-                SELECT id, user_id, title, description, lesson_plan, created_at, updated_at 
+            stamp = entity_cache.stamp()
+            topic = await get_db().fetch_one(f"""
+                SELECT {TOPIC_COLUMNS}
                 FROM topics
                 WHERE id = ?
-            """, [topic_id])
+            """, [topic_id], mapper=topic_mapper)
             
-            if not result.rows:
+            if topic is None:
                 logger.info(f"Topic {topic_id} not found")
                 return None
                 
-            row = result.rows[0]
-            logger.info(f"Found topic: {row}")
-            
-            try:
-                lesson_plan = json.loads(row[4]) if row[4] else {
-                    "mainTopics": [],
-                    "currentTopic": "",
-                    "completedTopics": []
-                }
-            except json.JSONDecodeError as e:
-                logger.error(f"Error decoding lesson_plan JSON: {e}")
-                logger.error(f"Raw lesson_plan value: {row[4]}")
-                lesson_plan = {
-                    "mainTopics": [],
-                    "currentTopic": "",
-                    "completedTopics": []
-                }
-            
-            return {
-                "id": row[0],
-                "userId": row[1],
-                "title": row[2],
-                "description": row[3],
-                "lessonPlan": lesson_plan,
-                "createdAt": row[5],
-                "updatedAt": row[6]
-            }
+            logger.info(f"Found topic: {topic}")
+            # Cache the decoded topic so hits skip the lesson_plan JSON parse
+            decoded = dict(topic)
+            entity_cache.put(topic_cache_key(topic_id), decoded, decoded["updatedAt"], estimate_size([topic]), stamp)
+            return decoded
         except Exception as e:
             logger.error(f"Error getting topic {topic_id}")
             logger.error(f"Error type: {type(e)}")
@@ -167,7 +172,7 @@ class TopicService:
             raise HTTPException(status_code=500, detail={"error": str(e), "type": str(type(e))})
 
     @staticmethod
-    def create_topic(topic: TopicCreate) -> Dict[str, Any]:
+    async def create_topic(topic: TopicCreate) -> Dict[str, Any]:
         """Create a new topic."""
         try:
             logger.info(f"Creating topic for user {topic.userId}")
@@ -178,7 +183,7 @@ class TopicService:
             lesson_plan = topic.get_lesson_plan()
             
             logger.info("Executing insert query")
-            result = get_db().execute("""
+            result = await get_db().execute("""
                 INSERT INTO topics (id, user_id, title, description, progress, lesson_plan, created_at, updated_at)
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?)
             """, [
@@ -216,9 +221,14 @@ class TopicService:
             )
 
     @staticmethod
-    async def update_topic(topic_id: str, data: TopicUpdate) -> Optional[Dict[str, Any]]:
+    async def update_topic(topic_id: str, data: TopicUpdate, user_id: str, is_admin: bool = False) -> Optional[Record]:
+        """Update a topic owned by ``user_id`` (any topic for admins).
+
+        The ownership check is part of the UPDATE, and the owner probe that
+        tells a missing topic from someone else's rides in the same batch,
+        so the whole update is one round trip.
+        """
         try:
-            db = get_db()
             current_time = int(time.time())
 
             # Build update query dynamically based on provided fields
@@ -237,39 +247,29 @@ class TopicService:
             updates.append("updated_at = ?")
             params.append(current_time)
 
-            # Add topic_id as the last parameter
-            params.append(topic_id)
-
             if not updates:
                 return None
 
-            result = db.execute(f"""
+            sql = f"""
                 UPDATE topics
                 SET {", ".join(updates)}
-                WHERE id = ? 
-                RETURNING id, user_id, title, description, lesson_plan, created_at, updated_at
-            """, params)
+                WHERE {OWNED_TOPIC}
+                RETURNING {TOPIC_COLUMNS}
+            """
+            async with get_db().unit_of_work() as uow:
+                owner = uow.add(TOPIC_OWNER_SQL, [topic_id])
+                updated = uow.add(sql, params + [topic_id, user_id, int(is_admin)])
 
-            if not result.rows:
-                raise HTTPException(status_code=404, detail="Topic not found")
+            topic = topic_mapper.one(uow.results[updated], sql)
+            if topic is None:
+                raise_for_topic_access(uow.results[owner], "update")
+            entity_cache.invalidate(topic_cache_key(topic_id), topic["updatedAt"])
 
-            row = result.rows[0]
             # Log the row data for debugging
-            logger.debug(f"Row data: {row}")
-            
-            return {
-                "id": row[0],
-                "userId": row[1], 
-                "title": row[2],
-                "description": row[3],
-                "lessonPlan": json.loads(row[4]) if row[4] else {
-                    "mainTopics": [],
-                    "currentTopic": "",
-                    "completedTopics": []
-                },
-                "createdAt": int(row[5]),  # Ensure integer conversion
-                "updatedAt": int(row[6])   # Ensure integer conversion
-            }
+            logger.debug(f"Row data: {topic}")
+            return topic
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error(f"Error updating topic {topic_id}")
             logger.error(f"Error type: {type(e)}")
@@ -281,26 +281,48 @@ class TopicService:
             )
 
     @staticmethod
-    async def delete_topic(topic_id: str) -> None:
-        """Delete a topic."""
+    async def delete_topic(topic_id: str, user_id: str, is_admin: bool = False) -> None:
+        """Delete a topic owned by ``user_id`` together with its questions and progress."""
         try:
-            db = get_db()
-            
-            # First check if the topic exists
-            result = db.execute("""
-                SELECT id FROM topics 
-                WHERE id = ?
-            """, [topic_id])
-            
-            if not result.rows:
-                raise HTTPException(status_code=404, detail="Topic not found")
-            
-            # Delete the topic
-            db.execute("""
-                DELETE FROM topics
-                WHERE id = ?
-            """, [topic_id])
-            
+            # Every delete is guarded by ownership, so a refused request
+            # leaves dependent rows alone; the probe runs first, before the
+            # topic row goes, and the whole batch is one round trip.
+            args = [topic_id, user_id, int(is_admin)]
+            async with get_db().unit_of_work() as uow:
+                owner = uow.add(TOPIC_OWNER_SQL, [topic_id])
+                uow.add(f"""
+                    DELETE FROM user_progress
+                    WHERE topic_id IN (SELECT id FROM topics WHERE {OWNED_TOPIC})
+                """, args)
+                uow.add(f"""
+                    DELETE FROM topic_progress_stats
+                    WHERE topic_id IN (SELECT id FROM topics WHERE {OWNED_TOPIC})
+                """, args)
+                uow.add(f"""
+                    DELETE FROM topic_question_counts
+                    WHERE topic_id IN (SELECT id FROM topics WHERE {OWNED_TOPIC})
+                """, args)
+                uow.add(f"""
+                    DELETE FROM review_schedule
+                    WHERE user_id IN (SELECT user_id FROM topics WHERE {OWNED_TOPIC}) AND topic_id = ?
+                """, args + [topic_id])
+                uow.add(f"""
+                    DELETE FROM questions
+                    WHERE topic_id IN (SELECT id FROM topics WHERE {OWNED_TOPIC})
+                """, args)
+                deleted = uow.add(f"""
+                    DELETE FROM topics
+                    WHERE {OWNED_TOPIC}
+                    RETURNING id
+                """, args)
+
+            if not uow.results[deleted].rows:
+                raise_for_topic_access(uow.results[owner], "delete")
+            entity_cache.invalidate(topic_cache_key(topic_id))
+            entity_cache.invalidate(questions_cache_key(topic_id))
+
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error(f"Error deleting topic {topic_id}")
             logger.error(f"Error type: {type(e)}")
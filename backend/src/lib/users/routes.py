@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, Request, status
-from ..auth.jwt import decode_access_token
+from ..auth.profiles import profile_cache
 from ..auth.routes import oauth2_scheme
-from ..auth.service import AuthenticationError, requires_auth, row_to_dict
+from ..auth.service import AuthenticationError, get_principal, requires_auth, user_mapper
 from pydantic import BaseModel
 from typing import List, Dict, Optional
 
@@ -21,25 +21,15 @@ class UserUpdate(BaseModel):
     name: Optional[str]
     roles: Optional[List[str]]
 
-def require_admin(token: str = Depends(oauth2_scheme)):
+async def require_admin(request: Request, token: str = Depends(oauth2_scheme)):
     """Verify the user has admin role."""
-    try:
-        payload = decode_access_token(token)
-        user = payload["user"]
-        if "role_admin" not in user["roles"]:
-            raise HTTPException(
-                status_code=403,
-                detail={"error_code": "FORBIDDEN", "message": "Admin access required"}
-            )
-        return token
-    except HTTPException:
-        raise
-    except Exception as e:
-        print(f"Error verifying admin role: {str(e)}")
+    principal = await get_principal(request)
+    if not principal.is_admin:
         raise HTTPException(
-            status_code=401,
-            detail={"error_code": "INVALID_TOKEN", "message": "Could not validate credentials"}
+            status_code=403,
+            detail={"error_code": "FORBIDDEN", "message": "Admin access required"}
         )
+    return token
 
 @router.get(
     "",
@@ -105,7 +95,7 @@ async def list_users(
     - Admin role
     """
     try:
-        return request.app.state.auth_service.list_users()
+        return await request.app.state.auth_service.list_users()
     except AuthenticationError as e:
         raise HTTPException(
             status_code=400,
@@ -191,32 +181,31 @@ async def update_user(
     db = request.app.state.db
 
     # Verify user exists
-    result = db.execute(
-        "SELECT * FROM users WHERE id = ?",
-        [user_id]
+    user = await db.fetch_one(
+        "SELECT name, roles FROM users WHERE id = ?",
+        [user_id],
+        mapper=user_mapper
     )
-    if not result.rows:
+    if user is None:
         raise HTTPException(status_code=404, detail="User not found")
-    user = row_to_dict(result.rows[0])
 
     # Update user details
-    name = user_update.name if user_update.name is not None else user["name"]
-    roles = user_update.roles if user_update.roles is not None else user["roles"].split(",")
+    name = user_update.name if user_update.name is not None else user.name
+    roles = user_update.roles if user_update.roles is not None else user.roles
 
-    result = db.execute(
+    updated = await db.fetch_one(
         """
         UPDATE users
         SET name = ?, roles = ?
         WHERE id = ?
         RETURNING id, email, name, roles, created_at, updated_at
         """,
-        [name, ",".join(roles), user_id]
+        [name, ",".join(roles), user_id],
+        mapper=user_mapper
     )
-
-    # Convert row to dict and properly format roles
-    updated_user = row_to_dict(result.rows[0])
-    updated_user["roles"] = updated_user["roles"].split(",")
-    return updated_user
+    # Roles are checked against the profile, so this applies to existing tokens
+    profile_cache.invalidate(user_id)
+    return updated
 
 @router.delete(
     "/{user_id}",
@@ -289,7 +278,7 @@ async def delete_user(
     db = request.app.state.db
 
     # Verify user exists
-    result = db.execute(
+    result = await db.execute(
         "SELECT * FROM users WHERE id = ?",
         [user_id]
     )
@@ -297,9 +286,10 @@ async def delete_user(
         raise HTTPException(status_code=404, detail="User not found")
 
     # Delete user (cascade will handle sessions)
-    db.execute(
+    await db.execute(
         "DELETE FROM users WHERE id = ?",
         [user_id]
     )
+    profile_cache.invalidate(user_id)
 
     return {"message": "User deleted successfully"}